@@ -2,55 +2,85 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import Optional, Literal
+from app.core.config import settings
 from app.core.database import get_db
 from app.services.chat_analytics_service import ChatAnalyticsService
+from app.services.approx_analytics_service import ApproxAnalyticsService
 
 router = APIRouter(prefix="/api/chat-analytics")
 
+def _reject_compare(compare: Optional[str]) -> None:
+    # 근사 모드는 비교 기간을 지원하지 않음 (두 표본 추정치의 차이는 신뢰구간이 너무 넓음)
+    if compare:
+        raise ValueError("compare is not supported with approx mode")
+
 @router.get("/daily")
-async def get_daily_stats(
+def get_daily_stats(
     startDate: str = Query(..., description="시작일 (YYYY-MM-DD)"),
     endDate: str = Query(..., description="종료일 (YYYY-MM-DD)"),
+    compare: Optional[Literal['previous', 'lastWeek', 'lastYear']] = Query(None, description="비교 기간 (previous/lastWeek/lastYear)"),
+    businessDaysOnly: bool = Query(False, description="영업일(주말/공휴일 제외)만 집계"),
+    approx: bool = Query(False, description="표본 기반 근사 집계 (카운트는 95% 신뢰구간, 사용자 수는 오차 범위 포함)"),
+    sample: Optional[float] = Query(None, gt=0, le=settings.APPROX_MAX_FRACTION, description="표본 비율 (0~APPROX_MAX_FRACTION, 생략 시 지연 시간 목표에 맞춰 자동 조정)"),
     db: Session = Depends(get_db)
 ):
     try:
+        if approx or sample is not None:
+            _reject_compare(compare)
+            return ApproxAnalyticsService(db).get_daily_stats(startDate, endDate, businessDaysOnly, sample)
         service = ChatAnalyticsService(db)
-        return service.get_daily_stats(startDate, endDate)
+        return service.get_daily_stats(startDate, endDate, compare, businessDaysOnly)
     except ValueError as e:
         return {"success": False, "error": str(e)}
 
 @router.get("/hourly")
-async def get_hourly_stats(
+def get_hourly_stats(
     dateType: Literal['today', 'yesterday', 'thisWeek', 'thisMonth', 'custom'],
     startDate: Optional[str] = None,
     endDate: Optional[str] = None,
+    compare: Optional[Literal['previous', 'lastWeek', 'lastYear']] = Query(None, description="비교 기간 (previous/lastWeek/lastYear)"),
+    approx: bool = Query(False, description="표본 기반 근사 집계 (카운트는 95% 신뢰구간, 사용자 수는 오차 범위 포함)"),
+    sample: Optional[float] = Query(None, gt=0, le=settings.APPROX_MAX_FRACTION, description="표본 비율 (0~APPROX_MAX_FRACTION, 생략 시 지연 시간 목표에 맞춰 자동 조정)"),
     db: Session = Depends(get_db)
 ):
     try:
+        if approx or sample is not None:
+            _reject_compare(compare)
+            return ApproxAnalyticsService(db).get_hourly_stats(dateType, startDate, endDate, sample)
         service = ChatAnalyticsService(db)
-        return service.get_hourly_stats(dateType, startDate, endDate)
+        return service.get_hourly_stats(dateType, startDate, endDate, compare)
     except ValueError as e:
         return {"success": False, "error": str(e)}
 
 @router.get("/weekday")
-async def get_weekday_stats(
+def get_weekday_stats(
     year: int = Query(..., ge=2000, le=2100, description="연도 (YYYY)"),
     month: int = Query(..., ge=1, le=12, description="월 (1-12)"),
+    compare: Optional[Literal['previous', 'lastWeek', 'lastYear']] = Query(None, description="비교 기간 (previous/lastWeek/lastYear)"),
+    businessDaysOnly: bool = Query(False, description="영업일(주말/공휴일 제외)만 집계"),
+    approx: bool = Query(False, description="표본 기반 근사 집계 (카운트는 95% 신뢰구간, 사용자 수는 오차 범위 포함)"),
+    sample: Optional[float] = Query(None, gt=0, le=settings.APPROX_MAX_FRACTION, description="표본 비율 (0~APPROX_MAX_FRACTION, 생략 시 지연 시간 목표에 맞춰 자동 조정)"),
     db: Session = Depends(get_db)
 ):
     try:
+        if approx or sample is not None:
+            _reject_compare(compare)
+            return ApproxAnalyticsService(db).get_weekday_stats(year, month, businessDaysOnly, sample)
         service = ChatAnalyticsService(db)
-        return service.get_weekday_stats(year, month)
+        return service.get_weekday_stats(year, month, compare, businessDaysOnly)
     except ValueError as e:
         return {"success": False, "error": str(e)}
 
 @router.get("/ranking")
-async def get_user_ranking(
+def get_user_ranking(
     period: str = Query(..., description="조회 기간 (daily/weekly/monthly/custom)"),
     limit: int = Query(10, ge=5, le=50, description="조회할 사용자 수"),
     sortOrder: str = Query('desc', description="정렬 순서 (asc/desc)"),
     startDate: Optional[str] = Query(None, description="시작일 (YYYY-MM-DD)"),
     endDate: Optional[str] = Query(None, description="종료일 (YYYY-MM-DD)"),
+    compare: Optional[Literal['previous', 'lastWeek', 'lastYear']] = Query(None, description="비교 기간 (previous/lastWeek/lastYear)"),
+    approx: bool = Query(False, description="표본 기반 근사 집계 (카운트는 95% 신뢰구간, 사용자 수는 오차 범위 포함)"),
+    sample: Optional[float] = Query(None, gt=0, le=settings.APPROX_MAX_FRACTION, description="표본 비율 (0~APPROX_MAX_FRACTION, 생략 시 지연 시간 목표에 맞춰 자동 조정)"),
     db: Session = Depends(get_db)
 ):
     try:
@@ -64,7 +94,11 @@ async def get_user_ranking(
         if period == 'custom' and (not startDate or not endDate):
             raise ValueError("startDate and endDate are required for custom period")
 
+        if approx or sample is not None:
+            _reject_compare(compare)
+            return ApproxAnalyticsService(db).get_user_ranking(period, limit, sortOrder, startDate, endDate, sample)
+
         service = ChatAnalyticsService(db)
-        return service.get_user_ranking(period, limit, sortOrder, startDate, endDate)
+        return service.get_user_ranking(period, limit, sortOrder, startDate, endDate, compare)
     except ValueError as e:
         return {"success": False, "error": str(e)} 
\ No newline at end of file
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
 from typing import Optional, Literal
+from app.core.admission import AdmissionRejected
 from app.core.database import get_db
 from app.services.chat_service import ChatService
 
 router = APIRouter()
 
 @router.get("/api/chats")
-async def get_chats(
+def get_chats(
     startDate: str = Query(..., description="조회 시작일 (YYYY-MM-DD)"),
     endDate: str = Query(..., description="조회 종료일 (YYYY-MM-DD)"),
     isStock: Optional[Literal["stock", "non-stock", "all"]] = Query("all", description="종목 여부 필터"),
@@ -30,5 +31,7 @@ async def get_chats(
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except (HTTPException, AdmissionRejected):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error") 
\ No newline at end of file
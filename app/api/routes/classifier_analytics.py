@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Literal
+from app.core.database import get_db
+from app.services.classifier_analytics_service import ClassifierAnalyticsService
+
+router = APIRouter(prefix="/api/classifier-analytics")
+
+@router.get("/agreement")
+def get_agreement_stats(
+    startDate: str = Query(..., description="시작일 (YYYY-MM-DD)"),
+    endDate: str = Query(..., description="종료일 (YYYY-MM-DD)"),
+    groupBy: Literal['range', 'day'] = Query('range', description="집계 단위 (range: 기간 전체, day: 일자별)"),
+    db: Session = Depends(get_db)
+):
+    try:
+        service = ClassifierAnalyticsService(db)
+        return service.get_agreement_stats(startDate, endDate, groupBy)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
@@ -1,30 +1,41 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from datetime import datetime
+from typing import Optional
+from app.core.config import settings
 from app.core.database import get_db
 from app.services.click_analytics_service import ClickAnalyticsService
+from app.services.approx_analytics_service import ApproxAnalyticsService
 
 router = APIRouter(prefix="/api/click-analytics")
 
 @router.get("/user-ranking")
-async def get_user_click_ranking(
+def get_user_click_ranking(
     startDate: str = Query(..., description="시작일 (YYYY-MM-DD)"),
     endDate: str = Query(..., description="종료일 (YYYY-MM-DD)"),
+    approx: bool = Query(False, description="표본 기반 근사 집계 (카운트는 95% 신뢰구간, 사용자 수는 오차 범위 포함)"),
+    sample: Optional[float] = Query(None, gt=0, le=settings.APPROX_MAX_FRACTION, description="표본 비율 (0~APPROX_MAX_FRACTION, 생략 시 지연 시간 목표에 맞춰 자동 조정)"),
     db: Session = Depends(get_db)
 ):
     try:
+        if approx or sample is not None:
+            return ApproxAnalyticsService(db).get_user_click_ranking(startDate, endDate, sample)
         service = ClickAnalyticsService(db)
         return service.get_user_click_ranking(startDate, endDate)
     except ValueError as e:
         return {"success": False, "error": str(e)}
 
 @router.get("/ratio")
-async def get_click_ratio(
+def get_click_ratio(
     startDate: str = Query(..., description="시작일 (YYYY-MM-DD)"),
     endDate: str = Query(..., description="종료일 (YYYY-MM-DD)"),
+    approx: bool = Query(False, description="표본 기반 근사 집계 (카운트는 95% 신뢰구간, 사용자 수는 오차 범위 포함)"),
+    sample: Optional[float] = Query(None, gt=0, le=settings.APPROX_MAX_FRACTION, description="표본 비율 (0~APPROX_MAX_FRACTION, 생략 시 지연 시간 목표에 맞춰 자동 조정)"),
     db: Session = Depends(get_db)
 ):
     try:
+        if approx or sample is not None:
+            return ApproxAnalyticsService(db).get_click_ratio(startDate, endDate, sample)
         service = ClickAnalyticsService(db)
         return service.get_click_ratio(startDate, endDate)
     except ValueError as e:
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.core.readiness import readiness
+
+router = APIRouter(prefix="/health")
+
+@router.get("/live")
+async def live():
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def ready():
+    snapshot = readiness.snapshot()
+    return JSONResponse(status_code=200 if snapshot["ready"] else 503, content=snapshot)
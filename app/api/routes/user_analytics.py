@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Literal
+from app.core.database import get_db
+from app.services.user_analytics_service import UserAnalyticsService
+
+router = APIRouter(prefix="/api/user-analytics")
+
+@router.get("/activity")
+def get_activity(
+    startDate: str = Query(..., description="시작일 (YYYY-MM-DD)"),
+    endDate: str = Query(..., description="종료일 (YYYY-MM-DD)"),
+    db: Session = Depends(get_db)
+):
+    try:
+        service = UserAnalyticsService(db)
+        return service.get_activity(startDate, endDate)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+
+@router.get("/retention")
+def get_retention(
+    startDate: str = Query(..., description="코호트 시작일 (YYYY-MM-DD)"),
+    endDate: str = Query(..., description="코호트 종료일 (YYYY-MM-DD)"),
+    period: Literal['week', 'month'] = Query('week', description="코호트/리텐션 단위 (week/month)"),
+    periods: int = Query(12, ge=1, le=60, description="코호트별로 계산할 기간 수"),
+    db: Session = Depends(get_db)
+):
+    try:
+        service = UserAnalyticsService(db)
+        return service.get_retention(startDate, endDate, period, periods)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
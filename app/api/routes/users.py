@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.core.database import get_db
+from app.services.user_service import UserService
+
+router = APIRouter(prefix="/api/users")
+
+@router.get("/search")
+def search_users(
+    q: str = Query(..., min_length=1, description="사용자 ID 검색어"),
+    limit: int = Query(10, ge=1, le=50, description="조회할 사용자 수"),
+    db: Session = Depends(get_db)
+):
+    service = UserService(db)
+    return service.search_users(q, limit)
+
+@router.get("/{userId}/chats")
+def get_user_chats(
+    userId: str,
+    startDate: Optional[str] = Query(None, description="시작일 (YYYY-MM-DD)"),
+    endDate: Optional[str] = Query(None, description="종료일 (YYYY-MM-DD)"),
+    before: Optional[str] = Query(None, description="이전 응답의 nextCursor (이 대화 이전 대화만 조회)"),
+    limit: int = Query(20, ge=1, le=100, description="조회할 대화 수"),
+    db: Session = Depends(get_db)
+):
+    service = UserService(db)
+    return service.get_user_chats(userId, startDate, endDate, before, limit)
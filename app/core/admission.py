@@ -0,0 +1,186 @@
+import calendar
+import functools
+import inspect
+import math
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.sampling import sample_tuner
+from app.core.utils import DateUtils
+
+# 조회 하루당 비용 가중치 (대략적인 상대 비용)
+METHOD_WEIGHTS = {
+    "chat_analytics.daily": 1.0,
+    "chat_analytics.hourly": 1.0,
+    "chat_analytics.weekday": 1.0,
+    "chat_analytics.ranking": 1.5,
+    "click_analytics.user_ranking": 2.0,
+    "click_analytics.ratio": 2.0,
+    "chats": 1.0
+}
+# 근사(표본) 조회는 원래 메서드 이름 앞에 붙여 구분한다 (예: approx.chat_analytics.daily)
+APPROX_PREFIX = "approx."
+# content ILIKE 키워드 검색은 본문 전체를 읽으므로 비용을 크게 잡는다
+KEYWORD_FACTOR = 10.0
+# EXPLAIN 의 Total Cost 를 비용 단위로 환산하는 값
+EXPLAIN_COST_PER_UNIT = 1000.0
+
+# 모든 레인에서 실행 중이거나 대기 중인 요청이 함께 쓰는 스레드 수 상한
+# (대기도 스레드 풀 스레드를 붙잡으므로, 레인별 한도의 합이 아니라 이 값으로 전체를 묶는다)
+_thread_budget = threading.BoundedSemaphore(settings.ADMISSION_MAX_THREADS)
+
+class AdmissionRejected(Exception):
+    """레인이나 전체 스레드 한도가 가득 차 요청을 거절함 (API 계층에서 429 로 변환)"""
+
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f"Too many expensive requests in '{lane}' lane. Retry later.")
+        self.lane = lane
+        self.retry_after = retry_after
+
+class Lane:
+    """동시 실행 수, 대기 시간, statement timeout 을 갖는 우선순위 레인"""
+
+    def __init__(self, name: str, max_cost: float, limit: int, max_wait: float, statement_timeout_ms: int):
+        self.name = name
+        self.max_cost = max_cost
+        self.limit = limit
+        self.max_wait = max_wait
+        self.max_queue = limit * 4
+        self.statement_timeout_ms = statement_timeout_ms
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        # 최근 실행 시간의 지수 이동 평균 (Retry-After 계산용)
+        self._avg_duration = 1.0
+
+    def retry_after(self) -> int:
+        with self._lock:
+            return max(1, math.ceil(self._avg_duration * (self._waiting + 1) / self.limit))
+
+    def acquire(self) -> None:
+        # 전체 스레드 한도를 넘으면 기다리지 않고 바로 거절한다
+        if not _thread_budget.acquire(blocking=False):
+            raise AdmissionRejected(self.name, self.retry_after())
+
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                rejected = True
+            else:
+                rejected = False
+                self._waiting += 1
+        if rejected:
+            _thread_budget.release()
+            raise AdmissionRejected(self.name, self.retry_after())
+
+        try:
+            acquired = self._semaphore.acquire(timeout=self.max_wait)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        if not acquired:
+            _thread_budget.release()
+            raise AdmissionRejected(self.name, self.retry_after())
+
+    def release(self, duration: float) -> None:
+        with self._lock:
+            self._avg_duration = self._avg_duration * 0.8 + duration * 0.2
+        self._semaphore.release()
+        _thread_budget.release()
+
+LANES = [
+    Lane("interactive", 31, settings.ADMISSION_INTERACTIVE_LIMIT, 2.0, 5000),
+    Lane("standard", 366, settings.ADMISSION_STANDARD_LIMIT, 5.0, 15000),
+    Lane("heavy", math.inf, settings.ADMISSION_HEAVY_LIMIT, 10.0, 60000)
+]
+
+def choose_lane(cost: float) -> Lane:
+    for lane in LANES:
+        if cost <= lane.max_cost:
+            return lane
+    return LANES[-1]
+
+def _parse(value: Optional[str]) -> Optional[date]:
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+def resolve_range(arguments: Dict[str, Any]) -> Optional[Tuple[date, date]]:
+    """서비스 메서드 인자에서 조회 기간을 계산한다 (알 수 없으면 None)"""
+    if arguments.get("date_type"):
+        date_range = DateUtils.get_date_range(arguments["date_type"], arguments.get("start_date"), arguments.get("end_date"))
+        return date_range['start'], date_range['end']
+    if arguments.get("period") and arguments["period"] != 'custom':
+        date_range = DateUtils.get_period_range(arguments["period"])
+        return date_range['start'], date_range['end']
+    if arguments.get("start_date") and arguments.get("end_date"):
+        return _parse(arguments["start_date"]), _parse(arguments["end_date"])
+    if arguments.get("year") and arguments.get("month"):
+        year, month = arguments["year"], arguments["month"]
+        return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+    return None
+
+def estimate_cost(name: str, arguments: Dict[str, Any]) -> float:
+    approx = name.startswith(APPROX_PREFIX)
+    method = name[len(APPROX_PREFIX):] if approx else name
+    date_range = resolve_range(arguments)
+    days = (date_range[1] - date_range[0]).days + 1 if date_range else 1
+    cost = max(days, 1) * METHOD_WEIGHTS.get(method, 1.0)
+    if approx:
+        # 표본 비율만큼만 읽는다 (생략 시 지연 시간 목표로 고를 비율)
+        fraction = arguments.get("fraction") or sample_tuner.fraction(method)
+        cost *= min(fraction, settings.APPROX_MAX_FRACTION)
+    if arguments.get("compare"):
+        cost *= 2
+    if arguments.get("keyword"):
+        cost *= KEYWORD_FACTOR
+    return cost
+
+def explain_cost(db, query) -> float:
+    """EXPLAIN (FORMAT JSON) 의 Total Cost 를 비용 단위로 환산한다"""
+    # 값을 SQL 에 직접 넣으면 검색어의 ':30' 같은 문자열이 바인드 파라미터로 해석되므로 파라미터로 넘긴다
+    statement = query.statement.compile(db.get_bind(), compile_kwargs={"render_postcompile": True})
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", statement.params).scalar()
+    return plan[0]["Plan"]["Total Cost"] / EXPLAIN_COST_PER_UNIT
+
+def _set_statement_timeout(db, timeout_ms: int) -> None:
+    if db.get_bind().dialect.name != 'postgresql':
+        return
+    # 트랜잭션 범위로만 적용되어 풀에 반납된 커넥션에는 남지 않는다
+    db.execute(text("SELECT set_config('statement_timeout', :timeout, true)"), {"timeout": str(timeout_ms)})
+
+def admitted(name: str):
+    """서비스 메서드를 비용에 맞는 레인에서 실행한다
+
+    레인이 가득 차면 max_wait 동안 기다리고, 그래도 자리가 없거나 대기열/전체 스레드 한도가 넘치면
+    AdmissionRejected 로 거절한다 (API 계층에서 429 + Retry-After). 캐시 적중 시에는 통과하도록 cached_result 안쪽에 둔다.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not settings.ADMISSION_ENABLED:
+                return method(self, *args, **kwargs)
+
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = {k: v for k, v in bound.arguments.items() if k != "self"}
+            try:
+                cost = estimate_cost(name, arguments)
+                if settings.ADMISSION_USE_EXPLAIN and hasattr(self, "build_query"):
+                    cost = max(cost, explain_cost(self.db, self.build_query(**arguments)))
+            except ValueError:
+                # 잘못된 파라미터는 서비스 메서드가 직접 오류를 반환하도록 그대로 넘긴다
+                return method(self, *args, **kwargs)
+
+            lane = choose_lane(cost)
+            lane.acquire()
+            started = time.monotonic()
+            try:
+                _set_statement_timeout(self.db, lane.statement_timeout_ms)
+                return method(self, *args, **kwargs)
+            finally:
+                lane.release(time.monotonic() - started)
+        return wrapper
+    return decorator
@@ -0,0 +1,445 @@
+import heapq
+import json
+import lzma
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from sqlalchemy.orm import Session
+from app.core.business_calendar import business_calendar
+from app.core.config import settings
+from app.models.archive import ArchivedMonth
+
+MAGIC = b'IBKA1\n'
+EPOCH = datetime(1970, 1, 1)
+MICROS_PER_HOUR = 3600 * 1000000
+
+# 보관 파일의 행 구성 (ConvLog + ClickedLog + StockCls 를 conv_id 기준으로 펼친 형태, 자식 행이 없으면 None)
+COLUMNS = ['conv_id', 'date', 'qa', 'content', 'user_id', 'clicked', 'clicked_user_id', 'ensemble', 'gpt_res', 'enc_res']
+# 값 종류가 적은 컬럼은 사전(dictionary) 번호로 저장한다
+CODED_COLUMNS = ['qa', 'clicked', 'ensemble', 'gpt_res', 'enc_res']
+USER_COLUMNS = ['user_id', 'clicked_user_id']
+
+def _to_micros(value: datetime) -> int:
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+def _from_micros(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=value)
+
+def _array_bytes(values: array) -> bytes:
+    # 파일은 항상 little-endian 으로 기록한다
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _array_from(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+def _dictionary(values: Iterable[Optional[str]]) -> List[Optional[str]]:
+    return sorted(set(values), key=lambda value: (value is not None, value or ''))
+
+def _codes(values: Sequence[Optional[str]], dictionary: List[Optional[str]]) -> array:
+    lookup = {value: code for code, value in enumerate(dictionary)}
+    return array('I' if len(dictionary) > 255 else 'B', (lookup[value] for value in values))
+
+def write_archive(path: str, month: date, rows: List[tuple]) -> int:
+    """한 달치 행을 컬럼별로 압축해 파일로 기록하고 파일 크기를 반환한다
+
+    파일 구성: MAGIC | 헤더 길이(4바이트) | JSON 헤더 | 컬럼 블록들
+    헤더에는 컬럼별 위치/인코딩과 일자별 행 범위(작은 인덱스)가 들어간다.
+    행은 date, conv_id 순으로 정렬해서 기록하므로 일자 범위 조회는 연속 구간이 된다.
+    """
+    rows = sorted(rows, key=lambda row: (row[1], row[0]))
+    columns = {name: [row[i] for row in rows] for i, name in enumerate(COLUMNS)}
+
+    blocks: List[Tuple[str, Dict[str, Any], bytes]] = []
+
+    def add(name: str, meta: Dict[str, Any], raw: bytes, codec: str) -> None:
+        payload = lzma.compress(raw, preset=6) if codec == 'lzma' else zlib.compress(raw, 9)
+        blocks.append((name, {**meta, "codec": codec}, payload))
+
+    # 문자열 컬럼은 JSON 배열로 묶어 lzma 로 압축 (본문은 비슷한 문장이 많아 압축률이 높다)
+    for name in ['conv_id', 'content']:
+        add(name, {"type": "strings"}, json.dumps(columns[name], ensure_ascii=False).encode(), 'lzma')
+
+    # 시각은 정렬되어 있으므로 이전 행과의 차이(마이크로초)만 저장한다
+    micros = [_to_micros(value) for value in columns['date']]
+    deltas = array('q', (current - previous for previous, current in zip([0] + micros, micros)))
+    add('date', {"type": "int64-delta"}, _array_bytes(deltas), 'zlib')
+
+    # 사용자 ID 는 월 단위 사전에 한 번씩만 저장하고 행에는 번호만 둔다
+    users = _dictionary(columns['user_id'] + columns['clicked_user_id'])
+    add('users', {"type": "strings"}, json.dumps(users, ensure_ascii=False).encode(), 'lzma')
+    for name in USER_COLUMNS:
+        codes = _codes(columns[name], users)
+        add(name, {"type": "codes", "typecode": codes.typecode, "dictionary": "users"}, _array_bytes(codes), 'zlib')
+
+    for name in CODED_COLUMNS:
+        dictionary = _dictionary(columns[name])
+        codes = _codes(columns[name], dictionary)
+        add(name, {"type": "codes", "typecode": codes.typecode, "values": dictionary}, _array_bytes(codes), 'zlib')
+
+    days: Dict[str, List[int]] = {}
+    for index, value in enumerate(columns['date']):
+        key = value.strftime("%Y-%m-%d")
+        if key in days:
+            days[key][1] = index + 1
+        else:
+            days[key] = [index, index + 1]
+
+    offset = 0
+    header_columns = {}
+    for name, meta, payload in blocks:
+        header_columns[name] = {**meta, "offset": offset, "length": len(payload)}
+        offset += len(payload)
+    header = json.dumps({
+        "version": 1,
+        "month": month.strftime("%Y-%m"),
+        "rows": len(rows),
+        "columns": header_columns,
+        "days": days
+    }, ensure_ascii=False).encode()
+
+    # 임시 파일에 쓴 뒤 rename 해서 읽는 쪽이 쓰다 만 파일을 보지 않게 한다
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as file:
+        file.write(MAGIC)
+        file.write(struct.pack('<I', len(header)))
+        file.write(header)
+        for _, _, payload in blocks:
+            file.write(payload)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+    return os.path.getsize(path)
+
+class ArchiveFile:
+    """보관 월 파일 하나 (헤더만 먼저 읽고 컬럼은 필요할 때 압축을 푼다)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not an archive file: {path}")
+            (length,) = struct.unpack('<I', file.read(4))
+            self.header = json.loads(file.read(length))
+        self.data_offset = len(MAGIC) + 4 + length
+        self.rows = self.header["rows"]
+        # (일자, 시작 행, 끝 행) - 일자 순 정렬
+        self.days = [
+            (datetime.strptime(day, "%Y-%m-%d").date(), lo, hi)
+            for day, (lo, hi) in sorted(self.header["days"].items())
+        ]
+        self._day_keys = [day for day, _, _ in self.days]
+        self._columns: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _read(self, name: str) -> bytes:
+        meta = self.header["columns"][name]
+        with open(self.path, 'rb') as file:
+            file.seek(self.data_offset + meta["offset"])
+            payload = file.read(meta["length"])
+        return lzma.decompress(payload) if meta["codec"] == 'lzma' else zlib.decompress(payload)
+
+    def column(self, name: str) -> Any:
+        """문자열 컬럼은 list, 시각은 마이크로초 list, 사전 컬럼은 번호 array 로 반환한다"""
+        with self._lock:
+            if name in self._columns:
+                return self._columns[name]
+            meta = self.header["columns"][name]
+            raw = self._read(name)
+            if meta["type"] == "strings":
+                value = json.loads(raw)
+            elif meta["type"] == "int64-delta":
+                value = list(accumulate(_array_from('q', raw)))
+            else:
+                value = _array_from(meta["typecode"], raw)
+            self._columns[name] = value
+            return value
+
+    def values(self, name: str) -> List[Optional[str]]:
+        """사전 컬럼의 번호 -> 값 목록"""
+        meta = self.header["columns"][name]
+        return self.column('users') if meta.get("dictionary") == 'users' else meta["values"]
+
+    def code(self, name: str, value: str) -> int:
+        """사전 컬럼에서 value 의 번호 (없으면 -1)"""
+        values = self.values(name)
+        return values.index(value) if value in values else -1
+
+    def day_ranges(self, start: date, end: date) -> List[Tuple[date, int, int]]:
+        return self.days[bisect_left(self._day_keys, start):bisect_right(self._day_keys, end)]
+
+    def row_range(self, start: date, end: date) -> Tuple[int, int]:
+        ranges = self.day_ranges(start, end)
+        if not ranges:
+            return 0, 0
+        return ranges[0][1], ranges[-1][2]
+
+    def to_rows(self) -> List[tuple]:
+        """COLUMNS 순서의 원본 행 목록 (복원용)"""
+        decoded = {}
+        for name in COLUMNS:
+            if name == 'date':
+                decoded[name] = [_from_micros(value) for value in self.column('date')]
+            elif name in CODED_COLUMNS or name in USER_COLUMNS:
+                values = self.values(name)
+                decoded[name] = [values[code] for code in self.column(name)]
+            else:
+                decoded[name] = self.column(name)
+        return list(zip(*(decoded[name] for name in COLUMNS)))
+
+class ArchiveStore:
+    """ibk_archive_month 목록과 보관 파일을 묶어 기간 단위 조회를 제공한다
+
+    보관 월은 DB 에서 지워진 상태이므로, 조회하는 쪽은 DB 결과에 여기서 구한 값을 더하면 된다.
+    목록은 매번 DB 에서 읽어 다른 워커가 옮긴 월도 바로 반영하고,
+    압축을 푼 파일은 최근 사용한 몇 개월만 메모리에 둔다.
+    """
+
+    def __init__(self, directory: str, cache_months: int):
+        self.directory = directory
+        self.cache_months = cache_months
+        self._files: "OrderedDict[Tuple[str, float], ArchiveFile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path_for(self, month: date, version: str) -> str:
+        """새로 쓸 보관 파일 경로 (다시 보관해도 기존 파일을 덮어쓰지 않도록 version 을 붙인다)"""
+        # 컨테이너 안의 상대 경로에 쓰면 재배포 때 보관 월이 사라지므로 영구 볼륨의 절대 경로만 허용한다
+        if not self.directory or not os.path.isabs(self.directory):
+            raise ValueError("ARCHIVE_DIR must be set to an absolute path on persistent storage to archive months")
+        return os.path.join(self.directory, f"convlog-{month.strftime('%Y-%m')}.{version}.ibka")
+
+    def open(self, path: str) -> ArchiveFile:
+        # 같은 경로의 파일이 바뀌었으면 다시 읽도록 수정 시각까지 키로 쓴다
+        key = (path, os.path.getmtime(path))
+        with self._lock:
+            archive = self._files.get(key)
+            if archive is not None:
+                self._files.move_to_end(key)
+                return archive
+        archive = ArchiveFile(path)
+        with self._lock:
+            self._files[key] = archive
+            while len(self._files) > self.cache_months:
+                self._files.popitem(last=False)
+        return archive
+
+    def catalog(self, db: Session, start: Optional[date] = None, end: Optional[date] = None) -> List[ArchivedMonth]:
+        query = db.query(ArchivedMonth)
+        if start is not None:
+            query = query.filter(ArchivedMonth.month >= start.replace(day=1))
+        if end is not None:
+            query = query.filter(ArchivedMonth.month <= end)
+        return query.order_by(ArchivedMonth.month).all()
+
+    def covers(self, db: Session, start: date, end: date) -> bool:
+        """start ~ end 에 보관된 월이 하나라도 있는지"""
+        return bool(self.catalog(db, start, end))
+
+    def segments(self, db: Session, start: date, end: date) -> List[Tuple[ArchiveFile, int, int]]:
+        segments = []
+        for entry in self.catalog(db, start, end):
+            archive = self.open(entry.path)
+            lo, hi = archive.row_range(start, end)
+            if lo < hi:
+                segments.append((archive, lo, hi))
+        return segments
+
+    def user_ids(self, db: Session) -> Set[str]:
+        users = set()
+        for entry in self.catalog(db):
+            users.update(user for user in self.open(entry.path).column('users') if user is not None)
+        return users
+
+    def daily_counts(self, db: Session, start: date, end: date, business_days_only: bool = False) -> Dict[str, List[int]]:
+        """{날짜: [질문 수, 사용자 수]} (ChatAnalyticsService._daily_counts 와 같은 형태)"""
+        counts = {}
+        for entry in self.catalog(db, start, end):
+            archive = self.open(entry.path)
+            question = archive.code('qa', 'Q')
+            qa, users = archive.column('qa'), archive.column('user_id')
+            for day, lo, hi in archive.day_ranges(start, end):
+                if business_days_only and not business_calendar.is_business_day(day):
+                    continue
+                counts[day.strftime("%Y-%m-%d")] = [
+                    sum(1 for code in qa[lo:hi] if code == question),
+                    len(set(users[lo:hi]))
+                ]
+        return counts
+
+    def daily_users(self, db: Session, start: date, end: date) -> Dict[date, Set[str]]:
+        """{날짜: 활동 사용자 ID 집합}"""
+        users = {}
+        for entry in self.catalog(db, start, end):
+            archive = self.open(entry.path)
+            codes, names = archive.column('user_id'), archive.column('users')
+            for day, lo, hi in archive.day_ranges(start, end):
+                users[day] = {names[code] for code in set(codes[lo:hi])}
+        return users
+
+    def day_stats(self, db: Session, target: date) -> Optional[Dict[str, Any]]:
+        """하루의 질문 수, 사용자 ID 집합, 클릭 수, 종목 분류 결과 수 (보관된 날짜가 아니면 None)"""
+        segments = self.segments(db, target, target)
+        if not segments:
+            return None
+        archive, lo, hi = segments[0]
+        question, clicked = archive.code('qa', 'Q'), archive.code('clicked', 'o')
+        correct, incorrect = archive.code('ensemble', 'o'), archive.code('ensemble', 'x')
+        qa, clicks, ensemble = archive.column('qa')[lo:hi], archive.column('clicked')[lo:hi], archive.column('ensemble')[lo:hi]
+        names = archive.column('users')
+        return {
+            'chat_count': sum(1 for code in qa if code == question),
+            'users': {names[code] for code in set(archive.column('user_id')[lo:hi])},
+            'click_count': sum(1 for code in clicks if code == clicked),
+            'correct_predictions': sum(1 for code in ensemble if code == correct),
+            'incorrect_predictions': sum(1 for code in ensemble if code == incorrect)
+        }
+
+    def hourly_counts(self, db: Session, start: date, end: date) -> Dict[int, int]:
+        """{시: 질문 수}"""
+        counts: Dict[int, int] = {}
+        for archive, lo, hi in self.segments(db, start, end):
+            question = archive.code('qa', 'Q')
+            qa, micros = archive.column('qa'), archive.column('date')
+            for index in range(lo, hi):
+                if qa[index] == question:
+                    hour = micros[index] // MICROS_PER_HOUR % 24
+                    counts[hour] = counts.get(hour, 0) + 1
+        return counts
+
+    def weekday_counts(self, db: Session, start: date, end: date, business_days_only: bool = False) -> Dict[int, list]:
+        """{ISO 요일: [질문 수, 사용자 ID 집합]} (사용자 수는 DB 쪽 집합과 합친 뒤 센다)"""
+        counts: Dict[int, list] = {}
+        for entry in self.catalog(db, start, end):
+            archive = self.open(entry.path)
+            question = archive.code('qa', 'Q')
+            qa, users, names = archive.column('qa'), archive.column('user_id'), archive.column('users')
+            for day, lo, hi in archive.day_ranges(start, end):
+                if business_days_only and not business_calendar.is_business_day(day):
+                    continue
+                bucket = counts.setdefault(day.isoweekday(), [0, set()])
+                bucket[0] += sum(1 for code in qa[lo:hi] if code == question)
+                bucket[1].update(names[code] for code in set(users[lo:hi]))
+        return counts
+
+    def user_counts(self, db: Session, start: date, end: date) -> Dict[str, List[int]]:
+        """{user_id: [질문 수, 클릭한 대화 수, 클릭 기록('o'/'x')이 있는 대화 수]} (기간 내 행이 있는 모든 사용자)"""
+        counts: Dict[str, List[int]] = {}
+        for archive, lo, hi in self.segments(db, start, end):
+            question = archive.code('qa', 'Q')
+            clicked = archive.code('clicked', 'o')
+            unclicked = archive.code('clicked', None)
+            qa, users, clicks = archive.column('qa'), archive.column('user_id'), archive.column('clicked')
+            names = archive.column('users')
+            by_code: Dict[int, List[int]] = {}
+            for index in range(lo, hi):
+                bucket = by_code.setdefault(users[index], [0, 0, 0])
+                bucket[0] += qa[index] == question
+                bucket[1] += clicks[index] == clicked
+                bucket[2] += clicks[index] != unclicked
+            for code, values in by_code.items():
+                bucket = counts.setdefault(names[code], [0, 0, 0])
+                for position, value in enumerate(values):
+                    bucket[position] += value
+        return counts
+
+    def find_chats(
+        self,
+        db: Session,
+        start: date,
+        end: date,
+        is_stock: str = "all",
+        user_ids: Optional[List[str]] = None,
+        user_keyword: Optional[str] = None,
+        keyword: Optional[str] = None,
+        limit: int = 10,
+        before: Optional[Tuple[datetime, str]] = None
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """ChatService.build_query 와 같은 조건의 질문을 최신순으로 최대 limit 개와 전체 개수를 반환한다
+
+        before 가 있으면 (시각, conv_id) 가 그보다 앞선 행만 본다 (키셋 페이지네이션 커서).
+        """
+        total = 0
+        found = []
+        wanted_users = set(user_ids) if user_ids is not None else None
+        lowered_user = user_keyword.lower() if user_keyword else None
+        lowered_keyword = keyword.lower() if keyword else None
+
+        # 최신 월부터 보므로 limit 개를 채우면 이후 월은 개수만 센다
+        for entry in reversed(self.catalog(db, start, end)):
+            archive = self.open(entry.path)
+            lo, hi = archive.row_range(start, end)
+            if lo >= hi:
+                continue
+            question = archive.code('qa', 'Q')
+            stock = archive.code('ensemble', 'o')
+            non_stock = archive.code('ensemble', 'x')
+            qa, ensemble = archive.column('qa'), archive.column('ensemble')
+            users, names = archive.column('user_id'), archive.column('users')
+
+            # 사용자 조건은 사전에서 먼저 번호로 바꿔 행마다 문자열을 비교하지 않는다
+            allowed = None
+            if wanted_users is not None:
+                allowed = {code for code, name in enumerate(names) if name in wanted_users}
+            elif lowered_user:
+                allowed = {code for code, name in enumerate(names) if name is not None and lowered_user in name.lower()}
+            contents = archive.column('content') if lowered_keyword else None
+            if before is not None:
+                # 행은 (시각, conv_id) 순으로 정렬되어 있으므로 커서 이후 행은 구간에서 잘라낸다
+                micros, conv_ids = archive.column('date'), archive.column('conv_id')
+                cursor = _to_micros(before[0])
+                cut = bisect_left(micros, cursor, lo, hi)
+                while cut < hi and micros[cut] == cursor and conv_ids[cut] < before[1]:
+                    cut += 1
+                hi = cut
+
+            matched = []
+            for index in range(hi - 1, lo - 1, -1):
+                if qa[index] != question:
+                    continue
+                if is_stock == "stock" and ensemble[index] != stock:
+                    continue
+                if is_stock == "non-stock" and ensemble[index] != non_stock:
+                    continue
+                if allowed is not None and users[index] not in allowed:
+                    continue
+                if contents is not None and lowered_keyword not in contents[index].lower():
+                    continue
+                matched.append(index)
+            total += len(matched)
+
+            if len(found) < limit and matched:
+                conv_ids, contents, micros = archive.column('conv_id'), archive.column('content'), archive.column('date')
+                for index in matched[:limit - len(found)]:
+                    found.append({
+                        "id": conv_ids[index],
+                        "timestamp": _from_micros(micros[index]),
+                        "userId": names[users[index]],
+                        "question": contents[index],
+                        "isStock": ensemble[index] == stock
+                    })
+
+        return total, found
+
+def merge_newest(hot: List[Dict[str, Any]], cold: List[Dict[str, Any]], offset: int, limit: int) -> List[Dict[str, Any]]:
+    """최신순으로 정렬된 두 목록을 합쳐 offset ~ offset + limit 구간을 반환한다"""
+    merged = heapq.merge(hot, cold, key=lambda row: row["timestamp"], reverse=True)
+    return list(merged)[offset:offset + limit]
+
+archive_store = ArchiveStore(settings.ARCHIVE_DIR, settings.ARCHIVE_CACHE_MONTHS)
@@ -0,0 +1,167 @@
+import csv
+import logging
+import os
+import threading
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+HOLIDAYS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "kr_holidays.csv")
+
+def load_holidays(path: str = HOLIDAYS_PATH) -> Dict[date, str]:
+    holidays: Dict[date, str] = {}
+    with open(path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            target = date.fromisoformat(row["date"])
+            # 어린이날과 부처님오신날이 겹치는 경우처럼 같은 날짜가 여러 번 나올 수 있다
+            holidays[target] = f"{holidays[target]}, {row['name']}" if target in holidays else row["name"]
+    return holidays
+
+class BusinessCalendar:
+    """날짜 차원을 메모리에 미리 계산해 두고 O(1) 로 조회한다
+
+    공휴일 데이터가 없는 연도는 주말만 제외되므로 missing_holiday_years 로 확인할 수 있게 하고,
+    그런 연도의 영업일을 조회하면 연도별로 한 번 경고를 남긴다.
+    """
+
+    def __init__(self, start: date, end: date, holidays: Dict[date, str]):
+        self.start = start
+        self.end = end
+        self.holidays = holidays
+        self.holiday_years = {target.year for target in holidays}
+        self._warned_years = set()
+        self._warn_lock = threading.Lock()
+        # 수만 행이라 import 시점이 아니라 처음 조회할 때(워밍업의 calendar 단계) 만든다
+        self._rows: Optional[List[dict]] = None
+        self._previous_business: List[Optional[date]] = []
+        self._build_lock = threading.Lock()
+
+    def _build(self) -> List[dict]:
+        with self._build_lock:
+            if self._rows is not None:
+                return self._rows
+            rows: List[dict] = []
+            previous_business: List[Optional[date]] = []
+            business_index = 0
+            last_business: Optional[date] = None
+            current = self.start
+            while current <= self.end:
+                is_business = current.weekday() < 5 and current not in self.holidays
+                # 직전 영업일은 자기 자신을 제외한 가장 가까운 이전 영업일
+                previous_business.append(last_business)
+                if is_business:
+                    business_index += 1
+                    last_business = current
+                iso = current.isocalendar()
+                rows.append({
+                    "date": current,
+                    "year": current.year,
+                    "month": current.month,
+                    "isodow": iso[2],
+                    "iso_year": iso[0],
+                    "iso_week": iso[1],
+                    "is_holiday": current in self.holidays,
+                    "holiday_name": self.holidays.get(current),
+                    "is_business_day": is_business,
+                    "business_day_index": business_index
+                })
+                current += timedelta(days=1)
+            self._previous_business = previous_business
+            self._rows = rows
+            return rows
+
+    def _offset(self, target: date) -> Optional[int]:
+        if target < self.start or target > self.end:
+            return None
+        return (target - self.start).days
+
+    def get(self, target: date) -> Optional[dict]:
+        offset = self._offset(target)
+        return self.rows()[offset] if offset is not None else None
+
+    def missing_holiday_years(self, start: date, end: date) -> List[int]:
+        """start ~ end 중 공휴일 데이터가 없는 연도 (해당 연도는 공휴일도 영업일로 계산된다)"""
+        return [year for year in range(start.year, end.year + 1) if year not in self.holiday_years]
+
+    def _warn_missing(self, year: int) -> None:
+        if year in self.holiday_years or year in self._warned_years:
+            return
+        with self._warn_lock:
+            if year not in self._warned_years:
+                self._warned_years.add(year)
+                logger.warning(f"No holiday data for {year}; business days in {year} only exclude weekends")
+
+    def is_business_day(self, target: date) -> bool:
+        self._warn_missing(target.year)
+        row = self.get(target)
+        if row is None:
+            # 달력 범위 밖은 주말만 제외한다
+            return target.weekday() < 5
+        return row["is_business_day"]
+
+    def previous_business_day(self, target: date) -> date:
+        offset = self._offset(target)
+        # 직전 영업일 목록은 달력 행과 함께 만들어진다
+        self.rows()
+        if offset is not None and self._previous_business[offset] is not None:
+            return self._previous_business[offset]
+        previous = target - timedelta(days=1)
+        while not self.is_business_day(previous):
+            previous -= timedelta(days=1)
+        return previous
+
+    def business_days_between(self, start: date, end: date) -> int:
+        """start ~ end (양끝 포함) 사이의 영업일 수"""
+        start_row, end_row = self.get(start - timedelta(days=1)), self.get(end)
+        if start_row is None or end_row is None:
+            return sum(
+                1 for i in range((end - start).days + 1)
+                if self.is_business_day(start + timedelta(days=i))
+            )
+        return end_row["business_day_index"] - start_row["business_day_index"]
+
+    def rows(self) -> List[dict]:
+        return self._rows if self._rows is not None else self._build()
+
+business_calendar = BusinessCalendar(
+    date(settings.CALENDAR_START_YEAR, 1, 1),
+    date(settings.CALENDAR_END_YEAR, 12, 31),
+    load_holidays()
+)
+
+def sync_calendar_table(db: Session, batch_size: int = 5000) -> int:
+    """ibk_calendar 테이블을 만들고 메모리 달력과 같은 내용으로 맞춘다"""
+    from app.models.calendar import CalendarDay
+
+    CalendarDay.__table__.create(bind=db.get_bind(), checkfirst=True)
+    rows = business_calendar.rows()
+
+    # 올해와 내년 공휴일 데이터가 없으면 kr_holidays.csv 갱신이 필요하다
+    this_year = date.today().year
+    for year in business_calendar.missing_holiday_years(date(this_year, 1, 1), date(this_year + 1, 12, 31)):
+        logger.warning(f"No holiday data for {year} in {HOLIDAYS_PATH}; business days in {year} only exclude weekends")
+
+    # 이미 같은 내용이면 다시 쓰지 않는다 (워커마다 기동 시 호출됨)
+    # 나머지 컬럼은 날짜와 공휴일에서 정해지므로 행 수와 공휴일(날짜, 이름)이 같으면 같은 내용이다
+    in_range = CalendarDay.date.between(business_calendar.start, business_calendar.end)
+    row_count = db.query(func.count(CalendarDay.date)).filter(in_range).scalar()
+    existing_holidays = dict(db.query(CalendarDay.date, CalendarDay.holiday_name).filter(in_range, CalendarDay.is_holiday).all())
+    expected_holidays = {row["date"]: row["holiday_name"] for row in rows if row["is_holiday"]}
+    if row_count == len(rows) and existing_holidays == expected_holidays:
+        return 0
+
+    updatable = [column for column in rows[0] if column != "date"]
+    for i in range(0, len(rows), batch_size):
+        statement = insert(CalendarDay).values(rows[i:i + batch_size])
+        statement = statement.on_conflict_do_update(
+            index_elements=[CalendarDay.date],
+            set_={column: statement.excluded[column] for column in updatable}
+        )
+        db.execute(statement)
+    db.commit()
+    return len(rows)
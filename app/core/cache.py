@@ -0,0 +1,149 @@
+import calendar
+import copy
+import functools
+import hashlib
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Optional
+from .config import settings
+
+class ResultCache:
+    """분석 결과를 프로세스 메모리에 보관하는 TTL + LRU 캐시
+
+    공유 저장소(JSON 직렬화)와 같게 동작하도록 넣을 때와 꺼낼 때 복사해, 호출한 쪽이 결과를 고쳐도 캐시에 남지 않게 한다.
+    """
+
+    def __init__(self, max_entries: int, default_ttl: int):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.default_ttl)
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: Optional[int] = None) -> Any:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value, ttl)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+def _code_version() -> str:
+    """app 패키지 소스의 해시 (코드가 바뀌면 공유 저장소를 새로 쓰도록 버전으로 사용)"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.blake2b(digest_size=8)
+    for directory, _, filenames in sorted(os.walk(root)):
+        for filename in sorted(filenames):
+            if filename.endswith(".py"):
+                path = os.path.join(directory, filename)
+                digest.update(os.path.relpath(path, root).encode())
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+def _create_result_cache():
+    if settings.RESULT_STORE == "shared":
+        from .shared_store import SharedResultStore
+        return SharedResultStore(
+            settings.SHARED_STORE_PATH,
+            settings.SHARED_STORE_SLOTS,
+            settings.SHARED_STORE_SLOT_SIZE,
+            default_ttl=settings.CACHE_TTL_CLOSED,
+            version=_code_version()
+        )
+    return ResultCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_CLOSED)
+
+class _LazyResultCache:
+    """처음 사용할 때 결과 저장소를 만든다
+
+    공유 저장소는 소스 해시 계산과 mmap 파일 준비가 필요하므로 import 시점이 아니라 첫 조회(워밍업) 때 만든다.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def _get(self) -> Any:
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
+
+result_cache = _LazyResultCache(_create_result_cache)
+
+def ttl_for_end_date(end: Optional[date]) -> int:
+    # 이미 끝난 기간의 집계는 바뀌지 않으므로 오래 보관한다
+    if end is not None and end < datetime.now().date():
+        return settings.CACHE_TTL_CLOSED
+    return settings.CACHE_TTL_TODAY
+
+def _resolve_end_date(arguments: dict) -> Optional[date]:
+    if arguments.get("end_date"):
+        try:
+            return datetime.strptime(arguments["end_date"], "%Y-%m-%d").date()
+        except ValueError:
+            return None
+    if arguments.get("year") and arguments.get("month"):
+        year, month = arguments["year"], arguments["month"]
+        return date(year, month, calendar.monthrange(year, month)[1])
+    return None
+
+def cached_result(name: str):
+    """{"success": True, ...} 를 반환하는 서비스 메서드의 결과를 캐시한다
+
+    today/thisWeek 같은 상대 기간이 날짜가 바뀐 뒤에도 재사용되지 않도록
+    캐시 키에 오늘 날짜를 포함한다.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = {k: v for k, v in bound.arguments.items() if k != "self"}
+            key = f"{name}:{datetime.now().date()}:" + ":".join(f"{k}={v}" for k, v in arguments.items())
+
+            cached = result_cache.get(key)
+            if cached is not None:
+                return cached
+
+            result = method(self, *args, **kwargs)
+            if isinstance(result, dict) and result.get("success"):
+                result_cache.set(key, result, ttl_for_end_date(_resolve_end_date(arguments)))
+            return result
+        return wrapper
+    return decorator
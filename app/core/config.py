@@ -7,4 +7,78 @@ load_dotenv()
 class Settings(BaseSettings):
     DATABASE_URL: str = os.getenv("DATABASE_URL")
 
-settings = Settings() 
\ No newline at end of file
+    # 커넥션 풀 설정
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    # 기동 시 미리 열어둘 커넥션 수 (DB_POOL_SIZE를 넘으면 DB_POOL_SIZE로 제한)
+    DB_POOL_PREWARM: int = int(os.getenv("DB_POOL_PREWARM", "5"))
+
+    # 분석 결과 캐시 설정 (초 단위)
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+    CACHE_TTL_TODAY: int = int(os.getenv("CACHE_TTL_TODAY", "60"))
+    CACHE_TTL_CLOSED: int = int(os.getenv("CACHE_TTL_CLOSED", "3600"))
+
+    # 워커 수와 결과 저장소 설정
+    # 워커가 2개 이상이면 기본적으로 호스트 공유 저장소(shared)를 사용한다
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "1"))
+    RESULT_STORE: str = os.getenv("RESULT_STORE", "shared" if int(os.getenv("WEB_CONCURRENCY", "1")) > 1 else "memory")
+    SHARED_STORE_PATH: str = os.getenv(
+        "SHARED_STORE_PATH",
+        "/dev/shm/ibk-result-store" if os.path.isdir("/dev/shm") else "/tmp/ibk-result-store"
+    )
+    SHARED_STORE_SLOTS: int = int(os.getenv("SHARED_STORE_SLOTS", "2048"))
+    SHARED_STORE_SLOT_SIZE: int = int(os.getenv("SHARED_STORE_SLOT_SIZE", "16384"))
+
+    # 사용자 ID 인덱스 설정 (초 단위)
+    USER_INDEX_REFRESH_SECONDS: int = int(os.getenv("USER_INDEX_REFRESH_SECONDS", "30"))
+    USER_INDEX_REBUILD_SECONDS: int = int(os.getenv("USER_INDEX_REBUILD_SECONDS", "3600"))
+    # 사용자 필터가 이보다 많은 ID 와 일치하면 IN 대신 ILIKE 로 조회한다
+    USER_FILTER_MAX_IDS: int = int(os.getenv("USER_FILTER_MAX_IDS", "1000"))
+
+    # 일자별 집계 테이블에서 최근 N일은 늦게 들어오는 데이터가 있을 수 있어 갱신 때마다 다시 집계한다
+    STATS_RECOMPUTE_DAYS: int = int(os.getenv("STATS_RECOMPUTE_DAYS", "2"))
+    # 분류기 일치도 일자별 집계를 새 데이터로 갱신하는 주기 (초 단위)
+    CLS_AGREEMENT_REFRESH_SECONDS: int = int(os.getenv("CLS_AGREEMENT_REFRESH_SECONDS", "30"))
+    # 사용자 활동(DAU/리텐션) 집계를 새 데이터로 갱신하는 주기 (초 단위)
+    USER_ACTIVITY_REFRESH_SECONDS: int = int(os.getenv("USER_ACTIVITY_REFRESH_SECONDS", "30"))
+
+    # 분석 쿼리 입장 제어 (레인별 동시 실행 수)
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_INTERACTIVE_LIMIT: int = int(os.getenv("ADMISSION_INTERACTIVE_LIMIT", "8"))
+    ADMISSION_STANDARD_LIMIT: int = int(os.getenv("ADMISSION_STANDARD_LIMIT", "4"))
+    ADMISSION_HEAVY_LIMIT: int = int(os.getenv("ADMISSION_HEAVY_LIMIT", "2"))
+    # 모든 레인에서 실행 중이거나 대기 중인 요청 수 합계 상한
+    # (FastAPI 동기 핸들러 스레드 풀 기본값 40 보다 작게 두어 다른 엔드포인트가 쓸 스레드를 남긴다)
+    ADMISSION_MAX_THREADS: int = int(os.getenv("ADMISSION_MAX_THREADS", "24"))
+    # 휴리스틱 대신 EXPLAIN 비용도 함께 사용 (쿼리마다 EXPLAIN 1회가 추가됨)
+    ADMISSION_USE_EXPLAIN: bool = os.getenv("ADMISSION_USE_EXPLAIN", "false").lower() == "true"
+
+    # 날짜 차원 테이블 범위 (공휴일은 app/data/kr_holidays.csv 에 있는 연도만 반영됨)
+    CALENDAR_START_YEAR: int = int(os.getenv("CALENDAR_START_YEAR", "2000"))
+    CALENDAR_END_YEAR: int = int(os.getenv("CALENDAR_END_YEAR", "2100"))
+
+    # 넓은 기간 조회를 청크로 나눠 병렬 실행 (scatter-gather)
+    SCATTER_ENABLED: bool = os.getenv("SCATTER_ENABLED", "true").lower() == "true"
+    SCATTER_MAX_WORKERS: int = int(os.getenv("SCATTER_MAX_WORKERS", "4"))
+    # 청크 단위 (month/week)
+    SCATTER_CHUNK: str = os.getenv("SCATTER_CHUNK", "month")
+    # 이 일수 이상인 기간만 나눠서 실행한다
+    SCATTER_MIN_DAYS: int = int(os.getenv("SCATTER_MIN_DAYS", "62"))
+
+    # 표본 기반 근사 조회 (approx=true)
+    # system: 블록 단위 추출(빠름), bernoulli: 행 단위 추출(정확도 높음, 전체 블록을 읽음)
+    APPROX_SAMPLE_METHOD: str = os.getenv("APPROX_SAMPLE_METHOD", "system")
+    APPROX_TARGET_MS: float = float(os.getenv("APPROX_TARGET_MS", "100"))
+    APPROX_INITIAL_FRACTION: float = float(os.getenv("APPROX_INITIAL_FRACTION", "0.01"))
+    APPROX_MIN_FRACTION: float = float(os.getenv("APPROX_MIN_FRACTION", "0.001"))
+    APPROX_MAX_FRACTION: float = float(os.getenv("APPROX_MAX_FRACTION", "0.1"))
+
+    # 오래된 월의 대화를 압축 파일로 옮기는 hot/cold 보관
+    # 영구 볼륨의 절대 경로 (설정하지 않으면 보관을 거부한다, docker-compose.yml 의 archive 볼륨 참고)
+    ARCHIVE_DIR: str = os.getenv("ARCHIVE_DIR", "")
+    # 최근 몇 개월은 DB(hot)에 남겨둔다 (이번 달 포함)
+    ARCHIVE_HOT_MONTHS: int = int(os.getenv("ARCHIVE_HOT_MONTHS", "6"))
+    # 압축을 풀어둔 보관 월 파일을 메모리에 유지할 개수
+    ARCHIVE_CACHE_MONTHS: int = int(os.getenv("ARCHIVE_CACHE_MONTHS", "4"))
+
+settings = Settings() 
@@ -1,15 +1,55 @@
+import threading
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 엔진은 import 시점이 아니라 lifespan(또는 최초 사용 시점)에 생성한다
+engine = None
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+# scatter 청크는 별도 풀을 쓴다 (요청 스레드가 커넥션을 쥔 채 청크를 기다리므로 같은 풀이면
+# 레인 동시 실행 수 + 청크 수가 풀 크기를 넘을 때 청크가 QueuePool 타임아웃까지 대기한다)
+scatter_engine = None
+ScatterSession = sessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base(metadata=None)
 
+_engine_lock = threading.Lock()
+
+def init_engine():
+    global engine, scatter_engine
+    with _engine_lock:
+        if engine is None:
+            engine = create_engine(
+                settings.DATABASE_URL,
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_pre_ping=True
+            )
+            SessionLocal.configure(bind=engine)
+            # 청크 작업 스레드 수만큼만 열리므로 대기 없이 항상 커넥션을 얻는다
+            scatter_engine = create_engine(
+                settings.DATABASE_URL,
+                pool_size=settings.SCATTER_MAX_WORKERS,
+                max_overflow=0,
+                pool_pre_ping=True
+            )
+            ScatterSession.configure(bind=scatter_engine)
+    return engine
+
+def dispose_engine():
+    global engine, scatter_engine
+    with _engine_lock:
+        if engine is not None:
+            engine.dispose()
+            engine = None
+        if scatter_engine is not None:
+            scatter_engine.dispose()
+            scatter_engine = None
+
 def get_db():
+    init_engine()
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close() 
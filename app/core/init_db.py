@@ -1,9 +1,51 @@
-from app.core.database import Base, engine
+import re
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+from app.core.database import Base, SessionLocal, init_engine
 from app.models.conversation import ConvLog, ClickedLog, StockCls
+from app.models.stats import ClsAgreementDaily, UserActivity, UserActiveDaily
+from app.models.calendar import CalendarDay
+from app.models.archive import ArchivedMonth
+from app.core.business_calendar import sync_calendar_table
+
+def create_missing_indexes(engine) -> list:
+    """이미 있는 테이블에 빠진 인덱스를 CREATE INDEX CONCURRENTLY 로 만든다
+
+    create_all 은 기존 테이블에 인덱스를 추가하지 않고, 일반 CREATE INDEX 는 만드는 동안
+    ibk_convlog 쓰기를 막으므로 트랜잭션 밖(AUTOCOMMIT)에서 CONCURRENTLY 로 만든다.
+    중간에 실패해 INVALID 로 남은 인덱스는 지우고 다시 만든다.
+    """
+    created = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        valid = dict(conn.execute(text(
+            "SELECT c.relname, i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = ANY (current_schemas(false))"
+        )).all())
+        for table in Base.metadata.sorted_tables:
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if valid.get(index.name):
+                    continue
+                if index.name in valid:
+                    conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+                statement = str(CreateIndex(index).compile(dialect=engine.dialect))
+                conn.exec_driver_sql(re.sub(r"^CREATE (UNIQUE )?INDEX", r"CREATE \1INDEX CONCURRENTLY", statement))
+                created.append(index.name)
+    return created
 
 def init_db():
+    engine = init_engine()
+    # 새 테이블은 인덱스까지 함께 만들어진다
     Base.metadata.create_all(bind=engine)
+    create_missing_indexes(engine)
+
+    db = SessionLocal()
+    try:
+        sync_calendar_table(db)
+    finally:
+        db.close()
 
 if __name__ == "__main__":
     init_db()
-    print("Database tables created successfully!") 
\ No newline at end of file
+    print("Database tables created successfully!")
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from fastapi import FastAPI
+from sqlalchemy import text
+from app.core import database
+from app.core.business_calendar import sync_calendar_table
+from app.core.config import settings
+from app.core.readiness import readiness
+from app.core.user_activity import user_activity
+from app.core.user_index import user_index
+from app.services.classifier_analytics_service import agreement_counts
+from app.services.daily_stats_service import DailyStatsService
+
+logger = logging.getLogger(__name__)
+
+def prewarm_pool(engine, count: int) -> int:
+    # 풀 크기를 넘는 커넥션은 반납 시 닫히므로 pool_size 까지만 미리 연다
+    count = min(count, settings.DB_POOL_SIZE)
+    connections = []
+    try:
+        for _ in range(count):
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            connections.append(conn)
+    finally:
+        for conn in connections:
+            conn.close()
+    return len(connections)
+
+def sync_calendar() -> int:
+    db = database.SessionLocal()
+    try:
+        return sync_calendar_table(db)
+    finally:
+        db.close()
+
+class WarmUpCancelled(Exception):
+    pass
+
+def check_stop(stop: threading.Event) -> None:
+    if stop.is_set():
+        raise WarmUpCancelled()
+
+def warm_caches(stop: threading.Event) -> list:
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    warmed = []
+    db = database.SessionLocal()
+    try:
+        for target in (today, today - timedelta(days=1)):
+            result = DailyStatsService(db).get_daily_stats(target)
+            if not result["success"]:
+                # 실패한 워밍업을 준비 완료로 표시하지 않도록 warm_up 에서 readiness.fail 로 기록한다
+                raise RuntimeError(f"daily stats for {target.strftime('%Y-%m-%d')}: {result['error']}")
+            warmed.append(target.strftime("%Y-%m-%d"))
+        # 사용자 검색 인덱스도 첫 검색 전에 만들어 둔다
+        check_stop(stop)
+        user_index.ensure_fresh(db)
+        # 활동 사용자 비트맵도 미리 집계해 올려둔다 (최초 실행 시 전체 이력을 한 번 읽는다)
+        check_stop(stop)
+        user_activity.ensure_fresh(db)
+        # 분류기 일치도 일자별 집계도 첫 조회 전에 채워둔다
+        check_stop(stop)
+        agreement_counts.ensure_fresh(db)
+    finally:
+        db.close()
+    return warmed
+
+def warm_up(stop: threading.Event) -> None:
+    """엔진 생성부터 캐시 워밍업까지 단계별로 진행한다 (stop 이 설정되면 다음 단계로 넘어가지 않는다)"""
+    stage = "engine"
+    try:
+        # 엔진 생성(드라이버 로드 포함)도 리스닝 이후로 미룬다
+        engine = database.init_engine()
+        readiness.mark("engine")
+
+        check_stop(stop)
+        stage = "pool"
+        opened = prewarm_pool(engine, settings.DB_POOL_PREWARM)
+        readiness.mark("pool", connections=opened)
+
+        check_stop(stop)
+        stage = "calendar"
+        written = sync_calendar()
+        readiness.mark("calendar", rows=written)
+
+        check_stop(stop)
+        stage = "cache"
+        dates = warm_caches(stop)
+        readiness.mark("cache", dates=dates)
+        logger.info("Warm-up finished")
+    except WarmUpCancelled:
+        logger.info(f"Warm-up stopped after {stage}")
+    except Exception as e:
+        logger.error(f"Warm-up failed at {stage}: {str(e)}")
+        readiness.fail(stage, str(e))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    readiness.reset()
+
+    # 워밍업은 백그라운드에서 진행하여 서버가 바로 요청을 받을 수 있게 한다
+    stop = threading.Event()
+    warm_up_task = asyncio.create_task(asyncio.to_thread(warm_up, stop))
+    try:
+        yield
+    finally:
+        # 스레드는 취소할 수 없으므로 다음 단계로 넘어가지 않게 한 뒤 진행 중인 단계가 끝날 때까지 기다렸다가 엔진을 닫는다
+        stop.set()
+        await warm_up_task
+        database.dispose_engine()
@@ -0,0 +1,49 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+class Readiness:
+    """기동 단계별 진행 상황을 기록하고 /health/ready 에 노출한다"""
+
+    STAGES = ["engine", "pool", "calendar", "cache"]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._completed: Dict[str, Dict[str, Any]] = {}
+        self._error: Optional[str] = None
+
+    def mark(self, stage: str, **detail: Any) -> None:
+        with self._lock:
+            self._completed[stage] = {
+                "elapsedMs": round((time.monotonic() - self._started_at) * 1000),
+                **detail
+            }
+
+    def fail(self, stage: str, error: str) -> None:
+        with self._lock:
+            self._error = f"{stage}: {error}"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._started_at = time.monotonic()
+            self._completed = {}
+            self._error = None
+
+    @property
+    def is_ready(self) -> bool:
+        with self._lock:
+            return self._error is None and all(stage in self._completed for stage in self.STAGES)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": self._error is None and all(stage in self._completed for stage in self.STAGES),
+                "stages": [
+                    {"stage": stage, "done": stage in self._completed, **self._completed.get(stage, {})}
+                    for stage in self.STAGES
+                ],
+                "error": self._error
+            }
+
+readiness = Readiness()
@@ -0,0 +1,77 @@
+import math
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+from app.core.config import settings
+
+# 95% 신뢰구간
+Z_95 = 1.96
+
+def estimate_count(observed: int, cluster_square_sum: int, fraction: float) -> Dict[str, int]:
+    """표본 카운트를 모집단 규모로 되돌리고 95% 신뢰구간을 붙인다
+
+    표본은 클러스터(행 또는 블록) 단위 베르누이 추출이므로
+    Var(N̂) = (1-p)/p² · Σ y_c² (y_c: 클러스터별 카운트) 로 추정한다.
+    """
+    estimate = observed / fraction
+    error = Z_95 * math.sqrt((1 - fraction) * cluster_square_sum) / fraction
+    return {
+        "value": round(estimate),
+        "low": max(observed, round(estimate - error)),
+        "high": round(estimate + error)
+    }
+
+def estimate_distinct(frequencies: Iterable[int], fraction: float) -> Dict[str, int]:
+    """표본에서 관측된 값별 빈도로 고유 개수를 추정한다 (GEE 추정량)
+
+    한 번만 관측된 값(f1)은 표본 밖에 1/p 배 더 있다고 보고 sqrt(1/p) 배로 보정한다.
+    low/high 는 신뢰구간이 아니라 GEE 의 오차 비율 상한 sqrt(1/p) 로 잡은 구간이라 폭이 넓고,
+    행이 많은 사용자도 표본에 한 번만 잡히면 sqrt(1/p) 배로 부풀려지므로 추정값이 실제보다 높게 나오는 편이다.
+    """
+    histogram = Counter(frequencies)
+    observed = sum(histogram.values())
+    singletons = histogram.get(1, 0)
+    scale = math.sqrt(1 / fraction)
+    estimate = scale * singletons + (observed - singletons)
+    return {
+        "value": round(estimate),
+        "low": max(observed, round(estimate / scale)),
+        "high": round(estimate * scale)
+    }
+
+class SampleTuner:
+    """지연 시간 목표에 맞게 표본 비율을 조정한다
+
+    실행 시간을 overhead + 전체 스캔 시간 × 비율 로 보고,
+    관측값으로 전체 스캔 시간을 지수 이동 평균으로 갱신한 뒤 다음 비율을 고른다.
+    """
+
+    def __init__(self, target_ms: float, min_fraction: float, max_fraction: float, initial_fraction: float):
+        self.target_ms = target_ms
+        self.min_fraction = min_fraction
+        self.max_fraction = max_fraction
+        self.initial_fraction = initial_fraction
+        self.overhead_ms = 5.0
+        self._full_scan_ms: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def fraction(self, name: str) -> float:
+        with self._lock:
+            full_scan_ms = self._full_scan_ms.get(name)
+        if full_scan_ms is None:
+            return self.initial_fraction
+        fraction = (self.target_ms - self.overhead_ms) / max(full_scan_ms, 1e-6)
+        return min(self.max_fraction, max(self.min_fraction, fraction))
+
+    def observe(self, name: str, fraction: float, elapsed_ms: float) -> None:
+        full_scan_ms = max(elapsed_ms - self.overhead_ms, 0.1) / fraction
+        with self._lock:
+            previous = self._full_scan_ms.get(name)
+            self._full_scan_ms[name] = full_scan_ms if previous is None else previous * 0.7 + full_scan_ms * 0.3
+
+sample_tuner = SampleTuner(
+    settings.APPROX_TARGET_MS,
+    settings.APPROX_MIN_FRACTION,
+    settings.APPROX_MAX_FRACTION,
+    settings.APPROX_INITIAL_FRACTION
+)
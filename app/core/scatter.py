@@ -0,0 +1,101 @@
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core import database
+from app.core.cache import result_cache
+from app.core.config import settings
+
+# 프로세스 전체에서 공유하는 작업 풀 (요청이 몰려도 동시에 도는 청크 수는 여기서 제한된다)
+_executor = ThreadPoolExecutor(max_workers=settings.SCATTER_MAX_WORKERS, thread_name_prefix="scatter")
+
+def split_range(start: date, end: date, unit: str = 'month') -> List[Tuple[date, date]]:
+    """start ~ end 를 달력 기준 월/주 단위 청크로 나눈다 (양끝 포함)"""
+    chunks = []
+    current = start
+    while current <= end:
+        if unit == 'week':
+            chunk_end = current + timedelta(days=6 - current.weekday())
+        elif unit == 'month':
+            next_month = (current.replace(day=1) + timedelta(days=32)).replace(day=1)
+            chunk_end = next_month - timedelta(days=1)
+        else:
+            raise ValueError("Invalid chunk unit. Must be one of: week, month")
+        chunk_end = min(chunk_end, end)
+        chunks.append((current, chunk_end))
+        current = chunk_end + timedelta(days=1)
+    return chunks
+
+def should_scatter(start: date, end: date) -> bool:
+    return settings.SCATTER_ENABLED and (end - start).days + 1 >= settings.SCATTER_MIN_DAYS
+
+def _statement_timeout(db: Session):
+    if db.get_bind().dialect.name != 'postgresql':
+        return None
+    return db.execute(text("SELECT current_setting('statement_timeout')")).scalar()
+
+def scatter(
+    db: Session,
+    name: str,
+    start: date,
+    end: date,
+    fetch: Callable[[Session, date, date], Any]
+) -> List[Any]:
+    """청크마다 별도 세션(scatter 전용 풀)으로 fetch(session, chunk_start, chunk_end) 를 병렬 실행한다
+
+    이미 끝난 기간의 청크 결과는 result_cache 에 보관해 다른 요청에서도 재사용한다.
+    name 에는 fetch 결과에 영향을 주는 파라미터를 모두 포함해야 한다.
+    """
+    today = datetime.now().date()
+    # 요청 세션에 걸린 statement_timeout 을 청크 세션에도 동일하게 적용한다
+    timeout = _statement_timeout(db)
+
+    def run(chunk_start: date, chunk_end: date) -> Any:
+        closed = chunk_end < today
+        key = f"scatter:{name}:{chunk_start}:{chunk_end}"
+        if closed:
+            cached = result_cache.get(key)
+            if cached is not None:
+                return cached
+
+        session = database.ScatterSession()
+        try:
+            if timeout:
+                session.execute(text("SELECT set_config('statement_timeout', :timeout, true)"), {"timeout": timeout})
+            result = fetch(session, chunk_start, chunk_end)
+        finally:
+            session.close()
+
+        if closed:
+            result_cache.set(key, result, settings.CACHE_TTL_CLOSED)
+        return result
+
+    futures = [
+        _executor.submit(run, chunk_start, chunk_end)
+        for chunk_start, chunk_end in split_range(start, end, settings.SCATTER_CHUNK)
+    ]
+    return [future.result() for future in futures]
+
+def merge_counts(partials: Iterable[Dict[str, List[int]]]) -> Dict[str, List[int]]:
+    """키별 카운트 벡터를 더한다 (청크끼리 겹치지 않는 집계에만 사용)"""
+    merged: Dict[str, List[int]] = {}
+    for partial in partials:
+        for key, counts in partial.items():
+            if key in merged:
+                merged[key] = [a + b for a, b in zip(merged[key], counts)]
+            else:
+                merged[key] = list(counts)
+    return merged
+
+def top_k(counts: Dict[str, List[int]], k: int, index: int = 0, descending: bool = True) -> List[Tuple[str, List[int]]]:
+    select = heapq.nlargest if descending else heapq.nsmallest
+    return select(k, counts.items(), key=lambda item: item[1][index])
+
+def merge_distinct(partials: Iterable[Iterable[str]]) -> set:
+    """청크별 고유 사용자 목록의 합집합 (여러 청크에 걸친 사용자를 한 번만 센다)"""
+    merged = set()
+    for partial in partials:
+        merged.update(partial)
+    return merged
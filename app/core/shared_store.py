@@ -0,0 +1,176 @@
+import fcntl
+import glob
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Callable, Optional
+
+# 파일 헤더: magic, 슬롯 수, 슬롯 크기, 세트당 슬롯 수(ways), 코드 버전
+_HEADER = struct.Struct("<8sIII16s")
+_HEADER_SIZE = 64
+_MAGIC = b"IBKRS001"
+
+# 슬롯 헤더: seq, key_hash, expires_at, last_access, payload 길이
+# seq 가 홀수이면 기록 중인 슬롯이다 (seqlock)
+_SLOT = struct.Struct("<QQddI")
+_SLOT_HEADER_SIZE = 40
+_KEY_LEN = struct.Struct("<H")
+
+def _key_hash(key: bytes) -> int:
+    # 내장 hash() 는 프로세스마다 값이 달라 워커 간에 쓸 수 없다
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") or 1
+
+class SharedResultStore:
+    """같은 호스트의 워커들이 공유하는 mmap 기반 결과 저장소
+
+    고정 크기 슬롯을 set-associative 하게 배치하고, 세트 안에서 LRU 로 교체한다.
+    읽기는 슬롯별 seqlock 으로 검증만 하므로 잠금을 잡지 않고,
+    쓰기만 flock(프로세스 간) + threading.Lock(프로세스 내)으로 직렬화한다.
+    파일은 프로세스 재시작 후에도 남으므로 version(코드 버전)별로 따로 두어
+    배포 전 코드가 만든 결과를 새 코드가 읽지 않게 한다.
+    """
+
+    def __init__(self, path: str, slot_count: int, slot_size: int, ways: int = 8, default_ttl: int = 60,
+                 version: str = ""):
+        if slot_size <= _SLOT_HEADER_SIZE + _KEY_LEN.size:
+            raise ValueError("slot_size is too small")
+        self.version = version.encode()[:16]
+        self.path = f"{path}.{version}" if version else path
+        self.ways = max(1, min(ways, slot_count))
+        self.set_count = max(1, slot_count // self.ways)
+        self.slot_count = self.set_count * self.ways
+        self.slot_size = slot_size
+        self.default_ttl = default_ttl
+        self._size = _HEADER_SIZE + self.slot_count * self.slot_size
+        self._write_lock = threading.Lock()
+
+        if version:
+            self._remove_stale(path)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if not self._has_valid_header():
+                # 처음 만들었거나 레이아웃이 바뀐 파일은 비우고 다시 초기화한다
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, self._size)
+                os.pwrite(self._fd, self._header(), 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._mm = mmap.mmap(self._fd, self._size)
+
+    def _remove_stale(self, path: str) -> None:
+        # 이전 버전 파일을 지운다 (아직 열고 있는 이전 워커는 매핑이 유지되어 영향이 없다)
+        for stale in glob.glob(glob.escape(path) + ".*"):
+            if stale != self.path:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+
+    def _header(self) -> bytes:
+        return _HEADER.pack(_MAGIC, self.slot_count, self.slot_size, self.ways, self.version)
+
+    def _has_valid_header(self) -> bool:
+        if os.fstat(self._fd).st_size != self._size:
+            return False
+        return os.pread(self._fd, _HEADER.size, 0) == self._header()
+
+    def _slot_offsets(self, key_hash: int):
+        base = _HEADER_SIZE + (key_hash % self.set_count) * self.ways * self.slot_size
+        return [base + i * self.slot_size for i in range(self.ways)]
+
+    def _read_slot(self, offset: int, key_hash: int, key: bytes) -> Optional[bytes]:
+        seq, slot_hash, expires_at, _, length = _SLOT.unpack_from(self._mm, offset)
+        if seq & 1 or slot_hash != key_hash or expires_at < time.time():
+            return None
+        start = offset + _SLOT_HEADER_SIZE
+        payload = self._mm[start:start + length]
+        if _SLOT.unpack_from(self._mm, offset)[0] != seq:
+            # 읽는 도중 다른 워커가 슬롯을 덮어썼다
+            return None
+        (key_len,) = _KEY_LEN.unpack_from(payload, 0)
+        if payload[_KEY_LEN.size:_KEY_LEN.size + key_len] != key:
+            return None
+        return payload[_KEY_LEN.size + key_len:]
+
+    def get(self, key: str) -> Optional[Any]:
+        raw_key = key.encode()
+        key_hash = _key_hash(raw_key)
+        for offset in self._slot_offsets(key_hash):
+            data = self._read_slot(offset, key_hash, raw_key)
+            if data is None:
+                continue
+            # LRU 용 접근 시각은 근사값이면 충분하므로 잠금 없이 갱신한다
+            struct.pack_into("<d", self._mm, offset + 24, time.time())
+            try:
+                return json.loads(zlib.decompress(data))
+            except (zlib.error, ValueError):
+                return None
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        raw_key = key.encode()
+        key_hash = _key_hash(raw_key)
+        data = zlib.compress(json.dumps(value, ensure_ascii=False).encode(), 1)
+        payload = _KEY_LEN.pack(len(raw_key)) + raw_key + data
+        if _SLOT_HEADER_SIZE + len(payload) > self.slot_size:
+            # 슬롯보다 큰 결과는 공유하지 않는다
+            return False
+
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else self.default_ttl)
+        with self._write_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                offset = self._choose_slot(key_hash, raw_key, now)
+                seq = _SLOT.unpack_from(self._mm, offset)[0]
+                struct.pack_into("<Q", self._mm, offset, seq + 1)
+                start = offset + _SLOT_HEADER_SIZE
+                self._mm[start:start + len(payload)] = payload
+                _SLOT.pack_into(self._mm, offset, seq + 1, key_hash, expires_at, now, len(payload))
+                struct.pack_into("<Q", self._mm, offset, seq + 2)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return True
+
+    def _choose_slot(self, key_hash: int, raw_key: bytes, now: float) -> int:
+        victim, victim_access = None, None
+        for offset in self._slot_offsets(key_hash):
+            _, slot_hash, expires_at, last_access, length = _SLOT.unpack_from(self._mm, offset)
+            if slot_hash == key_hash:
+                start = offset + _SLOT_HEADER_SIZE
+                (key_len,) = _KEY_LEN.unpack_from(self._mm, start)
+                if self._mm[start + _KEY_LEN.size:start + _KEY_LEN.size + key_len] == raw_key:
+                    return offset
+            if slot_hash == 0 or expires_at < now:
+                last_access = -1.0
+            if victim is None or last_access < victim_access:
+                victim, victim_access = offset, last_access
+        return victim
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: Optional[int] = None) -> Any:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value, ttl)
+        return value
+
+    def clear(self) -> None:
+        with self._write_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                for i in range(self.slot_count):
+                    offset = _HEADER_SIZE + i * self.slot_size
+                    seq = _SLOT.unpack_from(self._mm, offset)[0]
+                    _SLOT.pack_into(self._mm, offset, seq + (2 if seq % 2 == 0 else 1), 0, 0.0, 0.0, 0)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
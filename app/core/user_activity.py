@@ -0,0 +1,276 @@
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+from sqlalchemy import func, cast, Date
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.core.archive import archive_store
+from app.core.config import settings
+from app.models.archive import ArchivedMonth
+from app.models.conversation import ConvLog
+from app.models.stats import UserActivity, UserActiveDaily
+
+# 한 번에 upsert / IN 조회할 사용자 수
+BATCH_SIZE = 1000
+
+def to_bitmap(numbers: Iterable[int]) -> int:
+    """사용자 번호 집합 -> 비트맵(int)"""
+    numbers = list(numbers)
+    if not numbers:
+        return 0
+    buffer = bytearray(max(numbers) // 8 + 1)
+    for number in numbers:
+        buffer[number >> 3] |= 1 << (number & 7)
+    return int.from_bytes(buffer, 'little')
+
+def pack_bitmap(bitmap: int) -> bytes:
+    return zlib.compress(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little'))
+
+def unpack_bitmap(data: bytes) -> int:
+    return int.from_bytes(zlib.decompress(data), 'little')
+
+def _batches(values: List[Any]) -> Iterable[List[Any]]:
+    for i in range(0, len(values), BATCH_SIZE):
+        yield values[i:i + BATCH_SIZE]
+
+class UserActivityStore:
+    """일자별 활동 사용자 비트맵으로 DAU/WAU/MAU, 신규/재방문, 코호트 리텐션을 계산한다
+
+    - ibk_user_activity: 사용자별 번호와 최초/최근 활동일
+    - ibk_user_active_daily: 일자별 활동 사용자 번호 비트맵
+    두 테이블은 마지막으로 집계한 날 이후(와 최근 STATS_RECOMPUTE_DAYS 일)만 원본에서 다시 읽어 갱신하고,
+    메모리에는 비트맵을 올려두고 updated_at 이후 바뀐 일자만 다시 읽는다.
+    기간별 고유 사용자 수는 비트맵 OR 후 popcount 로 구하므로 기간 길이에 선형이다.
+    """
+
+    def __init__(self, refresh_interval: int):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        # DB 조회/저장을 포함한 갱신은 한 번에 하나만 한다 (조회 메서드는 _lock 만 사용)
+        self._refresh_lock = threading.Lock()
+        self._days: Dict[date, int] = {}
+        self._new: Optional[Dict[date, int]] = None
+        self._watermark = None
+        self._refreshed_at = 0.0
+
+    def ensure_fresh(self, db: Session) -> None:
+        now = time.monotonic()
+        if now - self._refreshed_at < self.refresh_interval:
+            return
+        with self._refresh_lock:
+            if now - self._refreshed_at < self.refresh_interval:
+                return
+            # 집계 저장과 변경 일자 조회는 잠금 밖에서 하고 비트맵을 반영할 때만 잠가
+            # 활동/리텐션 조회가 DB 작업을 기다리지 않게 한다
+            self.update(db)
+            self._load(db)
+            self._refreshed_at = now
+
+    def _earliest(self, db: Session) -> Optional[date]:
+        candidates = [
+            value for value in (
+                db.query(func.min(ConvLog.date)).scalar(),
+                db.query(func.min(ArchivedMonth.month)).scalar()
+            ) if value is not None
+        ]
+        if not candidates:
+            return None
+        return min(value.date() if isinstance(value, datetime) else value for value in candidates)
+
+    def update(self, db: Session) -> int:
+        """아직 집계되지 않은 일자와 최근 며칠을 원본(DB + 보관 파일)에서 다시 집계해 저장한다"""
+        today = datetime.now().date()
+        recompute_from = today - timedelta(days=settings.STATS_RECOMPUTE_DAYS - 1)
+        last = db.query(func.max(UserActiveDaily.date)).filter(UserActiveDaily.date < recompute_from).scalar()
+        start = last + timedelta(days=1) if last is not None else self._earliest(db)
+        if start is None or start > today:
+            return 0
+
+        day = cast(ConvLog.date, Date)
+        active: Dict[date, Set[str]] = {start + timedelta(days=i): set() for i in range((today - start).days + 1)}
+        results = db.query(
+            day.label('date'),
+            ConvLog.user_id
+        ).filter(
+            ConvLog.date >= datetime.combine(start, datetime.min.time())
+        ).group_by(
+            day, ConvLog.user_id
+        ).all()
+        for result in results:
+            active.setdefault(result.date, set()).add(result.user_id)
+        # 보관된 월은 파일에서 읽는다 (처음 집계할 때만 해당, 늦게 들어와 DB 에 남은 행과는 집합으로 합쳐진다)
+        for target, users in archive_store.daily_users(db, start, today).items():
+            active.setdefault(target, set()).update(users)
+
+        seen: Dict[str, List[date]] = {}
+        for target, users in active.items():
+            for user_id in users:
+                if user_id in seen:
+                    seen[user_id][0] = min(seen[user_id][0], target)
+                    seen[user_id][1] = max(seen[user_id][1], target)
+                else:
+                    seen[user_id] = [target, target]
+
+        known: Dict[str, Any] = {}
+        for batch in _batches(list(seen)):
+            known.update((row.user_id, row) for row in db.query(
+                UserActivity.user_id, UserActivity.user_no, UserActivity.first_seen, UserActivity.last_seen
+            ).filter(UserActivity.user_id.in_(batch)).all())
+        # 최초/최근 활동일이 넓어진 사용자만 쓴다 (갱신 때마다 같은 값을 다시 쓰지 않도록)
+        changed = [
+            (user_id, (first, last_seen)) for user_id, (first, last_seen) in seen.items()
+            if user_id not in known or first < known[user_id].first_seen or last_seen > known[user_id].last_seen
+        ]
+
+        now = datetime.now()
+        for batch in _batches(changed):
+            statement = insert(UserActivity).values([
+                {"user_id": user_id, "first_seen": first, "last_seen": last_seen, "updated_at": now}
+                for user_id, (first, last_seen) in batch
+            ])
+            statement = statement.on_conflict_do_update(
+                index_elements=[UserActivity.user_id],
+                set_={
+                    "first_seen": func.least(UserActivity.first_seen, statement.excluded.first_seen),
+                    "last_seen": func.greatest(UserActivity.last_seen, statement.excluded.last_seen),
+                    "updated_at": statement.excluded.updated_at
+                }
+            )
+            db.execute(statement)
+
+        numbers: Dict[str, int] = {user_id: row.user_no for user_id, row in known.items()}
+        for batch in _batches([user_id for user_id, _ in changed if user_id not in known]):
+            numbers.update(db.query(UserActivity.user_id, UserActivity.user_no).filter(UserActivity.user_id.in_(batch)).all())
+
+        rows = [
+            {
+                "date": target,
+                "active_users": len(users),
+                "members": pack_bitmap(to_bitmap(numbers[user_id] for user_id in users)),
+                "updated_at": now
+            }
+            for target, users in active.items()
+        ]
+        for batch in _batches(rows):
+            statement = insert(UserActiveDaily).values(batch)
+            # 활동 사용자가 그대로인 일자는 updated_at 을 올리지 않아 다른 워커가 다시 읽지 않게 한다
+            statement = statement.on_conflict_do_update(
+                index_elements=[UserActiveDaily.date],
+                set_={column: statement.excluded[column] for column in ['active_users', 'members', 'updated_at']},
+                where=UserActiveDaily.members.is_distinct_from(statement.excluded.members)
+            )
+            db.execute(statement)
+        db.commit()
+        return len(rows)
+
+    def _load(self, db: Session) -> None:
+        # _watermark 는 _refresh_lock 을 잡은 갱신 쪽에서만 바뀌므로 잠그지 않고 읽는다
+        query = db.query(UserActiveDaily.date, UserActiveDaily.members, UserActiveDaily.updated_at)
+        if self._watermark is not None:
+            # 다른 워커가 먼저 시작해 늦게 커밋한 행도 잡도록 여유를 두고 다시 읽는다
+            query = query.filter(UserActiveDaily.updated_at >= self._watermark - timedelta(minutes=5))
+        watermark = self._watermark
+        loaded = {}
+        for result in query.all():
+            loaded[result.date] = unpack_bitmap(result.members)
+            watermark = max(watermark or result.updated_at, result.updated_at)
+
+        with self._lock:
+            changed = False
+            for target, bitmap in loaded.items():
+                if self._days.get(target) != bitmap:
+                    self._days[target] = bitmap
+                    changed = True
+            self._watermark = watermark
+            # 신규 사용자 비트맵은 전체 이력을 다시 훑어야 하므로 실제로 바뀐 일자가 있을 때만 버린다
+            if changed:
+                self._new = None
+
+    def _new_users(self) -> Dict[date, int]:
+        """{날짜: 그 날 처음 활동한 사용자 비트맵} (전체 이력을 한 번 훑어 계산하고 변경 전까지 재사용)"""
+        if self._new is None:
+            seen = 0
+            new = {}
+            for target in sorted(self._days):
+                bitmap = self._days[target]
+                new[target] = bitmap & ~seen
+                seen |= bitmap
+            self._new = new
+        return self._new
+
+    def _union(self, start: date, end: date) -> int:
+        bitmap = 0
+        current = start
+        while current <= end:
+            bitmap |= self._days.get(current, 0)
+            current += timedelta(days=1)
+        return bitmap
+
+    def activity(self, start: date, end: date) -> List[Dict[str, Any]]:
+        """일자별 DAU/WAU/MAU(해당 일 포함 7일/30일 고유 사용자)와 신규/재방문 사용자 수"""
+        with self._lock:
+            new_users = self._new_users()
+            data = []
+            current = start
+            while current <= end:
+                active = self._days.get(current, 0)
+                new = new_users.get(current, 0)
+                data.append({
+                    "date": current.strftime("%Y-%m-%d"),
+                    "dau": active.bit_count(),
+                    "wau": self._union(current - timedelta(days=6), current).bit_count(),
+                    "mau": self._union(current - timedelta(days=29), current).bit_count(),
+                    "newUsers": new.bit_count(),
+                    "returningUsers": (active & ~new).bit_count()
+                })
+                current += timedelta(days=1)
+            return data
+
+    def retention(self, start: date, end: date, period: str, periods: int) -> List[Dict[str, Any]]:
+        """start ~ end 에 처음 활동한 사용자를 주/월 코호트로 묶고 N 주/월 뒤 활동 비율을 구한다"""
+        if period not in ('week', 'month'):
+            raise ValueError("Invalid period. Must be one of: week, month")
+
+        def period_start(target: date) -> date:
+            return target - timedelta(days=target.weekday()) if period == 'week' else target.replace(day=1)
+
+        def next_period(target: date) -> date:
+            return target + timedelta(days=7) if period == 'week' else (target + timedelta(days=32)).replace(day=1)
+
+        today = datetime.now().date()
+        with self._lock:
+            new_users = self._new_users()
+            cohorts: Dict[date, int] = {}
+            for target, bitmap in new_users.items():
+                if start <= target <= end and bitmap:
+                    key = period_start(target)
+                    cohorts[key] = cohorts.get(key, 0) | bitmap
+
+            # 같은 기간의 활동 비트맵은 여러 코호트가 함께 쓴다
+            active: Dict[date, int] = {}
+
+            def active_in(target: date) -> int:
+                if target not in active:
+                    active[target] = self._union(target, next_period(target) - timedelta(days=1))
+                return active[target]
+
+            data = []
+            for cohort_start in sorted(cohorts):
+                members = cohorts[cohort_start]
+                size = members.bit_count()
+                counts = []
+                target = cohort_start
+                while len(counts) < periods and target <= today:
+                    counts.append((members & active_in(target)).bit_count())
+                    target = next_period(target)
+                data.append({
+                    "cohort": cohort_start.strftime("%Y-%m-%d"),
+                    "size": size,
+                    "counts": counts,
+                    "retention": [round(count / size * 100, 1) for count in counts]
+                })
+            return data
+
+user_activity = UserActivityStore(settings.USER_ACTIVITY_REFRESH_SECONDS)
@@ -0,0 +1,162 @@
+import bisect
+import threading
+import time
+from datetime import date
+from typing import Dict, List, Optional, Set
+from sqlalchemy import func, cast, Date
+from sqlalchemy.orm import Session
+from app.core import database
+from app.core.config import settings
+from app.models.conversation import ConvLog
+from app.core.archive import archive_store
+
+class UserIdIndex:
+    """distinct user_id 를 메모리에 두고 부분 문자열 검색을 지원하는 인덱스
+
+    - 정렬된 소문자 배열: 접두사 검색(bisect)
+    - trigram -> 사용자 번호 posting: 3글자 이상 부분 문자열 검색
+    새 행은 마지막으로 본 date 이후만 조회해서 증분 반영하고,
+    늦게 들어온 과거 데이터를 위해 주기적으로 전체를 다시 읽는다.
+    요청 경로에서는 refresh_in_background 로 갱신을 백그라운드에 맡긴다.
+    """
+
+    GRAM = 3
+
+    def __init__(self, refresh_interval: int, rebuild_interval: int):
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.RLock()
+        # DB 조회를 포함한 갱신은 한 번에 하나만 한다 (검색은 _lock 만 사용)
+        self._refresh_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._reset()
+
+    def _reset(self):
+        self._users: List[str] = []
+        self._lowered: List[str] = []
+        self._known: Set[str] = set()
+        self._sorted: List[tuple] = []
+        self._grams: Dict[str, Set[int]] = {}
+        self._watermark = None
+        self._refreshed_at = 0.0
+        self._rebuilt_at = 0.0
+
+    def _add(self, user_id: str) -> None:
+        if user_id in self._known:
+            return
+        number = len(self._users)
+        lowered = user_id.lower()
+        self._known.add(user_id)
+        self._users.append(user_id)
+        self._lowered.append(lowered)
+        self._sorted.append((lowered, number))
+        for i in range(len(lowered) - self.GRAM + 1):
+            self._grams.setdefault(lowered[i:i + self.GRAM], set()).add(number)
+
+    def ensure_fresh(self, db: Session) -> None:
+        now = time.monotonic()
+        if now - self._refreshed_at < self.refresh_interval:
+            return
+        with self._refresh_lock:
+            if now - self._refreshed_at < self.refresh_interval:
+                return
+            rebuild = self._watermark is None or now - self._rebuilt_at >= self.rebuild_interval
+            if rebuild:
+                query = db.query(ConvLog.user_id).distinct()
+            else:
+                # 워터마크는 일 단위라 ix_ibk_convlog_date_day 로 마지막 날부터 다시 읽는다 (중복은 _add 에서 무시)
+                query = db.query(ConvLog.user_id).filter(cast(ConvLog.date, Date) >= self._watermark).distinct()
+
+            watermark = db.query(func.max(cast(ConvLog.date, Date))).scalar()
+            user_ids = [user_id for (user_id,) in query.all()]
+            if rebuild:
+                # 보관 파일로 옮겨진 월의 사용자도 검색되도록 포함한다
+                user_ids += sorted(archive_store.user_ids(db))
+
+            # 조회는 잠금 밖에서 하고 반영할 때만 잠가 검색이 DB 조회를 기다리지 않게 한다
+            with self._lock:
+                if rebuild:
+                    self._reset()
+                    self._rebuilt_at = now
+                count = len(self._users)
+                for user_id in user_ids:
+                    self._add(user_id)
+                if len(self._users) != count:
+                    # 대부분 정렬된 상태라 다시 정렬해도 비용이 작다
+                    self._sorted.sort()
+                if watermark is not None:
+                    self._watermark = watermark
+                self._refreshed_at = now
+
+    def refresh_in_background(self) -> None:
+        """갱신 주기가 지났으면 별도 스레드와 세션으로 갱신한다 (호출한 요청은 현재 인덱스를 그대로 쓴다)"""
+        if time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+        with self._thread_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(target=self._refresh, name="user-index-refresh", daemon=True)
+            self._refresh_thread.start()
+
+    def _refresh(self) -> None:
+        db = database.SessionLocal()
+        try:
+            self.ensure_fresh(db)
+        except Exception as e:
+            print(f"Error in user index refresh: {str(e)}")
+        finally:
+            db.close()
+
+    @property
+    def watermark(self) -> Optional[date]:
+        """인덱스에 반영된 마지막 날짜 (이 날 이후의 행은 아직 반영되지 않았을 수 있다)"""
+        with self._lock:
+            return self._watermark
+
+    def search(self, keyword: str, limit: int) -> List[str]:
+        """접두사 일치를 먼저, 그 다음 부분 문자열 일치를 정렬 순서로 반환한다"""
+        lowered = keyword.lower()
+        with self._lock:
+            start = bisect.bisect_left(self._sorted, (lowered,))
+            prefix = []
+            for value, number in self._sorted[start:]:
+                if not value.startswith(lowered) or len(prefix) >= limit:
+                    break
+                prefix.append(number)
+            if len(prefix) >= limit:
+                return [self._users[number] for number in prefix]
+
+            seen = set(prefix)
+            others = sorted(
+                (self._lowered[number], number)
+                for number in self._candidates(lowered)
+                if number not in seen and lowered in self._lowered[number]
+            )
+            return [self._users[number] for number in prefix + [n for _, n in others[:limit - len(prefix)]]]
+
+    def match(self, keyword: str, max_ids: int) -> Optional[List[str]]:
+        """keyword 를 포함하는 모든 user_id (대소문자 무시), max_ids 를 넘으면 None"""
+        lowered = keyword.lower()
+        with self._lock:
+            matched = [
+                self._users[number]
+                for number in self._candidates(lowered)
+                if lowered in self._lowered[number]
+            ]
+        return matched if len(matched) <= max_ids else None
+
+    def _candidates(self, lowered: str):
+        if len(lowered) < self.GRAM:
+            # 짧은 검색어는 trigram 으로 거를 수 없으므로 전체를 확인한다
+            return range(len(self._users))
+        postings = []
+        for i in range(len(lowered) - self.GRAM + 1):
+            posting = self._grams.get(lowered[i:i + self.GRAM])
+            if not posting:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        return set.intersection(*postings) if len(postings) > 1 else postings[0]
+
+user_index = UserIdIndex(settings.USER_INDEX_REFRESH_SECONDS, settings.USER_INDEX_REBUILD_SECONDS)
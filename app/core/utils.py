@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional
 
 class DateUtils:
     @staticmethod
@@ -51,4 +51,39 @@ class DateUtils:
             start = today.replace(day=1)
             return {'start': start, 'end': today}
         
-        raise ValueError("Invalid period") 
\ No newline at end of file
+        raise ValueError("Invalid period") 
+    @staticmethod
+    def shift_date(target, compare: str, days: int):
+        # 비교 기간의 대응 날짜 (previous 는 기간 길이만큼, lastWeek 는 7일, lastYear 는 1년 전)
+        if compare == 'previous':
+            return target - timedelta(days=days)
+        elif compare == 'lastWeek':
+            return target - timedelta(days=7)
+        elif compare == 'lastYear':
+            try:
+                return target.replace(year=target.year - 1)
+            except ValueError:
+                # 2월 29일은 전년도 2월 28일과 비교
+                return target.replace(year=target.year - 1, day=28)
+        raise ValueError("Invalid compare. Must be one of: previous, lastWeek, lastYear")
+
+    @staticmethod
+    def get_compare_range(start, end, compare: str) -> Dict[datetime, datetime]:
+        days = (end - start).days + 1
+        return {
+            'start': DateUtils.shift_date(start, compare, days),
+            'end': DateUtils.shift_date(end, compare, days)
+        }
+
+class StatsUtils:
+    @staticmethod
+    def diff_rate(current: int, previous: int) -> float:
+        return round((current - previous) / previous * 100, 1) if previous > 0 else 0
+
+    @staticmethod
+    def delta(current: Dict[str, int], previous: Dict[str, int], fields: List[str]) -> Dict[str, Any]:
+        result = {}
+        for field in fields:
+            result[field] = current[field] - previous[field]
+            result[f"{field}Rate"] = StatsUtils.diff_rate(current[field], previous[field])
+        return result
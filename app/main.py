@@ -1,13 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import home, chat_analytics, click_analytics, chats
+from fastapi.responses import JSONResponse
+from app.api.routes import home, chat_analytics, click_analytics, chats, health, users, classifier_analytics, user_analytics
+from app.core.admission import AdmissionRejected
+from app.core.lifespan import lifespan
 import logging
 
 # SQLAlchemy 로깅 설정
 logging.basicConfig()
 logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # CORS 미들웨어 설정
 app.add_middleware(
@@ -21,14 +24,34 @@ app.add_middleware(
     allow_headers=["*"],  # 모든 HTTP 헤더 허용
 )
 
+# 입장 제어에서 거절된 분석 요청은 429 + Retry-After 로 응답한다
+@app.exception_handler(AdmissionRejected)
+def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 app.include_router(home.router)
 app.include_router(chat_analytics.router)
 app.include_router(click_analytics.router)
 app.include_router(chats.router)
+app.include_router(users.router)
+app.include_router(classifier_analytics.router)
+app.include_router(user_analytics.router)
+app.include_router(health.router)
 
 # 서버 설정을 config.py로 이동
 PORT = 3001
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=PORT, reload=True) 
\ No newline at end of file
+    from app.core.config import settings
+
+    # WEB_CONCURRENCY > 1 이면 멀티 워커 모드로 실행한다 (reload 와 함께 쓸 수 없음)
+    # 워커들은 RESULT_STORE=shared 로 같은 결과 저장소를 공유한다
+    if settings.WEB_CONCURRENCY > 1:
+        uvicorn.run("app.main:app", host="0.0.0.0", port=PORT, workers=settings.WEB_CONCURRENCY)
+    else:
+        uvicorn.run("app.main:app", host="0.0.0.0", port=PORT, reload=True) 
\ No newline at end of file
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Date, DateTime, Integer, BigInteger, String
+from app.core.database import Base
+
+class ArchivedMonth(Base):
+    """압축 파일로 옮겨진 월 목록 (행이 있으면 해당 월의 원본 행은 DB 에서 삭제된 상태)"""
+    __tablename__ = 'ibk_archive_month'
+    __table_args__ = {'extend_existing': True}
+
+    # 해당 월의 1일
+    month = Column(Date, primary_key=True)
+    path = Column(String(1024), nullable=False)
+    row_count = Column(Integer, nullable=False)
+    # 옮기기 전 DB 행 크기 합계와 보관 파일 크기
+    source_bytes = Column(BigInteger, nullable=False)
+    file_bytes = Column(BigInteger, nullable=False)
+    archived_at = Column(DateTime, nullable=False)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Date, Integer, SmallInteger, Boolean, String
+from app.core.database import Base
+
+class CalendarDay(Base):
+    """날짜 차원 테이블 (요일/주/월 버킷과 공휴일, 영업일 정보)"""
+    __tablename__ = 'ibk_calendar'
+    __table_args__ = {'extend_existing': True}
+
+    date = Column(Date, primary_key=True)
+    year = Column(SmallInteger, nullable=False)
+    month = Column(SmallInteger, nullable=False)
+    isodow = Column(SmallInteger, nullable=False)
+    iso_year = Column(SmallInteger, nullable=False)
+    iso_week = Column(SmallInteger, nullable=False)
+    is_holiday = Column(Boolean, nullable=False)
+    holiday_name = Column(String(100), nullable=True)
+    is_business_day = Column(Boolean, nullable=False)
+    # 달력 시작일부터 해당 일자까지의 영업일 수 (비영업일은 직전 영업일과 같은 값)
+    business_day_index = Column(Integer, nullable=False)
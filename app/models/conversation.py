@@ -1,10 +1,14 @@
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index, Date, cast
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 class ConvLog(Base):
     __tablename__ = 'ibk_convlog'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # 사용자별 대화 타임라인 / user_id IN (...) 조회용
+        Index('ix_ibk_convlog_user_id_date', 'user_id', 'date'),
+        {'extend_existing': True}
+    )
 
     conv_id = Column(String(30), primary_key=True)
     date = Column(DateTime, nullable=False)
@@ -16,6 +20,10 @@ class ConvLog(Base):
     clicked = relationship("ClickedLog", back_populates="conv", cascade="all, delete")
     stock_cls = relationship("StockCls", back_populates="conv", cascade="all, delete")
 
+# 분석 쿼리의 일자 범위 조건 CAST(date AS DATE) BETWEEN ... 과 user_index 의 일 단위 증분 갱신용 표현식 인덱스
+# (기존 테이블에는 init_db.create_missing_indexes 가 CONCURRENTLY 로 만든다)
+Index('ix_ibk_convlog_date_day', cast(ConvLog.date, Date))
+
 class ClickedLog(Base):
     __tablename__ = 'ibk_clicked_tb'
     __table_args__ = {'extend_existing': True}
@@ -0,0 +1,53 @@
+from sqlalchemy import Column, Date, DateTime, Integer, String, LargeBinary, Index
+from app.core.database import Base
+
+# (ensemble, gpt_res, enc_res) 조합별 카운터 컬럼 이름
+AGREEMENT_KEYS = [e + g + c for e in 'ox' for g in 'ox' for c in 'ox']
+
+class ClsAgreementDaily(Base):
+    """일자별 분류기(ensemble/gpt_res/enc_res) 결과 조합 카운트
+
+    행이 있으면 해당 일자는 집계가 끝난 것으로 본다 (대화가 없던 날도 0 으로 저장).
+    """
+    __tablename__ = 'ibk_cls_agreement_daily'
+    __table_args__ = {'extend_existing': True}
+
+    date = Column(Date, primary_key=True)
+    ooo = Column(Integer, nullable=False, default=0)
+    oox = Column(Integer, nullable=False, default=0)
+    oxo = Column(Integer, nullable=False, default=0)
+    oxx = Column(Integer, nullable=False, default=0)
+    xoo = Column(Integer, nullable=False, default=0)
+    xox = Column(Integer, nullable=False, default=0)
+    xxo = Column(Integer, nullable=False, default=0)
+    xxx = Column(Integer, nullable=False, default=0)
+    # o/x 이외의 값이 섞인 분류 결과
+    unknown = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False)
+
+class UserActivity(Base):
+    """사용자별 최초/최근 활동일과 비트맵에서 쓰는 사용자 번호"""
+    __tablename__ = 'ibk_user_activity'
+    __table_args__ = {'extend_existing': True}
+
+    user_no = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String(1024), nullable=False, unique=True)
+    first_seen = Column(Date, nullable=False)
+    last_seen = Column(Date, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+class UserActiveDaily(Base):
+    """일자별 활동 사용자 집합 (user_no 비트맵을 zlib 으로 압축해 저장)
+
+    행이 있으면 해당 일자는 집계가 끝난 것으로 본다 (대화가 없던 날도 빈 집합으로 저장).
+    """
+    __tablename__ = 'ibk_user_active_daily'
+    __table_args__ = (
+        Index('ix_ibk_user_active_daily_updated_at', 'updated_at'),
+        {'extend_existing': True}
+    )
+
+    date = Column(Date, primary_key=True)
+    active_users = Column(Integer, nullable=False, default=0)
+    members = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
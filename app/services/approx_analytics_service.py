@@ -0,0 +1,396 @@
+import time
+from collections import Counter, defaultdict
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, and_, cast, Date, extract, tablesample, literal_column
+from datetime import date, datetime
+from typing import Optional, Dict, Any, List
+import calendar
+from app.core.config import settings
+from app.core.admission import admitted
+from app.core.archive import archive_store
+from app.core.sampling import estimate_count, estimate_distinct, sample_tuner
+from app.core.utils import DateUtils
+from app.models.conversation import ConvLog, ClickedLog
+from app.models.calendar import CalendarDay
+
+SAMPLE_NAME = 'ibk_convlog_sample'
+
+class _BucketStats:
+    def __init__(self):
+        self.chats = 0
+        self.clicks = 0
+        self.chat_clusters: Counter = Counter()
+        self.click_clusters: Counter = Counter()
+        # 사용자별 표본 행 수 / 클릭 수 (고유 사용자 추정용)
+        self.user_rows: Counter = Counter()
+        self.user_clicks: Counter = Counter()
+
+class ApproxAnalyticsService:
+    """ibk_convlog 표본(TABLESAMPLE)으로 분석 결과를 근사하고 95% 신뢰구간을 함께 반환한다
+
+    보관 파일로 옮겨진 월은 DB 에 없어 표본에 잡히지 않으므로, 그 기간이 포함되면 근사하지 않고 오류를 반환한다.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.block_sampling = settings.APPROX_SAMPLE_METHOD == 'system'
+
+    def _sample(
+        self,
+        name: str,
+        start: date,
+        end: date,
+        fraction: Optional[float],
+        bucket=None,
+        with_clicks: bool = False,
+        join_calendar: bool = False,
+        business_days_only: bool = False
+    ) -> Dict[str, Any]:
+        if archive_store.covers(self.db, start, end):
+            # 보관 월은 표본에서 빠져 추정치가 실제보다 작게 나오므로 정확 조회로 안내한다
+            raise ValueError("approx mode does not cover archived months; query without approx/sample")
+
+        # fraction 을 지정하지 않으면 지연 시간 목표에 맞춰 자동으로 고른다
+        adaptive = fraction is None
+        if adaptive:
+            fraction = sample_tuner.fraction(name)
+        elif fraction > settings.APPROX_MAX_FRACTION:
+            # 비율이 크면 인덱스 없이 테이블 대부분을 읽으므로 상한을 둔다
+            raise ValueError(f"sample must be less than or equal to {settings.APPROX_MAX_FRACTION}")
+
+        method = func.system if self.block_sampling else func.bernoulli
+        log = aliased(ConvLog, tablesample(ConvLog.__table__, method(fraction * 100), name=SAMPLE_NAME))
+        bucket_expr = bucket(log) if bucket is not None else None
+
+        columns = [
+            log.user_id.label('user_id'),
+            func.count().label('rows'),
+            func.count().filter(log.qa == 'Q').label('chats')
+        ]
+        group_by = [log.user_id]
+        if bucket_expr is not None:
+            columns.append(bucket_expr.label('bucket'))
+            group_by.append(bucket_expr)
+        if self.block_sampling:
+            # 블록 단위 추출은 같은 블록의 행이 함께 뽑히므로 블록을 클러스터로 보고 분산을 계산한다
+            block = literal_column(f"({SAMPLE_NAME}.ctid::text::point)[0]")
+            columns.append(block.label('cluster'))
+            group_by.append(block)
+        if with_clicks:
+            columns.append(func.count(ClickedLog.conv_id).label('clicks'))
+
+        query = self.db.query(*columns)
+        if with_clicks:
+            query = query.outerjoin(
+                ClickedLog,
+                and_(ClickedLog.conv_id == log.conv_id, ClickedLog.clicked == 'o')
+            )
+        if join_calendar or business_days_only:
+            query = query.join(CalendarDay, CalendarDay.date == cast(log.date, Date))
+            if business_days_only:
+                query = query.filter(CalendarDay.is_business_day)
+
+        started = time.monotonic()
+        rows = query.filter(
+            and_(
+                cast(log.date, Date) >= start,
+                cast(log.date, Date) <= end
+            )
+        ).group_by(*group_by).all()
+        elapsed_ms = (time.monotonic() - started) * 1000
+        if adaptive:
+            sample_tuner.observe(name, fraction, elapsed_ms)
+
+        buckets: Dict[Any, _BucketStats] = defaultdict(_BucketStats)
+        sampled_rows = 0
+        for row in rows:
+            stats = buckets[row.bucket if bucket_expr is not None else None]
+            clicks = row.clicks if with_clicks else 0
+            cluster = row.cluster if self.block_sampling else None
+            sampled_rows += row.rows
+            stats.chats += row.chats
+            stats.clicks += clicks
+            stats.user_rows[row.user_id] += row.rows
+            if clicks:
+                stats.user_clicks[row.user_id] += clicks
+            if cluster is not None:
+                stats.chat_clusters[cluster] += row.chats
+                stats.click_clusters[cluster] += clicks
+
+        return {
+            "fraction": fraction,
+            "buckets": buckets,
+            "meta": {
+                "sampleFraction": round(fraction, 6),
+                "method": settings.APPROX_SAMPLE_METHOD,
+                "adaptive": adaptive,
+                "sampledRows": sampled_rows,
+                "elapsedMs": round(elapsed_ms, 1),
+                # confidence 는 카운트(ci)에만 해당한다. 사용자 수(bound)는 GEE 오차 비율 상한 구간이다
+                "confidence": 0.95,
+                "distinctBound": "gee-ratio"
+            }
+        }
+
+    def _square_sum(self, total: int, clusters: Counter) -> int:
+        # 행 단위 추출이면 각 행이 하나의 클러스터 (y_c 가 0/1 이므로 Σy² = Σy)
+        return sum(value * value for value in clusters.values()) if self.block_sampling else total
+
+    def _chats(self, stats: _BucketStats, fraction: float) -> Dict[str, int]:
+        return estimate_count(stats.chats, self._square_sum(stats.chats, stats.chat_clusters), fraction)
+
+    def _clicks(self, stats: _BucketStats, fraction: float) -> Dict[str, int]:
+        return estimate_count(stats.clicks, self._square_sum(stats.clicks, stats.click_clusters), fraction)
+
+    def _users(self, stats: _BucketStats, fraction: float) -> Dict[str, int]:
+        return estimate_distinct(stats.user_rows.values(), fraction)
+
+    @staticmethod
+    def _interval(estimate: Dict[str, int]) -> List[int]:
+        return [estimate["low"], estimate["high"]]
+
+    @staticmethod
+    def _daily_bucket(log):
+        return cast(log.date, Date)
+
+    @staticmethod
+    def _hourly_bucket(log):
+        return extract('hour', log.date)
+
+    @staticmethod
+    def _weekday_bucket(log):
+        return CalendarDay.isodow
+
+    @staticmethod
+    def _user_bucket(log):
+        return log.user_id
+
+    @admitted("approx.chat_analytics.daily")
+    def get_daily_stats(
+        self,
+        start_date: str,
+        end_date: str,
+        business_days_only: bool = False,
+        fraction: Optional[float] = None
+    ) -> Dict[str, Any]:
+        try:
+            start = datetime.strptime(start_date, "%Y-%m-%d").date()
+            end = datetime.strptime(end_date, "%Y-%m-%d").date()
+            if end < start:
+                raise ValueError("End date must be greater than or equal to start date")
+
+            sample = self._sample(
+                "chat_analytics.daily", start, end, fraction,
+                bucket=self._daily_bucket, business_days_only=business_days_only
+            )
+            fraction = sample["fraction"]
+            data = []
+            for day in sorted(sample["buckets"]):
+                stats = sample["buckets"][day]
+                chats, users = self._chats(stats, fraction), self._users(stats, fraction)
+                data.append({
+                    "date": day.strftime("%Y-%m-%d"),
+                    "chats": chats["value"],
+                    "users": users["value"],
+                    "ci": {"chats": self._interval(chats)},
+                    "bound": {"users": self._interval(users)}
+                })
+
+            return {"success": True, "data": {"data": data, "approx": sample["meta"]}}
+
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error in approx get_daily_stats: {str(e)}")
+            return {"success": False, "error": str(e)}
+
+    @admitted("approx.chat_analytics.hourly")
+    def get_hourly_stats(
+        self,
+        date_type: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        fraction: Optional[float] = None
+    ) -> Dict[str, Any]:
+        try:
+            date_range = DateUtils.get_date_range(date_type, start_date, end_date)
+            sample = self._sample(
+                "chat_analytics.hourly", date_range['start'], date_range['end'], fraction,
+                bucket=self._hourly_bucket
+            )
+            fraction = sample["fraction"]
+            buckets = {int(hour): stats for hour, stats in sample["buckets"].items()}
+
+            data = []
+            for hour in range(24):
+                chats = self._chats(buckets.get(hour, _BucketStats()), fraction)
+                data.append({
+                    "hour": str(hour).zfill(2),
+                    "chats": chats["value"],
+                    "ci": {"chats": self._interval(chats)}
+                })
+
+            return {"success": True, "data": {"data": data, "approx": sample["meta"]}}
+
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error in approx get_hourly_stats: {str(e)}")
+            return {"success": False, "error": str(e)}
+
+    @admitted("approx.chat_analytics.weekday")
+    def get_weekday_stats(
+        self,
+        year: int,
+        month: int,
+        business_days_only: bool = False,
+        fraction: Optional[float] = None
+    ) -> Dict[str, Any]:
+        try:
+            start = date(year, month, 1)
+            end = date(year, month, calendar.monthrange(year, month)[1])
+            sample = self._sample(
+                "chat_analytics.weekday", start, end, fraction,
+                bucket=self._weekday_bucket, join_calendar=True, business_days_only=business_days_only
+            )
+            fraction = sample["fraction"]
+            buckets = {int(isodow): stats for isodow, stats in sample["buckets"].items()}
+
+            weekdays = ['월', '화', '수', '목', '금', '토', '일']
+            data = []
+            for index, day in enumerate(weekdays):
+                stats = buckets.get(index + 1, _BucketStats())
+                chats, users = self._chats(stats, fraction), self._users(stats, fraction)
+                data.append({
+                    "day": day,
+                    "chats": chats["value"],
+                    "users": users["value"],
+                    "ci": {"chats": self._interval(chats)},
+                    "bound": {"users": self._interval(users)}
+                })
+
+            return {"success": True, "data": {"data": data, "approx": sample["meta"]}}
+
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error in approx get_weekday_stats: {str(e)}")
+            return {"success": False, "error": str(e)}
+
+    @admitted("approx.chat_analytics.ranking")
+    def get_user_ranking(
+        self,
+        period: str,
+        limit: int,
+        sort_order: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        fraction: Optional[float] = None
+    ) -> Dict[str, Any]:
+        try:
+            if period == 'custom':
+                date_range = DateUtils.get_date_range('custom', start_date, end_date)
+            else:
+                date_range = DateUtils.get_period_range(period)
+
+            sample = self._sample(
+                "chat_analytics.ranking", date_range['start'], date_range['end'], fraction,
+                bucket=self._user_bucket
+            )
+            fraction = sample["fraction"]
+            # 표본에 잡히지 않은 사용자는 알 수 없으므로 표본에 나타난 사용자 중에서 순위를 매긴다
+            estimates = [
+                (user_id, self._chats(stats, fraction))
+                for user_id, stats in sample["buckets"].items()
+            ]
+            estimates.sort(key=lambda item: item[1]["value"], reverse=sort_order == 'desc')
+
+            data = [
+                {
+                    "userId": user_id,
+                    "userName": user_id.split('@')[0] if '@' in user_id else user_id,
+                    "chats": chats["value"],
+                    "ci": {"chats": self._interval(chats)}
+                }
+                for user_id, chats in estimates[:limit]
+            ]
+
+            return {"success": True, "data": {"data": data, "approx": sample["meta"]}}
+
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error in approx get_user_ranking: {str(e)}")
+            return {"success": False, "error": str(e)}
+
+    @admitted("approx.click_analytics.user_ranking")
+    def get_user_click_ranking(self, start_date: str, end_date: str, fraction: Optional[float] = None) -> Dict[str, Any]:
+        try:
+            start = datetime.strptime(start_date, "%Y-%m-%d").date()
+            end = datetime.strptime(end_date, "%Y-%m-%d").date()
+
+            sample = self._sample(
+                "click_analytics.user_ranking", start, end, fraction,
+                bucket=self._user_bucket, with_clicks=True
+            )
+            fraction = sample["fraction"]
+            estimates = [
+                (user_id, self._clicks(stats, fraction), self._chats(stats, fraction))
+                for user_id, stats in sample["buckets"].items()
+            ]
+            estimates.sort(key=lambda item: item[1]["value"], reverse=True)
+
+            data = [
+                {
+                    "userId": user_id,
+                    "userName": user_id.split('@')[0] if '@' in user_id else user_id,
+                    "clicks": clicks["value"],
+                    "chats": chats["value"],
+                    "ci": {"clicks": self._interval(clicks), "chats": self._interval(chats)}
+                }
+                for user_id, clicks, chats in estimates
+            ]
+
+            return {"success": True, "data": {"data": data, "approx": sample["meta"]}}
+
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error in approx get_user_click_ranking: {str(e)}")
+            return {"success": False, "error": str(e)}
+
+    @admitted("approx.click_analytics.ratio")
+    def get_click_ratio(self, start_date: str, end_date: str, fraction: Optional[float] = None) -> Dict[str, Any]:
+        try:
+            start = datetime.strptime(start_date, "%Y-%m-%d").date()
+            end = datetime.strptime(end_date, "%Y-%m-%d").date()
+
+            sample = self._sample("click_analytics.ratio", start, end, fraction, with_clicks=True)
+            fraction = sample["fraction"]
+            stats = sample["buckets"].get(None, _BucketStats())
+
+            clicked_chats = self._clicks(stats, fraction)
+            total_chats = self._chats(stats, fraction)
+            clicked_users = estimate_distinct(stats.user_clicks.values(), fraction)
+            total_users = self._users(stats, fraction)
+
+            data = {
+                "clicked": {
+                    "users": clicked_users["value"],
+                    "chats": clicked_chats["value"]
+                },
+                "notClicked": {
+                    "users": max(total_users["value"] - clicked_users["value"], 0),
+                    "chats": max(total_chats["value"] - clicked_chats["value"], 0)
+                },
+                "ci": {
+                    "clickedChats": self._interval(clicked_chats),
+                    "totalChats": self._interval(total_chats)
+                },
+                "bound": {
+                    "clickedUsers": self._interval(clicked_users),
+                    "totalUsers": self._interval(total_users)
+                }
+            }
+
+            return {"success": True, "data": {"data": data, "approx": sample["meta"]}}
+
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error in approx get_click_ratio: {str(e)}")
+            return {"success": False, "error": str(e)}
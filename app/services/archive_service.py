@@ -0,0 +1,209 @@
+import os
+import sys
+from sqlalchemy.orm import Session
+from sqlalchemy import func, and_, literal_column
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List
+from app.core.archive import archive_store, write_archive, COLUMNS
+from app.core.config import settings
+from app.models.archive import ArchivedMonth
+from app.models.conversation import ConvLog, ClickedLog, StockCls
+from app.services.classifier_analytics_service import ClassifierAnalyticsService
+from app.core.user_activity import user_activity
+
+# 원본 삭제 시 IN 목록 하나에 넣는 conv_id 수
+DELETE_BATCH_SIZE = 5000
+
+class ArchiveService:
+    """닫힌 월의 ConvLog/ClickedLog/StockCls 를 보관 파일로 옮기거나 다시 DB 로 되돌린다"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _month_range(self, year: int, month: int) -> Dict[str, Any]:
+        start = date(year, month, 1)
+        next_month = (start + timedelta(days=32)).replace(day=1)
+        return {
+            'month': start,
+            'start': datetime.combine(start, datetime.min.time()),
+            'end': datetime.combine(next_month, datetime.min.time())
+        }
+
+    def _cutoff(self) -> date:
+        # 이번 달을 포함한 최근 ARCHIVE_HOT_MONTHS 개월은 DB 에 남긴다
+        cutoff = datetime.now().date().replace(day=1)
+        for _ in range(max(settings.ARCHIVE_HOT_MONTHS, 1) - 1):
+            cutoff = (cutoff - timedelta(days=1)).replace(day=1)
+        return cutoff
+
+    def archivable_months(self) -> List[date]:
+        """보관 기준보다 오래됐고 DB 에 행이 남아 있는 월"""
+        month = func.date_trunc('month', ConvLog.date)
+        results = self.db.query(month.label('month')).filter(
+            ConvLog.date < datetime.combine(self._cutoff(), datetime.min.time())
+        ).group_by(month).order_by(month).all()
+        return [result.month.date() for result in results]
+
+    def archive_month(self, year: int, month: int) -> Dict[str, Any]:
+        try:
+            target = self._month_range(year, month)
+            if target['month'] >= self._cutoff():
+                raise ValueError(f"Only months before {self._cutoff().strftime('%Y-%m')} can be archived")
+
+            # 분류기 집계를 채우기 전에 보관 위치부터 확인한다
+            path = archive_store.path_for(target['month'], datetime.now().strftime("%Y%m%d%H%M%S%f"))
+
+            # 보관 후에는 원본을 다시 셀 수 없으므로 분류기 집계를 먼저 채워둔다
+            ClassifierAnalyticsService(self.db)._refresh_counts(target['month'], target['end'].date() - timedelta(days=1))
+            user_activity.update(self.db)
+
+            # 읽기부터 삭제까지 한 스냅샷에서 처리해, 읽은 뒤 바뀐 행을 지우려 하면 직렬화 오류로 되돌린다
+            self.db.commit()
+            self.db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+            in_month = and_(ConvLog.date >= target['start'], ConvLog.date < target['end'])
+            rows = [tuple(row) for row in self.db.query(
+                ConvLog.conv_id,
+                ConvLog.date,
+                ConvLog.qa,
+                ConvLog.content,
+                ConvLog.user_id,
+                ClickedLog.clicked,
+                ClickedLog.user_id,
+                StockCls.ensemble,
+                StockCls.gpt_res,
+                StockCls.enc_res
+            ).outerjoin(
+                ClickedLog, ClickedLog.conv_id == ConvLog.conv_id
+            ).outerjoin(
+                StockCls, StockCls.conv_id == ConvLog.conv_id
+            ).filter(in_month).all()]
+            if not rows:
+                return {"success": True, "data": {"month": target['month'].strftime("%Y-%m"), "rows": 0}}
+
+            # 읽은 뒤에 들어온 행이 파일 없이 지워지지 않도록 조건을 다시 쓰지 않고 파일에 쓴 conv_id 로만 지운다
+            batches = [
+                [row[0] for row in rows[index:index + DELETE_BATCH_SIZE]]
+                for index in range(0, len(rows), DELETE_BATCH_SIZE)
+            ]
+
+            # 옮기기 전 DB 행 크기 (인덱스 제외)
+            source_bytes = sum(
+                self.db.query(func.coalesce(func.sum(func.pg_column_size(literal_column(f"{table.__tablename__}.*"))), 0)).filter(
+                    table.conv_id.in_(batch)
+                ).scalar()
+                for table in (ConvLog, ClickedLog, StockCls)
+                for batch in batches
+            )
+
+            # 이미 보관된 월에 늦게 들어온 행이 있으면 기존 파일과 합쳐 새 파일로 쓴다
+            entry = self.db.get(ArchivedMonth, target['month'])
+            previous_path = None
+            if entry is not None:
+                previous_path = entry.path
+                archived = archive_store.open(entry.path)
+                known = {row[0] for row in rows}
+                rows += [row for row in archived.to_rows() if row[0] not in known]
+                source_bytes += entry.source_bytes
+
+            file_bytes = write_archive(path, target['month'], rows)
+            try:
+                values = {
+                    "path": path,
+                    "row_count": len(rows),
+                    "source_bytes": int(source_bytes),
+                    "file_bytes": file_bytes,
+                    "archived_at": datetime.now()
+                }
+                if entry is None:
+                    self.db.add(ArchivedMonth(month=target['month'], **values))
+                else:
+                    for key, value in values.items():
+                        setattr(entry, key, value)
+
+                # 목록 갱신과 원본 삭제를 한 트랜잭션으로 처리해 조회 시 누락/중복이 없게 한다
+                for batch in batches:
+                    for table in (StockCls, ClickedLog, ConvLog):
+                        self.db.query(table).filter(table.conv_id.in_(batch)).delete(synchronize_session=False)
+                self.db.commit()
+            except Exception:
+                # 목록은 아직 이전 파일을 가리키므로 새 파일만 지운다
+                self.db.rollback()
+                os.remove(path)
+                raise
+
+            # 커밋된 뒤에야 이전 파일을 가리키는 목록이 없어진다
+            if previous_path is not None and previous_path != path and os.path.exists(previous_path):
+                os.remove(previous_path)
+
+            return {
+                "success": True,
+                "data": {
+                    "month": target['month'].strftime("%Y-%m"),
+                    "rows": len(rows),
+                    "sourceBytes": int(source_bytes),
+                    "fileBytes": file_bytes,
+                    "ratio": round(source_bytes / file_bytes, 1) if file_bytes else 0
+                }
+            }
+
+        except ValueError:
+            raise
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error in archive_month: {str(e)}")
+            return {"success": False, "error": str(e)}
+
+    def archive_closed_months(self) -> List[Dict[str, Any]]:
+        return [self.archive_month(month.year, month.month) for month in self.archivable_months()]
+
+    def restore_month(self, year: int, month: int) -> Dict[str, Any]:
+        try:
+            target = self._month_range(year, month)
+            entry = self.db.get(ArchivedMonth, target['month'])
+            if entry is None:
+                raise ValueError(f"{target['month'].strftime('%Y-%m')} is not archived")
+
+            rows = [dict(zip(COLUMNS, row)) for row in archive_store.open(entry.path).to_rows()]
+            self.db.bulk_insert_mappings(ConvLog, [
+                {key: row[key] for key in ['conv_id', 'date', 'qa', 'content', 'user_id']} for row in rows
+            ])
+            self.db.flush()
+            self.db.bulk_insert_mappings(ClickedLog, [
+                {"conv_id": row['conv_id'], "clicked": row['clicked'], "user_id": row['clicked_user_id']}
+                for row in rows if row['clicked'] is not None
+            ])
+            self.db.bulk_insert_mappings(StockCls, [
+                {key: row[key] for key in ['conv_id', 'ensemble', 'gpt_res', 'enc_res']}
+                for row in rows if row['ensemble'] is not None
+            ])
+            self.db.delete(entry)
+            self.db.commit()
+            os.remove(entry.path)
+
+            return {"success": True, "data": {"month": target['month'].strftime("%Y-%m"), "rows": len(rows)}}
+
+        except ValueError:
+            raise
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error in restore_month: {str(e)}")
+            return {"success": False, "error": str(e)}
+
+if __name__ == "__main__":
+    # python -m app.services.archive_service            : 보관 기준이 지난 모든 월을 옮긴다
+    # python -m app.services.archive_service restore YYYY-MM : 해당 월을 DB 로 되돌린다
+    from app.core.database import SessionLocal, init_engine
+
+    init_engine()
+    db = SessionLocal()
+    try:
+        service = ArchiveService(db)
+        if len(sys.argv) == 3 and sys.argv[1] == 'restore':
+            year, month = map(int, sys.argv[2].split('-'))
+            print(service.restore_month(year, month))
+        else:
+            for result in service.archive_closed_months():
+                print(result)
+    finally:
+        db.close()
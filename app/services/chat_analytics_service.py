@@ -1,15 +1,30 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, cast, Date, extract, desc, asc, distinct
-from datetime import datetime, timedelta
+from sqlalchemy import func, and_, or_, cast, Date, extract, desc, asc, distinct
+from datetime import date, datetime, timedelta
+import calendar
 from typing import List, Optional, Dict, Any
+from app.core.cache import cached_result
+from app.core.admission import admitted
 from app.models.conversation import ConvLog
-from app.core.utils import DateUtils  # 날짜 관련 유틸리티 함수들을 모아둔 모듈
+from app.models.calendar import CalendarDay
+from app.core.business_calendar import business_calendar
+from app.core.scatter import should_scatter, scatter, merge_counts, top_k
+from app.core.archive import archive_store
+from app.core.utils import DateUtils, StatsUtils  # 날짜 관련 유틸리티 함수들을 모아둔 모듈
 
 class ChatAnalyticsService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_daily_stats(self, start_date: str, end_date: str) -> Dict[str, Any]:
+    @cached_result("chat_analytics.daily")
+    @admitted("chat_analytics.daily")
+    def get_daily_stats(
+        self,
+        start_date: str,
+        end_date: str,
+        compare: Optional[str] = None,
+        business_days_only: bool = False
+    ) -> Dict[str, Any]:
         try:
             start = datetime.strptime(start_date, "%Y-%m-%d")
             end = datetime.strptime(end_date, "%Y-%m-%d")
@@ -17,40 +32,214 @@ class ChatAnalyticsService:
             if end < start:
                 raise ValueError("End date must be greater than or equal to start date")
 
-            results = self.db.query(
-                cast(ConvLog.date, Date).label('date'),
-                func.count(func.distinct(ConvLog.conv_id)).filter(ConvLog.qa == 'Q').label('chats'),
-                func.count(func.distinct(ConvLog.user_id)).label('users')
-            ).filter(
-                and_(
-                    cast(ConvLog.date, Date) >= start.date(),
-                    cast(ConvLog.date, Date) <= end.date()
-                )
-            ).group_by(
-                cast(ConvLog.date, Date)
-            ).order_by(
-                cast(ConvLog.date, Date)
-            ).all()
+            # 비교 기간이 있으면 현재/비교 기간을 OR 조건으로 한 번에 조회한다 (두 기간 사이는 읽지 않음)
+            counts = self._collect_daily_counts(start.date(), end.date(), compare, business_days_only)
 
-            data = [
-                {
-                    "date": result.date.strftime("%Y-%m-%d"),
-                    "chats": result.chats,
-                    "users": result.users
-                }
-                for result in results
-            ]
+            if not compare:
+                data = [
+                    {
+                        "date": day,
+                        "chats": chats,
+                        "users": users
+                    }
+                    for day, (chats, users) in sorted(counts.items())
+                ]
+                result = {"success": True, "data": {"data": data}}
+                return self._flag_missing_holidays(result, start.date(), end.date(), compare, business_days_only)
 
-            return {"success": True, "data": {"data": data}}
+            # 일자 단위 집계이므로 현재/비교 기간이 겹쳐도 같은 행을 양쪽에서 쓸 수 있다
+            by_date = {
+                datetime.strptime(day, "%Y-%m-%d").date(): {"chats": chats, "users": users}
+                for day, (chats, users) in counts.items()
+            }
+            empty = {"chats": 0, "users": 0}
+            days = (end - start).days + 1
+
+            data = []
+            current_date = start.date()
+            while current_date <= end.date():
+                compare_date = DateUtils.shift_date(current_date, compare, days)
+                skipped = business_days_only and not business_calendar.is_business_day(current_date)
+                if not skipped and (current_date in by_date or compare_date in by_date):
+                    current_stats = by_date.get(current_date, empty)
+                    compare_stats = by_date.get(compare_date, empty)
+                    data.append({
+                        "date": current_date.strftime("%Y-%m-%d"),
+                        **current_stats,
+                        "compare": {"date": compare_date.strftime("%Y-%m-%d"), **compare_stats},
+                        "delta": StatsUtils.delta(current_stats, compare_stats, ["chats", "users"])
+                    })
+                current_date += timedelta(days=1)
+
+            result = {
+                "success": True,
+                "data": {"data": data, "compare": self._compare_info(start.date(), end.date(), compare)}
+            }
+            return self._flag_missing_holidays(result, start.date(), end.date(), compare, business_days_only)
 
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    def _daily_counts(self, db: Session, ranges: List[Dict[str, date]], business_days_only: bool) -> Dict[str, List[int]]:
+        """ranges 의 일자별 [질문 수, 사용자 수] (겹치지 않는 기간들을 OR 조건으로 한 번에 조회)"""
+        query = db.query(
+            cast(ConvLog.date, Date).label('date'),
+            func.count(func.distinct(ConvLog.conv_id)).filter(ConvLog.qa == 'Q').label('chats'),
+            func.count(func.distinct(ConvLog.user_id)).label('users')
+        ).filter(
+            or_(*(self._in_range(scan['start'], scan['end']) for scan in ranges))
+        )
+        if business_days_only:
+            # 주말/공휴일 제외는 날짜 차원 테이블로 판단한다
+            query = self._join_calendar(query).filter(CalendarDay.is_business_day)
+
+        results = query.group_by(
+            cast(ConvLog.date, Date)
+        ).all()
+        counts = {result.date.strftime("%Y-%m-%d"): [result.chats, result.users] for result in results}
+        archived = {}
+        for scan in ranges:
+            archived.update(archive_store.daily_counts(db, scan['start'], scan['end'], business_days_only))
+
+        # 보관된 월에 늦게 들어온 행은 다음 보관 때까지 DB 에 남아 같은 날짜가 양쪽에 있을 수 있다
+        # 질문은 conv_id 가 달라 더하면 되지만, 사용자 수는 두 쪽 사용자 집합을 합쳐서 다시 센다
+        overlap = {target: datetime.strptime(target, "%Y-%m-%d").date() for target in archived if target in counts}
+        if overlap:
+            archived_users = {}
+            for scan in ranges:
+                archived_users.update(archive_store.daily_users(db, scan['start'], scan['end']))
+            users = {target: set(archived_users[day]) for target, day in overlap.items()}
+            late_rows = db.query(
+                cast(ConvLog.date, Date).label('date'),
+                ConvLog.user_id
+            ).filter(
+                cast(ConvLog.date, Date).in_(list(overlap.values()))
+            ).distinct().all()
+            for row in late_rows:
+                users[row.date.strftime("%Y-%m-%d")].add(row.user_id)
+            for target in overlap:
+                counts[target] = [counts[target][0] + archived.pop(target)[0], len(users[target])]
+
+        return merge_counts([counts, archived])
+
+    def _collect_daily_counts(
+        self,
+        start: date,
+        end: date,
+        compare: Optional[str],
+        business_days_only: bool
+    ) -> Dict[str, List[int]]:
+        ranges = self._scan_ranges(start, end, compare)
+        if not should_scatter(start, end):
+            return self._daily_counts(self.db, ranges, business_days_only)
+
+        if len(ranges) == 1:
+            # 넓은 기간은 청크별로 병렬 집계 후 합친다 (일자별 행이라 청크끼리 겹치지 않음)
+            def fetch(db: Session, chunk_start: date, chunk_end: date) -> Dict[str, List[int]]:
+                return self._daily_counts(db, [{'start': chunk_start, 'end': chunk_end}], business_days_only)
+
+            scan = ranges[0]
+            return merge_counts(scatter(
+                self.db, f"chat_analytics.daily:{business_days_only}", scan['start'], scan['end'], fetch
+            ))
+
+        # 떨어진 비교 기간은 현재 기간 청크마다 대응하는 비교 청크를 같은 쿼리로 읽는다
+        def fetch_pair(db: Session, chunk_start: date, chunk_end: date) -> Dict[str, List[int]]:
+            return self._daily_counts(db, self._chunk_ranges(chunk_start, chunk_end, start, end, compare), business_days_only)
+
+        return merge_counts(scatter(self.db, f"chat_analytics.daily:{business_days_only}:{compare}", start, end, fetch_pair))
+
+    def _chunk_ranges(
+        self,
+        chunk_start: date,
+        chunk_end: date,
+        start: date,
+        end: date,
+        compare: Optional[str]
+    ) -> List[Dict[str, date]]:
+        """현재 기간의 청크와 그에 대응하는 비교 기간 청크 (비교 기간 전체를 같은 간격으로 나눈 조각)"""
+        ranges = [{'start': chunk_start, 'end': chunk_end}]
+        if compare:
+            days = (end - start).days + 1
+            ranges.append({
+                'start': DateUtils.shift_date(chunk_start, compare, days),
+                'end': DateUtils.shift_date(chunk_end, compare, days)
+            })
+        return ranges
+
+    def _flag_missing_holidays(
+        self,
+        result: Dict[str, Any],
+        start: date,
+        end: date,
+        compare: Optional[str],
+        business_days_only: bool,
+        compare_range: Optional[Dict[str, date]] = None
+    ) -> Dict[str, Any]:
+        """영업일 집계 기간에 공휴일 데이터가 없는 연도가 있으면 data.holidayDataMissing 에 표시한다"""
+        if not business_days_only:
+            return result
+        ranges = [{'start': start, 'end': end}]
+        if compare_range:
+            ranges.append(compare_range)
+        elif compare:
+            ranges.append(self._compare_range(start, end, compare))
+        years = sorted({
+            year for scan in ranges for year in business_calendar.missing_holiday_years(scan['start'], scan['end'])
+        })
+        if years:
+            result["data"]["holidayDataMissing"] = years
+        return result
+
+    def _compare_range(self, start: date, end: date, compare: str) -> Dict[str, date]:
+        return DateUtils.get_compare_range(start, end, compare)
+
+    def _scan_ranges(self, start: date, end: date, compare: Optional[str]) -> List[Dict[str, date]]:
+        """조회할 기간 목록 (현재 기간과 비교 기간, 겹치거나 이어지면 하나로 합친다)"""
+        ranges = [{'start': start, 'end': end}]
+        if compare:
+            ranges.append(self._compare_range(start, end, compare))
+        ranges.sort(key=lambda scan: scan['start'])
+        merged = [dict(ranges[0])]
+        for scan in ranges[1:]:
+            if scan['start'] <= merged[-1]['end'] + timedelta(days=1):
+                merged[-1]['end'] = max(merged[-1]['end'], scan['end'])
+            else:
+                merged.append(dict(scan))
+        return merged
+
+    def _scan_filter(self, start: date, end: date, compare_range: Optional[Dict[str, date]]):
+        # 두 기간을 덮는 하나의 범위 대신 OR 조건으로 걸어 기간별 인덱스 범위 조회가 되게 한다
+        in_current = self._in_range(start, end)
+        if not compare_range:
+            return in_current
+        return or_(in_current, self._in_range(compare_range['start'], compare_range['end']))
+
+    def _compare_info(self, start: date, end: date, compare: str) -> Dict[str, str]:
+        compare_range = self._compare_range(start, end, compare)
+        return {
+            "type": compare,
+            "startDate": compare_range['start'].strftime("%Y-%m-%d"),
+            "endDate": compare_range['end'].strftime("%Y-%m-%d")
+        }
+
+    def _join_calendar(self, query):
+        return query.join(CalendarDay, CalendarDay.date == cast(ConvLog.date, Date))
+
+    def _in_range(self, start: date, end: date):
+        return and_(
+            cast(ConvLog.date, Date) >= start,
+            cast(ConvLog.date, Date) <= end
+        )
+
+    @cached_result("chat_analytics.hourly")
+    @admitted("chat_analytics.hourly")
     def get_hourly_stats(
         self, 
         date_type: str, 
         start_date: Optional[str] = None, 
-        end_date: Optional[str] = None
+        end_date: Optional[str] = None,
+        compare: Optional[str] = None
     ) -> Dict[str, Any]:
         try:
             # 날짜 범위 계산
@@ -58,15 +247,25 @@ class ChatAnalyticsService:
             if not date_range:
                 raise ValueError("Invalid date range")
 
+            compare_range = None
+            in_current = self._in_range(date_range['start'], date_range['end'])
+            columns = [
+                extract('hour', ConvLog.date).label('hour'),
+                func.count(func.distinct(ConvLog.conv_id)).filter(and_(ConvLog.qa == 'Q', in_current)).label('chats')
+            ]
+            if compare:
+                # 비교 기간은 FILTER 집계로 같은 스캔에서 함께 계산한다
+                compare_range = self._compare_range(date_range['start'], date_range['end'], compare)
+                in_compare = self._in_range(compare_range['start'], compare_range['end'])
+                columns.append(
+                    func.count(func.distinct(ConvLog.conv_id)).filter(and_(ConvLog.qa == 'Q', in_compare)).label('compare_chats')
+                )
+
             # 시간별 통계 쿼리
             results = self.db.query(
-                extract('hour', ConvLog.date).label('hour'),
-                func.count(func.distinct(ConvLog.conv_id)).filter(ConvLog.qa == 'Q').label('chats')
+                *columns
             ).filter(
-                and_(
-                    cast(ConvLog.date, Date) >= date_range['start'],
-                    cast(ConvLog.date, Date) <= date_range['end']
-                )
+                self._scan_filter(date_range['start'], date_range['end'], compare_range)
             ).group_by(
                 extract('hour', ConvLog.date)
             ).order_by(
@@ -75,11 +274,21 @@ class ChatAnalyticsService:
 
             # 0-23시까지 모든 시간대에 대한 데이터 준비
             hourly_data = {str(hour).zfill(2): 0 for hour in range(24)}
+            compare_data = {str(hour).zfill(2): 0 for hour in range(24)}
             
             # 실제 데이터로 업데이트
             for result in results:
                 hour = str(int(result.hour)).zfill(2)  # 시간을 2자리 문자열로 변환
                 hourly_data[hour] = result.chats
+                if compare:
+                    compare_data[hour] = result.compare_chats
+
+            # 보관 파일로 옮겨진 월의 대화 수를 더한다
+            for hour, chats in archive_store.hourly_counts(self.db, date_range['start'], date_range['end']).items():
+                hourly_data[str(hour).zfill(2)] += chats
+            if compare:
+                for hour, chats in archive_store.hourly_counts(self.db, compare_range['start'], compare_range['end']).items():
+                    compare_data[str(hour).zfill(2)] += chats
 
             # 시간 순서대로 데이터 포맷팅
             data = [
@@ -90,49 +299,89 @@ class ChatAnalyticsService:
                 for hour, count in hourly_data.items()
             ]
 
-            return {"success": True, "data": {"data": data}}
+            if not compare:
+                return {"success": True, "data": {"data": data}}
+
+            for row in data:
+                previous = {"chats": compare_data[row["hour"]]}
+                row["compare"] = previous
+                row["delta"] = StatsUtils.delta(row, previous, ["chats"])
+
+            return {
+                "success": True,
+                "data": {"data": data, "compare": self._compare_info(date_range['start'], date_range['end'], compare)}
+            }
 
         except Exception as e:
             print(f"Error in get_hourly_stats: {str(e)}")  # 디버깅용 로그
             return {"success": False, "error": str(e)}
 
-    def get_weekday_stats(self, year: int, month: int) -> Dict[str, Any]:
+    @cached_result("chat_analytics.weekday")
+    @admitted("chat_analytics.weekday")
+    def get_weekday_stats(
+        self,
+        year: int,
+        month: int,
+        compare: Optional[str] = None,
+        business_days_only: bool = False
+    ) -> Dict[str, Any]:
         try:
-            # 디버깅을 위한 날짜-요일 매핑 확인
-            debug_query = self.db.query(
-                ConvLog.date,
-                extract('isodow', ConvLog.date).label('weekday')
-            ).filter(
-                and_(
-                    extract('year', ConvLog.date) == year,
-                    extract('month', ConvLog.date) == month
-                )
-            ).order_by(ConvLog.date).limit(10)
-            
-            debug_results = debug_query.all()
-            print(f"=== Debug Date-Weekday Mapping for {year}-{month:02d} ===")
-            for result in debug_results:
-                print(f"Date: {result.date}, Weekday: {result.weekday}")
-            print("=================================")
+            month_start = date(year, month, 1)
+            month_end = date(year, month, calendar.monthrange(year, month)[1])
 
-            # 요일별 통계 쿼리
-            results = self.db.query(
-                extract('isodow', ConvLog.date).label('weekday'),
-                func.count(func.distinct(ConvLog.conv_id)).filter(ConvLog.qa == 'Q').label('chats'),
-                func.count(func.distinct(ConvLog.user_id)).label('users')
-            ).filter(
-                and_(
-                    extract('year', ConvLog.date) == year,
-                    extract('month', ConvLog.date) == month
+            compare_range = None
+            if compare == 'previous':
+                # 월 단위 조회에서 previous 는 직전 달을 의미한다
+                prev_end = month_start - timedelta(days=1)
+                compare_range = {'start': prev_end.replace(day=1), 'end': prev_end}
+            elif compare:
+                compare_range = self._compare_range(month_start, month_end, compare)
+
+            in_current = self._in_range(month_start, month_end)
+            columns = [
+                CalendarDay.isodow.label('weekday'),
+                func.count(func.distinct(ConvLog.conv_id)).filter(and_(ConvLog.qa == 'Q', in_current)).label('chats'),
+                func.count(func.distinct(ConvLog.user_id)).filter(in_current).label('users')
+            ]
+            if compare:
+                in_compare = self._in_range(compare_range['start'], compare_range['end'])
+                columns += [
+                    func.count(func.distinct(ConvLog.conv_id)).filter(and_(ConvLog.qa == 'Q', in_compare)).label('compare_chats'),
+                    func.count(func.distinct(ConvLog.user_id)).filter(in_compare).label('compare_users')
+                ]
+
+            weekdays = ['월', '화', '수', '목', '금', '토', '일']
+            archived = archive_store.covers(self.db, month_start, month_end) or (
+                compare and archive_store.covers(self.db, compare_range['start'], compare_range['end'])
+            )
+            if archived:
+                # 보관된 월이 섞이면 사용자 수를 단순 합산할 수 없어 요일별 사용자 집합을 합친다
+                weekday_data = self._tiered_weekday(month_start, month_end, business_days_only)
+                compare_data = None
+                if compare:
+                    compare_data = self._tiered_weekday(compare_range['start'], compare_range['end'], business_days_only)
+                return self._flag_missing_holidays(
+                    self._weekday_result(weekday_data, compare_data, compare, compare_range),
+                    month_start, month_end, compare, business_days_only, compare_range
                 )
-            ).group_by(
-                extract('isodow', ConvLog.date)
+
+            # 요일별 통계 쿼리 (요일은 날짜 차원에서 가져오고, 비교 기간도 같은 스캔에서 FILTER 집계로 계산)
+            query = self._join_calendar(self.db.query(
+                *columns
+            )).filter(
+                self._scan_filter(month_start, month_end, compare_range)
+            )
+            if business_days_only:
+                query = query.filter(CalendarDay.is_business_day)
+
+            results = query.group_by(
+                CalendarDay.isodow
             ).order_by(
-                extract('isodow', ConvLog.date)
+                CalendarDay.isodow
             ).all()
 
-            weekdays = ['월', '화', '수', '목', '금', '토', '일']
             weekday_data = {day: {'chats': 0, 'users': 0} for day in weekdays}
+            compare_data = {day: {'chats': 0, 'users': 0} for day in weekdays}
             
             for result in results:
                 weekday_idx = int(result.weekday) - 1
@@ -141,29 +390,95 @@ class ChatAnalyticsService:
                     'chats': result.chats,
                     'users': result.users
                 }
+                if compare:
+                    compare_data[weekday] = {
+                        'chats': result.compare_chats,
+                        'users': result.compare_users
+                    }
 
-            data = [
-                {
-                    "day": day,
-                    "chats": weekday_data[day]['chats'],
-                    "users": weekday_data[day]['users']
-                }
-                for day in weekdays
-            ]
-
-            return {"success": True, "data": {"data": data}}
+            return self._flag_missing_holidays(
+                self._weekday_result(weekday_data, compare_data, compare, compare_range),
+                month_start, month_end, compare, business_days_only, compare_range
+            )
 
         except Exception as e:
             print(f"Error in get_weekday_stats: {str(e)}")
             return {"success": False, "error": str(e)}
 
+    def _weekday_result(
+        self,
+        weekday_data: Dict[str, Dict[str, int]],
+        compare_data: Optional[Dict[str, Dict[str, int]]],
+        compare: Optional[str],
+        compare_range: Optional[Dict[str, date]]
+    ) -> Dict[str, Any]:
+        weekdays = ['월', '화', '수', '목', '금', '토', '일']
+        data = [
+            {
+                "day": day,
+                "chats": weekday_data[day]['chats'],
+                "users": weekday_data[day]['users']
+            }
+            for day in weekdays
+        ]
+
+        if not compare:
+            return {"success": True, "data": {"data": data}}
+
+        for row in data:
+            previous = compare_data[row["day"]]
+            row["compare"] = previous
+            row["delta"] = StatsUtils.delta(row, previous, ["chats", "users"])
+
+        return {
+            "success": True,
+            "data": {
+                "data": data,
+                "compare": {
+                    "type": compare,
+                    "startDate": compare_range['start'].strftime("%Y-%m-%d"),
+                    "endDate": compare_range['end'].strftime("%Y-%m-%d")
+                }
+            }
+        }
+
+    def _tiered_weekday(self, start: date, end: date, business_days_only: bool) -> Dict[str, Dict[str, int]]:
+        """DB 와 보관 파일의 요일별 질문 수와 사용자 집합을 합쳐 {요일: {chats, users}} 를 만든다"""
+        query = self._join_calendar(self.db.query(
+            CalendarDay.isodow.label('weekday'),
+            ConvLog.user_id.label('user_id'),
+            func.count(func.distinct(ConvLog.conv_id)).filter(ConvLog.qa == 'Q').label('chats')
+        )).filter(
+            self._in_range(start, end)
+        )
+        if business_days_only:
+            query = query.filter(CalendarDay.is_business_day)
+
+        counts = archive_store.weekday_counts(self.db, start, end, business_days_only)
+        for result in query.group_by(CalendarDay.isodow, ConvLog.user_id).all():
+            bucket = counts.setdefault(int(result.weekday), [0, set()])
+            bucket[0] += result.chats
+            bucket[1].add(result.user_id)
+
+        weekdays = ['월', '화', '수', '목', '금', '토', '일']
+        return {
+            day: {
+                'chats': counts.get(index + 1, [0, set()])[0],
+                'users': len(counts.get(index + 1, [0, set()])[1])
+            }
+            for index, day in enumerate(weekdays)
+        }
+
+    @cached_result("chat_analytics.ranking")
+    @admitted("chat_analytics.ranking")
     def get_user_ranking(
         self, 
         period: str,
         limit: int,
         sort_order: str,
         start_date: Optional[str] = None,
-        end_date: Optional[str] = None
+        end_date: Optional[str] = None,
+        compare: Optional[str] = None
     ) -> Dict[str, Any]:
         try:
             # 기간 설정
@@ -186,33 +501,147 @@ class ChatAnalyticsService:
                 else:
                     raise ValueError("Invalid period")
 
-            # 사용자별 대화 수 쿼리
-            results = self.db.query(
-                ConvLog.user_id.label('user_id'),
-                func.count(func.distinct(ConvLog.conv_id)).filter(ConvLog.qa == 'Q').label('chat_count')
-            ).filter(
-                and_(
-                    cast(ConvLog.date, Date) >= start.date(),
-                    cast(ConvLog.date, Date) <= end.date()
-                )
-            ).group_by(
-                ConvLog.user_id
-            ).order_by(
-                desc('chat_count') if sort_order == 'desc' else asc('chat_count')
-            ).limit(limit).all()
+            counted = any(
+                should_scatter(scan['start'], scan['end']) or archive_store.covers(self.db, scan['start'], scan['end'])
+                for scan in self._scan_ranges(start.date(), end.date(), compare)
+            )
+            if counted:
+                # 넓은 기간이나 보관된 월이 섞인 기간은 사용자별 카운트를 모두 합친 뒤 순위를 매긴다
+                ranked = self._counted_ranking(start.date(), end.date(), limit, sort_order, compare)
+            else:
+                ranked = self._ranking(start.date(), end.date(), limit, sort_order, compare)
 
             # 결과 포맷팅
             data = [
                 {
-                    "userId": result.user_id,
-                    "userName": result.user_id.split('@')[0] if '@' in result.user_id else result.user_id,  # 이메일에서 아이디 부분만 추출
-                    "chats": result.chat_count
+                    "userId": user_id,
+                    "userName": user_id.split('@')[0] if '@' in user_id else user_id,  # 이메일에서 아이디 부분만 추출
+                    "chats": chat_count
                 }
-                for result in results
+                for user_id, chat_count, _ in ranked
             ]
 
-            return {"success": True, "data": {"data": data}}
+            if not compare:
+                return {"success": True, "data": {"data": data}}
+
+            for row, (_, _, compare_count) in zip(data, ranked):
+                previous = {"chats": compare_count}
+                row["compare"] = previous
+                row["delta"] = StatsUtils.delta(row, previous, ["chats"])
+
+            return {
+                "success": True,
+                "data": {"data": data, "compare": self._compare_info(start.date(), end.date(), compare)}
+            }
 
         except Exception as e:
             print(f"Error in get_user_ranking: {str(e)}")  # 디버깅용 로그
-            return {"success": False, "error": str(e)} 
\ No newline at end of file
+            return {"success": False, "error": str(e)}
+
+    def _ranking(
+        self,
+        start: date,
+        end: date,
+        limit: int,
+        sort_order: str,
+        compare: Optional[str]
+    ) -> List[tuple]:
+        """(user_id, 대화 수, 비교 기간 대화 수) 목록을 한 번의 쿼리로 구한다"""
+        in_current = self._in_range(start, end)
+        columns = [
+            ConvLog.user_id.label('user_id'),
+            func.count(func.distinct(ConvLog.conv_id)).filter(and_(ConvLog.qa == 'Q', in_current)).label('chat_count')
+        ]
+        compare_range = None
+        if compare:
+            compare_range = self._compare_range(start, end, compare)
+            in_compare = self._in_range(compare_range['start'], compare_range['end'])
+            columns.append(
+                func.count(func.distinct(ConvLog.conv_id)).filter(and_(ConvLog.qa == 'Q', in_compare)).label('compare_count')
+            )
+
+        # 사용자별 대화 수 쿼리 (현재 기간에 등장한 사용자만 순위에 포함)
+        query = self.db.query(
+            *columns
+        ).filter(
+            self._scan_filter(start, end, compare_range)
+        ).group_by(
+            ConvLog.user_id
+        )
+        if compare:
+            query = query.having(func.count().filter(in_current) > 0)
+
+        results = query.order_by(
+            desc('chat_count') if sort_order == 'desc' else asc('chat_count')
+        ).limit(limit).all()
+
+        return [
+            (result.user_id, result.chat_count, result.compare_count if compare else None)
+            for result in results
+        ]
+
+    def _user_chat_counts(
+        self,
+        db: Session,
+        ranges: List[Dict[str, date]]
+    ) -> Dict[str, List[int]]:
+        """{user_id: [대화 수, 비교 기간 대화 수, 현재 기간 등장 여부]} (ranges 는 [현재 기간, 비교 기간])"""
+        current, compare_range = ranges[0], ranges[1] if len(ranges) > 1 else None
+        in_current = self._in_range(current['start'], current['end'])
+        columns = [
+            ConvLog.user_id.label('user_id'),
+            func.count(func.distinct(ConvLog.conv_id)).filter(and_(ConvLog.qa == 'Q', in_current)).label('chat_count'),
+            func.count().filter(in_current).label('current_rows')
+        ]
+        if compare_range:
+            in_compare = self._in_range(compare_range['start'], compare_range['end'])
+            columns.append(
+                func.count(func.distinct(ConvLog.conv_id)).filter(and_(ConvLog.qa == 'Q', in_compare)).label('compare_count')
+            )
+
+        # 비교 기간도 FILTER 집계로 같은 스캔에서 함께 센다
+        results = db.query(
+            *columns
+        ).filter(
+            self._scan_filter(current['start'], current['end'], compare_range)
+        ).group_by(
+            ConvLog.user_id
+        ).all()
+        counts = {
+            result.user_id: [result.chat_count, result.compare_count if compare_range else 0, int(result.current_rows > 0)]
+            for result in results
+        }
+        archived = [
+            {user_id: [chats, 0, 1] for user_id, (chats, *_) in archive_store.user_counts(db, current['start'], current['end']).items()}
+        ]
+        if compare_range:
+            archived.append({
+                user_id: [0, chats, 0]
+                for user_id, (chats, *_) in archive_store.user_counts(db, compare_range['start'], compare_range['end']).items()
+            })
+        return merge_counts([counts] + archived)
+
+    def _collect_user_counts(self, start: date, end: date, compare: Optional[str]) -> Dict[str, List[int]]:
+        if should_scatter(start, end):
+            # 현재 기간 청크와 대응하는 비교 기간 청크를 한 쿼리로 읽고, 청크끼리는 기간이 겹치지 않아 더하면 된다
+            def fetch(db: Session, chunk_start: date, chunk_end: date) -> Dict[str, List[int]]:
+                return self._user_chat_counts(db, self._chunk_ranges(chunk_start, chunk_end, start, end, compare))
+
+            return merge_counts(scatter(self.db, f"chat_analytics.ranking:{compare}", start, end, fetch))
+        return self._user_chat_counts(self.db, self._chunk_ranges(start, end, start, end, compare))
+
+    def _counted_ranking(
+        self,
+        start: date,
+        end: date,
+        limit: int,
+        sort_order: str,
+        compare: Optional[str]
+    ) -> List[tuple]:
+        # 청크별 사용자 대화 수를 합친 뒤 상위 K 명을 고른다
+        # (청크별 상위 K 만 합치면 여러 청크에 고르게 분포한 사용자를 놓치므로 전체 카운트를 합산)
+        counts = self._collect_user_counts(start, end, compare)
+        # 현재 기간에 등장한 사용자만 순위에 포함한다
+        current = {user_id: values for user_id, values in counts.items() if values[2]}
+        ranked = top_k(current, limit, descending=sort_order == 'desc')
+        return [(user_id, values[0], values[1] if compare else None) for user_id, values in ranked]
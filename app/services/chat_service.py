@@ -3,84 +3,137 @@ from sqlalchemy import func, and_, cast, Date, or_, exists, select, literal, cas
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from app.models.conversation import ConvLog, StockCls
+from app.core.config import settings
+from app.core.user_index import user_index
+from app.core.admission import admitted
+from app.core.archive import archive_store, merge_newest
 
 class ChatService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_chats(
+    def build_query(
         self,
         start_date: str,
         end_date: str,
         is_stock: str = "all",
         user_id: Optional[str] = None,
         keyword: Optional[str] = None,
-        page: int = 0,
-        page_size: int = 10
-    ) -> Dict[str, Any]:
-        try:
-            # 날짜 검증
-            start = datetime.strptime(start_date, "%Y-%m-%d")
-            end = datetime.strptime(end_date, "%Y-%m-%d")
-            if end < start:
-                raise ValueError("End date must be greater than or equal to start date")
-
-            # 기본 쿼리 구성
-            base_query = self.db.query(
-                ConvLog.conv_id.label('id'),
-                ConvLog.date.label('timestamp'),
-                ConvLog.user_id.label('userId'),
-                ConvLog.content.label('question')
-            ).filter(
-                and_(
-                    cast(ConvLog.date, Date) >= start.date(),
-                    cast(ConvLog.date, Date) <= end.date(),
-                    ConvLog.qa == 'Q'  # 질문만 조회
-                )
+        **kwargs
+    ):
+        """필터가 적용된 질문 조회 쿼리"""
+        # 날짜 검증
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+        if end < start:
+            raise ValueError("End date must be greater than or equal to start date")
+
+        # 기본 쿼리 구성
+        base_query = self.db.query(
+            ConvLog.conv_id.label('id'),
+            ConvLog.date.label('timestamp'),
+            ConvLog.user_id.label('userId'),
+            ConvLog.content.label('question')
+        ).filter(
+            and_(
+                cast(ConvLog.date, Date) >= start.date(),
+                cast(ConvLog.date, Date) <= end.date(),
+                ConvLog.qa == 'Q'  # 질문만 조회
             )
+        )
 
-            # 종목 여부에 따른 쿼리 분기
-            if is_stock == "stock":
-                query = base_query.add_columns(
-                    literal(True).label('isStock')
-                ).filter(exists().where(
+        # 종목 여부에 따른 쿼리 분기
+        if is_stock == "stock":
+            query = base_query.add_columns(
+                literal(True).label('isStock')
+            ).filter(exists().where(
+                and_(
+                    StockCls.conv_id == ConvLog.conv_id,
+                    StockCls.ensemble == 'o'
+                )
+            ))
+        elif is_stock == "non-stock":
+            query = base_query.add_columns(
+                literal(False).label('isStock')
+            ).filter(exists().where(
+                and_(
+                    StockCls.conv_id == ConvLog.conv_id,
+                    StockCls.ensemble == 'x'
+                )
+            ))
+        else:  # is_stock 파라미터가 없는 경우
+            stock_exists = exists(
+                select(StockCls.conv_id).where(
                     and_(
                         StockCls.conv_id == ConvLog.conv_id,
                         StockCls.ensemble == 'o'
                     )
-                ))
-            elif is_stock == "non-stock":
-                query = base_query.add_columns(
-                    literal(False).label('isStock')
-                ).filter(exists().where(
+                )
+            )
+            query = base_query.add_columns(
+                case(
+                    (stock_exists, True),
+                    else_=False
+                ).label('isStock')
+            )
+
+        # 사용자 ID 검색: 메모리 인덱스로 일치하는 ID 를 찾아 정확히 조회한다
+        if user_id:
+            # 인덱스가 아직 반영하지 못한 최근 행도 찾도록 워터마크를 먼저 읽고 일치 목록을 구한다
+            watermark = user_index.watermark
+            matched_ids = self._match_users(user_id)
+            if matched_ids is None or watermark is None:
+                # 일치하는 사용자가 너무 많거나 인덱스가 비어 있으면 기존 방식으로 조회
+                query = query.filter(ConvLog.user_id.ilike(f"%{user_id}%"))
+            else:
+                query = query.filter(or_(
+                    ConvLog.user_id.in_(matched_ids),
                     and_(
-                        StockCls.conv_id == ConvLog.conv_id,
-                        StockCls.ensemble == 'x'
+                        cast(ConvLog.date, Date) >= watermark,
+                        ConvLog.user_id.ilike(f"%{user_id}%")
                     )
                 ))
-            else:  # is_stock 파라미터가 없는 경우
-                stock_exists = exists(
-                    select(StockCls.conv_id).where(
-                        and_(
-                            StockCls.conv_id == ConvLog.conv_id,
-                            StockCls.ensemble == 'o'
-                        )
-                    )
-                )
-                query = base_query.add_columns(
-                    case(
-                        (stock_exists, True),
-                        else_=False
-                    ).label('isStock')
-                )
 
-            # 사용자 ID 검색
-            if user_id:
-                query = query.filter(ConvLog.user_id.ilike(f"%{user_id}%"))
+        # 키워드 검색
+        if keyword:
+            query = query.filter(ConvLog.content.ilike(f"%{keyword}%"))
+
+        return query
+
+    def _match_users(self, user_id: str) -> Optional[List[str]]:
+        """user_id 를 포함하는 사용자 ID 목록 (너무 많으면 None)"""
+        # 인덱스 갱신(주기적인 전체 재구성 포함)은 요청 레인의 statement_timeout 밖에서 백그라운드로 한다
+        # 아직 반영되지 않은 최근 행은 build_query 의 워터마크 이후 ILIKE 조건으로 찾는다
+        user_index.refresh_in_background()
+        return user_index.match(user_id, settings.USER_FILTER_MAX_IDS)
+
+    def _format(self, item) -> Dict[str, Any]:
+        return {
+            "id": item["id"],
+            "timestamp": item["timestamp"].strftime("%Y-%m-%d %H:%M:%S"),
+            "userId": item["userId"],
+            "question": item["question"],
+            "isStock": bool(item["isStock"])
+        }
+
+    @admitted("chats")
+    def get_chats(
+        self,
+        start_date: str,
+        end_date: str,
+        is_stock: str = "all",
+        user_id: Optional[str] = None,
+        keyword: Optional[str] = None,
+        page: int = 0,
+        page_size: int = 10
+    ) -> Dict[str, Any]:
+        try:
+            query = self.build_query(start_date, end_date, is_stock, user_id, keyword)
 
-            # 키워드 검색
-            if keyword:
-                query = query.filter(ConvLog.content.ilike(f"%{keyword}%"))
+            start = datetime.strptime(start_date, "%Y-%m-%d").date()
+            end = datetime.strptime(end_date, "%Y-%m-%d").date()
+            if archive_store.covers(self.db, start, end):
+                return self._tiered_chats(query, start, end, is_stock, user_id, keyword, page, page_size)
 
             # 전체 데이터 수 조회
             total = query.count()
@@ -94,16 +147,7 @@ class ChatService:
 
             # 결과 포맷팅
             result = {
-                "items": [
-                    {
-                        "id": item.id,
-                        "timestamp": item.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-                        "userId": item.userId,
-                        "question": item.question,
-                        "isStock": bool(item.isStock)
-                    }
-                    for item in items
-                ],
+                "items": [self._format(item._asdict()) for item in items],
                 "total": total
             }
 
@@ -113,4 +157,38 @@ class ChatService:
             raise e
         except Exception as e:
             print(f"Error in get_chats: {str(e)}")
-            raise Exception("Failed to fetch chat data") 
\ No newline at end of file
+            raise Exception("Failed to fetch chat data") 
+    def _tiered_chats(
+        self,
+        query,
+        start,
+        end,
+        is_stock: str,
+        user_id: Optional[str],
+        keyword: Optional[str],
+        page: int,
+        page_size: int
+    ) -> Dict[str, Any]:
+        """DB(hot) 와 보관 파일(cold) 에서 각각 앞쪽 행을 가져와 최신순으로 합친다"""
+        wanted = (page + 1) * page_size
+        hot_items = [
+            item._asdict()
+            for item in query.order_by(ConvLog.date.desc()).limit(wanted).all()
+        ]
+        matched_ids = self._match_users(user_id) if user_id else None
+        cold_total, cold_items = archive_store.find_chats(
+            self.db,
+            start,
+            end,
+            is_stock,
+            user_ids=matched_ids,
+            user_keyword=user_id if user_id and matched_ids is None else None,
+            keyword=keyword,
+            limit=wanted
+        )
+
+        items = merge_newest(hot_items, cold_items, page * page_size, page_size)
+        return {
+            "items": [self._format(item) for item in items],
+            "total": query.count() + cold_total
+        }
@@ -0,0 +1,210 @@
+import threading
+import time
+from sqlalchemy.orm import Session
+from sqlalchemy import func, and_, or_, cast, Date, distinct
+from sqlalchemy.dialects.postgresql import insert
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional
+from app.core import database
+from app.core.config import settings
+from app.models.conversation import ConvLog, StockCls
+from app.models.stats import ClsAgreementDaily, AGREEMENT_KEYS
+
+# 비교할 분류기 쌍과 AGREEMENT_KEYS 에서의 문자 위치
+CLASSIFIER_PAIRS = {
+    "ensembleVsGpt": (0, 1),
+    "ensembleVsEnc": (0, 2),
+    "gptVsEnc": (1, 2)
+}
+
+class ClassifierAnalyticsService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _refresh_counts(self, start: date, end: date) -> None:
+        # 데이터가 시작되기 전 날짜까지 0 행을 만들지 않도록 원본의 첫 날짜부터 센다
+        # (보관된 월은 옮기기 전에 집계해 두었으므로 DB 에 남은 원본만 기준으로 삼는다)
+        earliest = self.db.query(func.min(ConvLog.date)).scalar()
+        if earliest is None:
+            return
+        start = max(start, earliest.date())
+        if end < start:
+            return
+
+        # 아직 집계되지 않은 날짜와 최근 며칠만 원본 테이블에서 다시 센다
+        recompute_from = datetime.now().date() - timedelta(days=settings.STATS_RECOMPUTE_DAYS - 1)
+        done = {
+            row.date for row in self.db.query(ClsAgreementDaily.date).filter(
+                and_(
+                    ClsAgreementDaily.date >= start,
+                    ClsAgreementDaily.date <= end,
+                    ClsAgreementDaily.date < recompute_from
+                )
+            ).all()
+        }
+        missing = [
+            start + timedelta(days=i)
+            for i in range((end - start).days + 1)
+            if start + timedelta(days=i) not in done
+        ]
+        if not missing:
+            return
+
+        now = datetime.now()
+        rows = {target: {key: 0 for key in AGREEMENT_KEYS + ['unknown']} for target in missing}
+
+        # 연속된 날짜 구간별로 원본을 조회해 이미 집계된 날짜는 다시 읽지 않는다
+        runs = []
+        for target in missing:
+            if runs and runs[-1][1] + timedelta(days=1) == target:
+                runs[-1][1] = target
+            else:
+                runs.append([target, target])
+
+        day = cast(ConvLog.date, Date)
+        for run_start, run_end in runs:
+            results = self.db.query(
+                day.label('date'),
+                StockCls.ensemble,
+                StockCls.gpt_res,
+                StockCls.enc_res,
+                func.count(distinct(StockCls.conv_id)).label('count')
+            ).join(
+                ConvLog,
+                StockCls.conv_id == ConvLog.conv_id
+            ).filter(
+                and_(
+                    ConvLog.date >= datetime.combine(run_start, datetime.min.time()),
+                    ConvLog.date < datetime.combine(run_end + timedelta(days=1), datetime.min.time())
+                )
+            ).group_by(
+                day, StockCls.ensemble, StockCls.gpt_res, StockCls.enc_res
+            ).all()
+
+            for result in results:
+                key = f"{result.ensemble}{result.gpt_res}{result.enc_res}"
+                rows[result.date][key if key in AGREEMENT_KEYS else 'unknown'] += result.count
+
+        statement = insert(ClsAgreementDaily).values([
+            {"date": target, "updated_at": now, **counts} for target, counts in rows.items()
+        ])
+        # 다시 센 최근 날짜의 값이 그대로면 쓰지 않는다
+        statement = statement.on_conflict_do_update(
+            index_elements=[ClsAgreementDaily.date],
+            set_={column: statement.excluded[column] for column in AGREEMENT_KEYS + ['unknown', 'updated_at']},
+            where=or_(*(
+                getattr(ClsAgreementDaily, column) != statement.excluded[column] for column in AGREEMENT_KEYS + ['unknown']
+            ))
+        )
+        self.db.execute(statement)
+        self.db.commit()
+
+    def _summarize(self, cube: Dict[str, int]) -> Dict[str, Any]:
+        total = sum(cube[key] for key in AGREEMENT_KEYS)
+        confusion = {}
+        for name, (left, right) in CLASSIFIER_PAIRS.items():
+            matrix = {a: {b: 0 for b in 'ox'} for a in 'ox'}
+            for key in AGREEMENT_KEYS:
+                matrix[key[left]][key[right]] += cube[key]
+            agreed = matrix['o']['o'] + matrix['x']['x']
+            confusion[name] = {
+                "matrix": matrix,
+                "agreement": round(agreed / total * 100, 1) if total > 0 else 0
+            }
+        all_agreed = cube['ooo'] + cube['xxx']
+        return {
+            "total": total,
+            "unknown": cube['unknown'],
+            "cube": {key: cube[key] for key in AGREEMENT_KEYS},
+            "confusion": confusion,
+            "allAgreement": round(all_agreed / total * 100, 1) if total > 0 else 0
+        }
+
+    def get_agreement_stats(self, start_date: str, end_date: str, group_by: str = 'range') -> Dict[str, Any]:
+        try:
+            start = datetime.strptime(start_date, "%Y-%m-%d").date()
+            end = datetime.strptime(end_date, "%Y-%m-%d").date()
+            if end < start:
+                raise ValueError("End date must be greater than or equal to start date")
+            if end > datetime.now().date():
+                end = datetime.now().date()
+
+            # 조회 요청은 집계 테이블만 읽고, 새 데이터 반영은 워밍업/백그라운드 갱신이 맡는다
+            agreement_counts.refresh_in_background()
+
+            counters = [getattr(ClsAgreementDaily, key) for key in AGREEMENT_KEYS + ['unknown']]
+            if group_by == 'day':
+                results = self.db.query(
+                    ClsAgreementDaily.date, *counters
+                ).filter(
+                    and_(ClsAgreementDaily.date >= start, ClsAgreementDaily.date <= end)
+                ).order_by(ClsAgreementDaily.date).all()
+                data: List[Dict[str, Any]] = [
+                    {
+                        "date": result.date.strftime("%Y-%m-%d"),
+                        **self._summarize({key: getattr(result, key) for key in AGREEMENT_KEYS + ['unknown']})
+                    }
+                    for result in results
+                ]
+                return {"success": True, "data": {"data": data}}
+
+            # 기간 전체는 일자별 카운터 벡터의 합으로 계산한다
+            result = self.db.query(
+                *[func.coalesce(func.sum(counter), 0).label(counter.key) for counter in counters]
+            ).filter(
+                and_(ClsAgreementDaily.date >= start, ClsAgreementDaily.date <= end)
+            ).first()
+            cube = {key: int(getattr(result, key)) for key in AGREEMENT_KEYS + ['unknown']}
+
+            return {"success": True, "data": {"data": self._summarize(cube)}}
+
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error in get_agreement_stats: {str(e)}")
+            return {"success": False, "error": str(e)}
+
+class AgreementCounts:
+    """ibk_cls_agreement_daily 를 원본의 첫 날짜부터 오늘까지 주기적으로 채운다
+
+    처음 한 번은 집계되지 않은 모든 날짜를, 이후에는 최근 STATS_RECOMPUTE_DAYS 일만 다시 센다.
+    요청 경로에서는 refresh_in_background 로 갱신을 백그라운드에 맡긴다.
+    """
+
+    def __init__(self, refresh_interval: int):
+        self.refresh_interval = refresh_interval
+        self._refresh_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._refreshed_at = 0.0
+
+    def ensure_fresh(self, db: Session) -> None:
+        now = time.monotonic()
+        if now - self._refreshed_at < self.refresh_interval:
+            return
+        with self._refresh_lock:
+            if now - self._refreshed_at < self.refresh_interval:
+                return
+            ClassifierAnalyticsService(db)._refresh_counts(date.min, datetime.now().date())
+            self._refreshed_at = now
+
+    def refresh_in_background(self) -> None:
+        """갱신 주기가 지났으면 별도 스레드와 세션으로 갱신한다 (호출한 요청은 현재 집계를 그대로 쓴다)"""
+        if time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+        with self._thread_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(target=self._refresh, name="cls-agreement-refresh", daemon=True)
+            self._refresh_thread.start()
+
+    def _refresh(self) -> None:
+        db = database.SessionLocal()
+        try:
+            self.ensure_fresh(db)
+        except Exception as e:
+            db.rollback()
+            print(f"Error in classifier agreement refresh: {str(e)}")
+        finally:
+            db.close()
+
+agreement_counts = AgreementCounts(settings.CLS_AGREEMENT_REFRESH_SECONDS)
@@ -1,49 +1,42 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, cast, Date, distinct
-from datetime import datetime
-from typing import Dict, Any
+from datetime import date, datetime
+from typing import Dict, Any, List
+from app.core.cache import cached_result
+from app.core.admission import admitted
 from app.models.conversation import ConvLog, ClickedLog
+from app.core.scatter import should_scatter, scatter, merge_counts, merge_distinct
+from app.core.archive import archive_store
 
 class ClickAnalyticsService:
     def __init__(self, db: Session):
         self.db = db
 
+    @cached_result("click_analytics.user_ranking")
+    @admitted("click_analytics.user_ranking")
     def get_user_click_ranking(self, start_date: str, end_date: str) -> Dict[str, Any]:
         try:
             start = datetime.strptime(start_date, "%Y-%m-%d")
             end = datetime.strptime(end_date, "%Y-%m-%d")
 
-            # 사용자별 클릭수와 대화수를 함께 조회
-            results = self.db.query(
-                ConvLog.user_id.label('user_id'),
-                func.count(func.distinct(
-                    ClickedLog.conv_id
-                )).filter(ClickedLog.clicked == 'o').label('clicks'),
-                func.count(func.distinct(
-                    ConvLog.conv_id
-                )).filter(ConvLog.qa == 'Q').label('chats')
-            ).outerjoin(
-                ClickedLog,
-                ConvLog.conv_id == ClickedLog.conv_id
-            ).filter(
-                and_(
-                    cast(ConvLog.date, Date) >= start.date(),
-                    cast(ConvLog.date, Date) <= end.date()
-                )
-            ).group_by(
-                ConvLog.user_id
-            ).order_by(
-                func.count(func.distinct(ClickedLog.conv_id)).desc()
-            ).all()
+            if should_scatter(start.date(), end.date()):
+                # 청크별 사용자 클릭/대화 수를 합산 (대화는 하나의 날짜에만 속하므로 중복 없음)
+                counts = merge_counts(scatter(
+                    self.db, "click_analytics.user_ranking", start.date(), end.date(), self._user_click_counts
+                ))
+            else:
+                counts = self._user_click_counts(self.db, start.date(), end.date())
+            # 'x' 를 포함해 클릭 기록이 있는 대화 수 내림차순 (기존 정렬 기준 유지)
+            ranked = sorted(counts.items(), key=lambda item: item[1][2], reverse=True)
 
             data = [
                 {
-                    "userId": result.user_id,
-                    "userName": result.user_id.split('@')[0] if '@' in result.user_id else result.user_id,
-                    "clicks": result.clicks,
-                    "chats": result.chats
+                    "userId": user_id,
+                    "userName": user_id.split('@')[0] if '@' in user_id else user_id,
+                    "clicks": clicks,
+                    "chats": chats
                 }
-                for result in results
+                for user_id, (clicks, chats, _) in ranked
             ]
 
             return {"success": True, "data": {"data": data}}
@@ -52,48 +45,60 @@ class ClickAnalyticsService:
             print(f"Error in get_user_click_ranking: {str(e)}")
             return {"success": False, "error": str(e)}
 
+    def _user_click_counts(self, db: Session, start: date, end: date) -> Dict[str, List[int]]:
+        """클릭 기록이 있는 대화 수 내림차순으로 정렬된 {user_id: [클릭 수, 대화 수, 클릭 기록이 있는 대화 수]}"""
+        # 사용자별 클릭수와 대화수를 함께 조회
+        results = db.query(
+            ConvLog.user_id.label('user_id'),
+            func.count(func.distinct(
+                ClickedLog.conv_id
+            )).filter(ClickedLog.clicked == 'o').label('clicks'),
+            func.count(func.distinct(
+                ConvLog.conv_id
+            )).filter(ConvLog.qa == 'Q').label('chats'),
+            func.count(func.distinct(ClickedLog.conv_id)).label('clicked_chats')
+        ).outerjoin(
+            ClickedLog,
+            ConvLog.conv_id == ClickedLog.conv_id
+        ).filter(
+            and_(
+                cast(ConvLog.date, Date) >= start,
+                cast(ConvLog.date, Date) <= end
+            )
+        ).group_by(
+            ConvLog.user_id
+        ).order_by(
+            func.count(func.distinct(ClickedLog.conv_id)).desc()
+        ).all()
+
+        counts = {result.user_id: [result.clicks, result.chats, result.clicked_chats] for result in results}
+        archived = {
+            user_id: [clicks, chats, clicked_chats]
+            for user_id, (chats, clicks, clicked_chats) in archive_store.user_counts(db, start, end).items()
+        }
+        return merge_counts([counts, archived])
+
+    @cached_result("click_analytics.ratio")
+    @admitted("click_analytics.ratio")
     def get_click_ratio(self, start_date: str, end_date: str) -> Dict[str, Any]:
         try:
             start = datetime.strptime(start_date, "%Y-%m-%d")
             end = datetime.strptime(end_date, "%Y-%m-%d")
 
-            # 클릭한 대화와 사용자 수
-            clicked_stats = self.db.query(
-                func.count(func.distinct(ConvLog.conv_id)).filter(
-                    ClickedLog.clicked == 'o'
-                ).label('clicked_chats'),
-                func.count(func.distinct(ConvLog.user_id)).filter(
-                    ClickedLog.clicked == 'o'
-                ).label('clicked_users')
-            ).select_from(ConvLog).join(
-                ClickedLog,
-                ConvLog.conv_id == ClickedLog.conv_id,
-                isouter=True
-            ).filter(
-                and_(
-                    cast(ConvLog.date, Date) >= start.date(),
-                    cast(ConvLog.date, Date) <= end.date()
-                )
-            ).first()
-
-            # 전체 대화와 사용자 수
-            total_stats = self.db.query(
-                func.count(func.distinct(ConvLog.conv_id)).filter(
-                    ConvLog.qa == 'Q'
-                ).label('total_chats'),
-                func.count(func.distinct(ConvLog.user_id)).label('total_users')
-            ).filter(
-                and_(
-                    cast(ConvLog.date, Date) >= start.date(),
-                    cast(ConvLog.date, Date) <= end.date()
-                )
-            ).first()
-
-            # 클릭하지 않은 수 계산
-            clicked_chats = clicked_stats.clicked_chats if clicked_stats.clicked_chats is not None else 0
-            clicked_users = clicked_stats.clicked_users if clicked_stats.clicked_users is not None else 0
-            total_chats = total_stats.total_chats if total_stats.total_chats is not None else 0
-            total_users = total_stats.total_users if total_stats.total_users is not None else 0
+            scattered = should_scatter(start.date(), end.date())
+            if scattered or archive_store.covers(self.db, start.date(), end.date()):
+                if scattered:
+                    partials = scatter(self.db, "click_analytics.ratio", start.date(), end.date(), self._click_ratio_partial)
+                else:
+                    # 보관된 월이 섞이면 사용자 ID 목록을 합쳐야 하므로 부분 집계 경로를 쓴다
+                    partials = [self._click_ratio_partial(self.db, start.date(), end.date())]
+                # 대화 수는 청크끼리 겹치지 않아 합산하고, 사용자 수는 청크별 사용자 집합의 합집합으로 센다
+                clicked_chats = sum(partial["clicked_chats"] for partial in partials)
+                total_chats = sum(partial["total_chats"] for partial in partials)
+                clicked_users = len(merge_distinct(partial["clicked_users"] for partial in partials))
+                total_users = len(merge_distinct(partial["users"] for partial in partials))
+            else:
+                clicked_chats, clicked_users, total_chats, total_users = self._click_ratio_counts(start.date(), end.date())
 
             not_clicked_chats = total_chats - clicked_chats
             not_clicked_users = total_users - clicked_users
@@ -113,4 +118,89 @@ class ClickAnalyticsService:
 
         except Exception as e:
             print(f"Error in get_click_ratio: {str(e)}")
-            return {"success": False, "error": str(e)} 
\ No newline at end of file
+            return {"success": False, "error": str(e)}
+
+    def _click_ratio_counts(self, start: date, end: date) -> tuple:
+        """(클릭 대화 수, 클릭 사용자 수, 전체 대화 수, 전체 사용자 수)"""
+        # 클릭한 대화와 사용자 수
+        clicked_stats = self.db.query(
+            func.count(func.distinct(ConvLog.conv_id)).filter(
+                ClickedLog.clicked == 'o'
+            ).label('clicked_chats'),
+            func.count(func.distinct(ConvLog.user_id)).filter(
+                ClickedLog.clicked == 'o'
+            ).label('clicked_users')
+        ).select_from(ConvLog).join(
+            ClickedLog,
+            ConvLog.conv_id == ClickedLog.conv_id,
+            isouter=True
+        ).filter(
+            and_(
+                cast(ConvLog.date, Date) >= start,
+                cast(ConvLog.date, Date) <= end
+            )
+        ).first()
+
+        # 전체 대화와 사용자 수
+        total_stats = self.db.query(
+            func.count(func.distinct(ConvLog.conv_id)).filter(
+                ConvLog.qa == 'Q'
+            ).label('total_chats'),
+            func.count(func.distinct(ConvLog.user_id)).label('total_users')
+        ).filter(
+            and_(
+                cast(ConvLog.date, Date) >= start,
+                cast(ConvLog.date, Date) <= end
+            )
+        ).first()
+
+        clicked_chats = clicked_stats.clicked_chats if clicked_stats.clicked_chats is not None else 0
+        clicked_users = clicked_stats.clicked_users if clicked_stats.clicked_users is not None else 0
+        total_chats = total_stats.total_chats if total_stats.total_chats is not None else 0
+        total_users = total_stats.total_users if total_stats.total_users is not None else 0
+
+        return clicked_chats, clicked_users, total_chats, total_users
+
+    def _click_ratio_partial(self, db: Session, start: date, end: date) -> Dict[str, Any]:
+        in_range = and_(
+            cast(ConvLog.date, Date) >= start,
+            cast(ConvLog.date, Date) <= end
+        )
+        clicked_chats = db.query(
+            func.count(func.distinct(ConvLog.conv_id))
+        ).join(
+            ClickedLog,
+            ConvLog.conv_id == ClickedLog.conv_id
+        ).filter(
+            in_range,
+            ClickedLog.clicked == 'o'
+        ).scalar()
+        clicked_users = db.query(
+            ConvLog.user_id
+        ).join(
+            ClickedLog,
+            ConvLog.conv_id == ClickedLog.conv_id
+        ).filter(
+            in_range,
+            ClickedLog.clicked == 'o'
+        ).distinct().all()
+        total_chats = db.query(
+            func.count(func.distinct(ConvLog.conv_id))
+        ).filter(
+            in_range,
+            ConvLog.qa == 'Q'
+        ).scalar()
+        users = db.query(ConvLog.user_id).filter(in_range).distinct().all()
+
+        # 보관된 월은 파일에서 사용자별 카운트를 구해 더한다
+        archived = archive_store.user_counts(db, start, end)
+
+        # 사용자 수는 청크를 합칠 때 중복을 없애야 하므로 ID 목록으로 반환한다
+        return {
+            "clicked_chats": (clicked_chats or 0) + sum(clicks for _, clicks, _ in archived.values()),
+            "total_chats": (total_chats or 0) + sum(chats for chats, _, _ in archived.values()),
+            "clicked_users": [row.user_id for row in clicked_users] + [
+                user_id for user_id, (_, clicks, _) in archived.items() if clicks > 0
+            ],
+            "users": [row.user_id for row in users] + list(archived)
+        }
@@ -2,25 +2,30 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, cast, Date, distinct, text
 from datetime import datetime, timedelta
 from app.models.conversation import ConvLog, ClickedLog, StockCls
+from app.core.cache import result_cache
+from app.core.archive import archive_store
+from app.core.business_calendar import business_calendar
+from app.core.config import settings
 
 class DailyStatsService:
     def __init__(self, db: Session):
         self.db = db
 
     def is_business_day(self, date: datetime) -> bool:
-        # 주말 체크 (0 = 월요일, 6 = 일요일)
-        if date.weekday() >= 5:
-            return False
-        # 여기에 공휴일 체크 로직을 추가할 수 있습니다
-        return True
+        # 주말과 공휴일 모두 날짜 차원에서 조회
+        return business_calendar.is_business_day(date.date())
 
     def get_previous_business_day(self, date: datetime) -> datetime:
-        previous_date = date - timedelta(days=1)
-        while not self.is_business_day(previous_date):
-            previous_date -= timedelta(days=1)
-        return previous_date
+        previous_date = business_calendar.previous_business_day(date.date())
+        return datetime.combine(previous_date, date.time())
 
     def _get_date_stats(self, date: datetime) -> dict:
+        # 지난 날짜는 변하지 않으므로 길게, 오늘은 짧게 캐시한다
+        cache_key = f"daily_stats:{date.date()}"
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
             print(f"\n=== Date: {date.date()} ===")
             
@@ -119,18 +124,27 @@ class DailyStatsService:
                 'correct_predictions': correct_count if correct_count is not None else 0,
                 'incorrect_predictions': incorrect_count if incorrect_count is not None else 0
             }
+
+            # 보관된 날짜는 파일에서 읽어 더한다
+            # 늦게 들어와 DB 에 남은 행이 있을 수 있으므로 사용자 수는 두 쪽 사용자 집합을 합쳐서 센다
+            archived = archive_store.day_stats(self.db, date.date())
+            if archived is not None:
+                hot_users = self.db.query(ConvLog.user_id).filter(
+                    cast(ConvLog.date, Date) == date.date()
+                ).distinct().all()
+                for key in ['chat_count', 'click_count', 'correct_predictions', 'incorrect_predictions']:
+                    result[key] += archived[key]
+                result['user_count'] = len(archived['users'] | {row.user_id for row in hot_users})
             print(f"Final results: {result}")
+            ttl = settings.CACHE_TTL_TODAY if date.date() >= datetime.now().date() else settings.CACHE_TTL_CLOSED
+            result_cache.set(cache_key, result, ttl)
             return result
 
         except Exception as e:
+            # 0 으로 채워 반환하면 조회 실패가 정상 통계처럼 보이므로 호출한 쪽에서 실패로 처리하게 한다
             print(f"Error in _get_date_stats: {str(e)}")
-            return {
-                'chat_count': 0,
-                'user_count': 0,
-                'click_count': 0,
-                'correct_predictions': 0,
-                'incorrect_predictions': 0
-            }
+            self.db.rollback()
+            raise
 
     def get_daily_stats(self, target_date: datetime):
         try:
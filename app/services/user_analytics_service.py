@@ -0,0 +1,48 @@
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Dict, Any
+from app.core.user_activity import user_activity
+
+class UserAnalyticsService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _parse_range(self, start_date: str, end_date: str):
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+        if end < start:
+            raise ValueError("End date must be greater than or equal to start date")
+        return start, min(end, datetime.now().date())
+
+    def get_activity(self, start_date: str, end_date: str) -> Dict[str, Any]:
+        try:
+            start, end = self._parse_range(start_date, end_date)
+            user_activity.ensure_fresh(self.db)
+            return {"success": True, "data": {"data": user_activity.activity(start, end)}}
+
+        except ValueError:
+            raise
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error in get_activity: {str(e)}")
+            return {"success": False, "error": str(e)}
+
+    def get_retention(self, start_date: str, end_date: str, period: str = 'week', periods: int = 12) -> Dict[str, Any]:
+        try:
+            start, end = self._parse_range(start_date, end_date)
+            user_activity.ensure_fresh(self.db)
+            # counts[N] / retention[N]: 코호트 시작 후 N 번째 주/월에 활동한 사용자 수와 비율 (N=0 은 100%)
+            return {
+                "success": True,
+                "data": {
+                    "period": period,
+                    "data": user_activity.retention(start, end, period, periods)
+                }
+            }
+
+        except ValueError:
+            raise
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error in get_retention: {str(e)}")
+            return {"success": False, "error": str(e)}
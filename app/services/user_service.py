@@ -0,0 +1,123 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, exists, select, case, tuple_
+from datetime import date, datetime, timedelta
+from typing import Optional, Dict, Any, Tuple
+from app.core.archive import archive_store
+from app.core.user_index import user_index
+from app.models.conversation import ConvLog, StockCls
+
+class UserService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def search_users(self, keyword: str, limit: int = 10) -> Dict[str, Any]:
+        try:
+            if not keyword:
+                raise ValueError("Keyword is required")
+
+            # 자동완성 입력마다 인덱스 재구성 비용을 치르지 않도록 갱신은 백그라운드에서 한다
+            user_index.refresh_in_background()
+            if user_index.watermark is None:
+                # 인덱스가 아직 한 번도 만들어지지 않았으면(기동 직후) DB 에서 찾는다
+                user_ids = [user_id for (user_id,) in self.db.query(ConvLog.user_id).filter(
+                    ConvLog.user_id.ilike(f"%{keyword}%")
+                ).distinct().order_by(ConvLog.user_id).limit(limit).all()]
+            else:
+                user_ids = user_index.search(keyword, limit)
+            data = [
+                {
+                    "userId": user_id,
+                    "userName": user_id.split('@')[0] if '@' in user_id else user_id
+                }
+                for user_id in user_ids
+            ]
+
+            return {"success": True, "data": {"data": data}}
+
+        except Exception as e:
+            print(f"Error in search_users: {str(e)}")
+            return {"success": False, "error": str(e)}
+
+    def _parse_cursor(self, cursor: str) -> Tuple[datetime, str]:
+        """nextCursor ("{ISO 시각}|{conv_id}") -> (date, conv_id)"""
+        timestamp, separator, conv_id = cursor.partition("|")
+        if not separator or not conv_id:
+            raise ValueError("Invalid cursor")
+        return datetime.fromisoformat(timestamp), conv_id
+
+    def get_user_chats(
+        self,
+        user_id: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        before: Optional[str] = None,
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        try:
+            # (user_id, date) 인덱스를 그대로 탈 수 있도록 date 컬럼을 가공하지 않고 비교한다
+            conditions = [ConvLog.user_id == user_id, ConvLog.qa == 'Q']
+            start = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else date.min
+            end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else date.max
+            if start_date:
+                conditions.append(ConvLog.date >= datetime.combine(start, datetime.min.time()))
+            if end_date:
+                conditions.append(ConvLog.date < datetime.combine(end, datetime.min.time()) + timedelta(days=1))
+            cursor = None
+            if before:
+                # 이전 페이지 마지막 행의 (date, conv_id) 를 커서로 사용해 같은 시각의 행도 빠뜨리지 않는다
+                cursor = self._parse_cursor(before)
+                conditions.append(tuple_(ConvLog.date, ConvLog.conv_id) < tuple_(*cursor))
+
+            stock_exists = exists(
+                select(StockCls.conv_id).where(
+                    and_(
+                        StockCls.conv_id == ConvLog.conv_id,
+                        StockCls.ensemble == 'o'
+                    )
+                )
+            )
+
+            items = [item._asdict() for item in self.db.query(
+                ConvLog.conv_id.label('id'),
+                ConvLog.date.label('timestamp'),
+                ConvLog.content.label('question'),
+                case((stock_exists, True), else_=False).label('isStock')
+            ).filter(
+                and_(*conditions)
+            ).order_by(
+                ConvLog.date.desc(),
+                ConvLog.conv_id.desc()
+            ).limit(limit + 1).all()]
+
+            if archive_store.covers(self.db, start, end):
+                # 보관된 월은 파일에서 같은 커서 이후 행을 가져와 (date, conv_id) 최신순으로 합친다
+                _, cold_items = archive_store.find_chats(
+                    self.db, start, end, user_ids=[user_id], limit=limit + 1, before=cursor
+                )
+                items = sorted(items + cold_items, key=lambda item: (item["timestamp"], item["id"]), reverse=True)[:limit + 1]
+
+            has_more = len(items) > limit
+            items = items[:limit]
+
+            data = [
+                {
+                    "id": item["id"],
+                    "timestamp": item["timestamp"].strftime("%Y-%m-%d %H:%M:%S"),
+                    "question": item["question"],
+                    "isStock": bool(item["isStock"])
+                }
+                for item in items
+            ]
+
+            return {
+                "success": True,
+                "data": {
+                    "userId": user_id,
+                    "data": data,
+                    "nextCursor": f"{items[-1]['timestamp'].isoformat()}|{items[-1]['id']}" if has_more else None
+                }
+            }
+
+        except Exception as e:
+            print(f"Error in get_user_chats: {str(e)}")
+            return {"success": False, "error": str(e)}
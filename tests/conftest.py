@@ -0,0 +1,129 @@
+import os
+from datetime import date, datetime
+import pytest
+from sqlalchemy import create_engine, event, make_url, text
+
+# 쿼리 플랜 테스트는 실제 PostgreSQL 이 필요하다
+# TEST_DATABASE_URL 의 데이터베이스에 PLAN_SCHEMA 스키마를 만들어 합성 데이터를 넣고, 끝나면 스키마를 지운다
+PLAN_SCHEMA = "ibk_plan_test"
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+if TEST_DATABASE_URL:
+    # 앱 설정이 로드되기 전에 테스트 스키마를 바라보도록 DATABASE_URL 을 바꿔둔다
+    os.environ["DATABASE_URL"] = make_url(TEST_DATABASE_URL).update_query_dict(
+        {"options": f"-csearch_path={PLAN_SCHEMA}"}
+    ).render_as_string(hide_password=False)
+    # 결과 캐시가 쿼리를 가리지 않도록 프로세스 내 캐시를 쓴다
+    os.environ["RESULT_STORE"] = "memory"
+
+# 합성 데이터와 케이스 기간의 기준일
+# 실행 날짜를 쓰면 월 경계와 청크 수가 날짜마다 달라져 계획 스냅샷이 바뀌므로 고정한다
+REFERENCE_DATE = date(2025, 6, 18)
+
+# 합성 데이터 규모: REFERENCE_DATE 까지 DAYS 일 동안 하루 QUESTIONS_PER_DAY 개의 질문과 답변
+DAYS = 400
+QUESTIONS_PER_DAY = 500
+USERS = 2000
+
+SYNTHETIC_DATA = """
+WITH q AS (
+    SELECT
+        g,
+        CAST(:today AS timestamp) - (g % :days) * interval '1 day' + (g * 7919 % 86400) * interval '1 second' AS ts,
+        'user' || (g * 31 % :users) || '@ibk.co.kr' AS user_id
+    FROM generate_series(1, :questions) AS g
+), conv AS (
+    INSERT INTO ibk_convlog (conv_id, date, qa, content, user_id)
+    SELECT 'q' || g, ts, 'Q', '삼성전자 주가 전망 질문 ' || g, user_id FROM q
+    UNION ALL
+    SELECT 'a' || g, ts, 'A', '답변 ' || g || repeat(' 종목 분석 내용', 10), user_id FROM q
+    RETURNING conv_id
+), clicked AS (
+    INSERT INTO ibk_clicked_tb (conv_id, clicked, user_id)
+    SELECT 'q' || g, CASE WHEN g % 3 = 0 THEN 'x' ELSE 'o' END, user_id FROM q WHERE g % 4 = 0
+    RETURNING conv_id
+)
+INSERT INTO ibk_stock_cls (conv_id, ensemble, gpt_res, enc_res)
+SELECT
+    'q' || g,
+    CASE WHEN g % 2 = 0 THEN 'o' ELSE 'x' END,
+    CASE WHEN g % 3 = 0 THEN 'o' ELSE 'x' END,
+    CASE WHEN g % 5 = 0 THEN 'o' ELSE 'x' END
+FROM q
+"""
+
+@pytest.fixture(scope="session")
+def plan_db():
+    """합성 데이터가 들어간 테스트 스키마 (세션당 한 번 생성)"""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    admin = create_engine(TEST_DATABASE_URL)
+    with admin.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {PLAN_SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {PLAN_SCHEMA}"))
+
+    from app.core import database
+    from app.core.init_db import init_db
+
+    init_db()
+    today = datetime.combine(REFERENCE_DATE, datetime.min.time())
+    with database.engine.begin() as conn:
+        conn.execute(text(SYNTHETIC_DATA), {
+            "today": today,
+            "days": DAYS,
+            "users": USERS,
+            "questions": DAYS * QUESTIONS_PER_DAY
+        })
+    with database.engine.begin() as conn:
+        # 표본이 전체 행을 덮도록 해 통계(와 그에 따른 계획)가 실행마다 같게 한다
+        conn.execute(text("SET LOCAL default_statistics_target = 10000"))
+        conn.execute(text("ANALYZE ibk_convlog, ibk_clicked_tb, ibk_stock_cls, ibk_calendar"))
+
+    yield database
+
+    database.dispose_engine()
+    with admin.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {PLAN_SCHEMA} CASCADE"))
+    admin.dispose()
+
+@pytest.fixture
+def db(plan_db):
+    session = plan_db.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def captured_queries(plan_db):
+    """테스트 중 실행된 ibk_* 테이블 SELECT 문과 파라미터 목록"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return
+        if "ibk_" not in statement:
+            return
+        if (statement, parameters) not in statements:
+            statements.append((statement, parameters))
+
+    # scatter 청크는 전용 엔진에서 실행된다
+    engines = [plan_db.engine, plan_db.scatter_engine]
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", record)
+
+@pytest.fixture
+def explain(plan_db):
+    """explain(statement, parameters) -> EXPLAIN (FORMAT JSON) 결과의 최상위 Plan"""
+    def run(statement, parameters) -> dict:
+        with plan_db.engine.connect() as conn:
+            result = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        return result[0]["Plan"]
+
+    return run
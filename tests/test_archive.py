@@ -0,0 +1,94 @@
+import os
+from datetime import date, datetime
+
+# 앱 설정이 DATABASE_URL 을 요구하지만 이 테스트는 DB 에 접속하지 않는다
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://localhost/unused")
+
+import pytest
+from app.core.archive import ArchiveFile, ArchiveStore, COLUMNS, merge_newest, write_archive
+
+MONTH = date(2024, 3, 1)
+
+def row(conv_id, timestamp, qa='Q', user_id='kim@ibk.co.kr', clicked=None, clicked_user_id=None, stock=None):
+    # stock: (ensemble, gpt_res, enc_res), 분류 결과가 없으면 None
+    ensemble, gpt_res, enc_res = stock or (None, None, None)
+    return (conv_id, timestamp, qa, f"{conv_id} 본문 삼성전자", user_id, clicked, clicked_user_id, ensemble, gpt_res, enc_res)
+
+ROWS = [
+    row('q2', datetime(2024, 3, 2, 9, 0, 0, 500), clicked='o', clicked_user_id='kim@ibk.co.kr', stock=('o', 'o', 'x')),
+    row('a2', datetime(2024, 3, 2, 9, 0, 1), qa='A'),
+    row('q1', datetime(2024, 3, 1, 23, 59, 59, 999999), user_id='lee@ibk.co.kr', stock=('x', 'x', 'x')),
+    row('q3', datetime(2024, 3, 31, 0, 0), user_id='park', clicked='x', clicked_user_id='park'),
+    row('q4', datetime(2024, 3, 31, 0, 0), user_id='lee@ibk.co.kr')
+]
+
+@pytest.fixture
+def archive(tmp_path):
+    path = str(tmp_path / "nested" / "convlog-2024-03.v1.ibka")
+    size = write_archive(path, MONTH, ROWS)
+    assert size == os.path.getsize(path)
+    assert not os.path.exists(f"{path}.tmp")
+    return ArchiveFile(path)
+
+def test_round_trip_restores_rows_sorted_by_date(archive):
+    expected = sorted(ROWS, key=lambda value: (value[1], value[0]))
+
+    assert archive.rows == len(ROWS)
+    assert archive.to_rows() == expected
+
+def test_missing_children_stay_none(archive):
+    rows = {value[0]: dict(zip(COLUMNS, value)) for value in archive.to_rows()}
+
+    assert rows['a2']['clicked'] is None
+    assert rows['a2']['clicked_user_id'] is None
+    assert rows['a2']['ensemble'] is None
+    assert rows['q3']['ensemble'] is None
+    assert rows['q1']['clicked'] is None
+    assert rows['q2']['gpt_res'] == 'o'
+
+def test_user_dictionary_is_shared_between_user_columns(archive):
+    users = archive.column('users')
+
+    assert users == [None, 'kim@ibk.co.kr', 'lee@ibk.co.kr', 'park']
+    assert archive.values('clicked_user_id') is users
+    assert archive.code('user_id', 'park') == 3
+    assert archive.code('user_id', 'choi') == -1
+
+def test_day_index_covers_each_day(archive):
+    assert archive.days == [
+        (date(2024, 3, 1), 0, 1),
+        (date(2024, 3, 2), 1, 3),
+        (date(2024, 3, 31), 3, 5)
+    ]
+    assert archive.day_ranges(date(2024, 3, 2), date(2024, 3, 30)) == [(date(2024, 3, 2), 1, 3)]
+    assert archive.row_range(date(2024, 3, 2), date(2024, 3, 31)) == (1, 5)
+    assert archive.row_range(date(2024, 3, 3), date(2024, 3, 30)) == (0, 0)
+
+def test_large_dictionary_uses_wide_codes(tmp_path):
+    rows = [row(f"q{index}", datetime(2024, 3, 1 + index % 28), user_id=f"user{index}") for index in range(300)]
+    path = str(tmp_path / "wide.ibka")
+    write_archive(path, MONTH, rows)
+    archive = ArchiveFile(path)
+
+    assert archive.column('user_id').typecode == 'I'
+    assert archive.to_rows() == sorted(rows, key=lambda value: (value[1], value[0]))
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.ibka"
+    path.write_bytes(b"not an archive")
+
+    with pytest.raises(ValueError):
+        ArchiveFile(str(path))
+
+def test_path_for_requires_absolute_directory(tmp_path):
+    assert ArchiveStore(str(tmp_path), 1).path_for(MONTH, "v2") == str(tmp_path / "convlog-2024-03.v2.ibka")
+    for directory in ["", "./archive"]:
+        with pytest.raises(ValueError):
+            ArchiveStore(directory, 1).path_for(MONTH, "v2")
+
+def test_merge_newest_pages_across_hot_and_cold():
+    hot = [{"id": name, "timestamp": datetime(2024, 3, day)} for name, day in [("h3", 30), ("h2", 20), ("h1", 5)]]
+    cold = [{"id": name, "timestamp": datetime(2024, 3, day)} for name, day in [("c2", 25), ("c1", 10)]]
+
+    assert [item["id"] for item in merge_newest(hot, cold, 0, 3)] == ["h3", "c2", "h2"]
+    assert [item["id"] for item in merge_newest(hot, cold, 3, 3)] == ["c1", "h1"]
@@ -0,0 +1,24 @@
+import os
+
+# 앱 설정이 DATABASE_URL 을 요구하지만 이 테스트는 DB 에 접속하지 않는다
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://localhost/unused")
+
+from app.core.cache import ResultCache
+
+def test_get_returns_copy():
+    cache = ResultCache(4, 60)
+    cache.set("daily", {"success": True, "data": {"chats": [1, 2]}})
+
+    first = cache.get("daily")
+    first["data"]["chats"].append(3)
+
+    assert cache.get("daily") == {"success": True, "data": {"chats": [1, 2]}}
+
+def test_set_stores_copy():
+    cache = ResultCache(4, 60)
+    result = {"success": True, "data": {"chats": [1, 2]}}
+    cache.set("daily", result)
+
+    result["data"]["chats"].clear()
+
+    assert cache.get("daily")["data"]["chats"] == [1, 2]
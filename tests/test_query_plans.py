@@ -0,0 +1,305 @@
+"""서비스 쿼리의 실행 계획 회귀 테스트
+
+각 케이스는 서비스 메서드를 실제로 호출하면서 실행된 SELECT 문을 모두 잡아 EXPLAIN (FORMAT JSON) 을 구하고,
+- 지정한 인덱스를 쓰는지
+- ibk_convlog 를 Seq Scan 해서 많은 행(SEQ_SCAN_MAX_ROWS 초과)을 내보내지 않는지
+- 가장 비싼 쿼리의 예상 비용이 예산 안인지
+를 확인한다. 계획의 모양(노드/테이블/인덱스)은 tests/plans/<케이스>.json 에 저장해 변경을 리뷰할 수 있게 한다.
+
+TEST_DATABASE_URL=postgresql+psycopg2://... pytest tests/test_query_plans.py
+UPDATE_PLAN_SNAPSHOTS=1 로 실행하면 스냅샷을 새로 쓴다 (스냅샷이 없는 케이스는 이렇게 만들기 전까지 실패한다).
+"""
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+import pytest
+from sqlalchemy import text
+from conftest import REFERENCE_DATE
+
+if not os.getenv("TEST_DATABASE_URL"):
+    # 앱 설정이 DATABASE_URL 을 요구하므로 모듈을 불러오기 전에 건너뛴다
+    pytest.skip("TEST_DATABASE_URL is not set", allow_module_level=True)
+
+from app.core.cache import result_cache
+from app.core.config import settings
+from app.core.user_index import user_index
+from app.services.chat_analytics_service import ChatAnalyticsService
+from app.services.click_analytics_service import ClickAnalyticsService
+from app.services.daily_stats_service import DailyStatsService
+from app.services.chat_service import ChatService
+
+SNAPSHOT_DIR = Path(__file__).parent / "plans"
+UPDATE_SNAPSHOTS = os.getenv("UPDATE_PLAN_SNAPSHOTS") == "1"
+# ibk_convlog Seq Scan 의 예상 행 수(Plan Rows)가 이 값을 넘으면 실패한다
+SEQ_SCAN_MAX_ROWS = 10000
+# 스냅샷에 남기는 계획 노드 속성 (비용/행 수처럼 매번 바뀌는 값은 제외)
+PLAN_KEYS = ["Node Type", "Strategy", "Join Type", "Relation Name", "Index Name"]
+
+# 케이스 기간은 실행 날짜가 아니라 합성 데이터의 기준일에서 센다
+TODAY = REFERENCE_DATE
+
+def day(days_ago: int) -> str:
+    return (TODAY - timedelta(days=days_ago)).strftime("%Y-%m-%d")
+
+def warm_user_index(db) -> None:
+    # 요청 경로에서는 백그라운드 갱신이 일어나지 않도록 인덱스를 미리 최신으로 만든다
+    user_index.ensure_fresh(db)
+
+def expire_user_index(db) -> None:
+    # 전체 재구성은 주기적인 작업이므로 미리 해두고, 호출 시에는 증분 갱신 경로를 타게 한다
+    user_index.ensure_fresh(db)
+    user_index._refreshed_at = 0.0
+
+# 1년 범위는 월 단위 청크(scatter)로 나뉘어 청크마다 인덱스 범위 조회가 된다
+CASES = [
+    # ChatAnalyticsService
+    {
+        "name": "chat_daily_week",
+        "call": lambda db: ChatAnalyticsService(db).get_daily_stats(day(7), day(1)),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 25000
+    },
+    {
+        "name": "chat_daily_week_compare",
+        "call": lambda db: ChatAnalyticsService(db).get_daily_stats(day(7), day(1), "lastWeek"),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 25000
+    },
+    {
+        # 떨어진 비교 기간도 OR 조건으로 한 번만 읽는다
+        "name": "chat_daily_week_last_year",
+        "call": lambda db: ChatAnalyticsService(db).get_daily_stats(day(7), day(1), "lastYear"),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 25000,
+        "convlog_queries": 1
+    },
+    {
+        "name": "chat_daily_business_days",
+        "call": lambda db: ChatAnalyticsService(db).get_daily_stats(day(14), day(1), None, True),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 25000
+    },
+    {
+        "name": "chat_daily_year",
+        "call": lambda db: ChatAnalyticsService(db).get_daily_stats(day(365), day(0)),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 30000
+    },
+    {
+        "name": "chat_hourly_today",
+        "call": lambda db: ChatAnalyticsService(db).get_hourly_stats("custom", day(0), day(0)),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 6000
+    },
+    {
+        "name": "chat_hourly_week_compare",
+        "call": lambda db: ChatAnalyticsService(db).get_hourly_stats("custom", day(7), day(1), "lastWeek"),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 25000
+    },
+    {
+        # 비교 기간이 1년 전이어도 두 기간 사이는 읽지 않는다
+        "name": "chat_hourly_day_last_year",
+        "call": lambda db: ChatAnalyticsService(db).get_hourly_stats("custom", day(3), day(3), "lastYear"),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 6000
+    },
+    {
+        "name": "chat_weekday_month",
+        "call": lambda db: ChatAnalyticsService(db).get_weekday_stats(TODAY.year, TODAY.month),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 30000
+    },
+    {
+        "name": "chat_weekday_month_compare",
+        "call": lambda db: ChatAnalyticsService(db).get_weekday_stats(TODAY.year, TODAY.month, "previous", True),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 35000
+    },
+    {
+        "name": "chat_ranking_daily",
+        "call": lambda db: ChatAnalyticsService(db).get_user_ranking("custom", 10, "desc", day(0), day(0)),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 6000
+    },
+    {
+        "name": "chat_ranking_week_compare",
+        "call": lambda db: ChatAnalyticsService(db).get_user_ranking("custom", 10, "asc", day(7), day(1), "previous"),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 25000
+    },
+    {
+        "name": "chat_ranking_week_last_year",
+        "call": lambda db: ChatAnalyticsService(db).get_user_ranking("custom", 10, "desc", day(7), day(1), "lastYear"),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 25000,
+        "convlog_queries": 1
+    },
+    {
+        # 청크마다 대응하는 1년 전 청크를 같은 쿼리로 읽는다 (월 청크 수만큼의 쿼리)
+        "name": "chat_ranking_quarter_last_year",
+        "call": lambda db: ChatAnalyticsService(db).get_user_ranking("custom", 10, "desc", day(90), day(1), "lastYear"),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 30000,
+        "convlog_queries": 4
+    },
+    {
+        "name": "chat_ranking_year",
+        "call": lambda db: ChatAnalyticsService(db).get_user_ranking("custom", 10, "desc", day(365), day(0)),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 30000
+    },
+    # ClickAnalyticsService
+    {
+        "name": "click_user_ranking_week",
+        "call": lambda db: ClickAnalyticsService(db).get_user_click_ranking(day(7), day(1)),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 25000
+    },
+    {
+        "name": "click_ratio_week",
+        "call": lambda db: ClickAnalyticsService(db).get_click_ratio(day(7), day(1)),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 25000
+    },
+    {
+        "name": "click_ratio_year",
+        "call": lambda db: ClickAnalyticsService(db).get_click_ratio(day(365), day(0)),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 30000
+    },
+    # DailyStatsService
+    {
+        "name": "daily_stats_today",
+        "call": lambda db: DailyStatsService(db).get_daily_stats(datetime.combine(TODAY, datetime.min.time())),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 15000
+    },
+    # ChatService
+    {
+        "name": "chats_week",
+        "call": lambda db: ChatService(db).get_chats(day(7), day(1)),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 25000
+    },
+    {
+        "name": "chats_week_stock",
+        "call": lambda db: ChatService(db).get_chats(day(7), day(1), "stock", page=2),
+        "indexes": ["ix_ibk_convlog_date_day", "ibk_stock_cls_pkey"],
+        "max_cost": 30000
+    },
+    {
+        "name": "chats_year_user",
+        "setup": warm_user_index,
+        "call": lambda db: ChatService(db).get_chats(day(365), day(0), "all", "user1234@"),
+        "indexes": ["ix_ibk_convlog_user_id_date"],
+        "max_cost": 6000
+    },
+    {
+        "name": "user_index_refresh",
+        "setup": expire_user_index,
+        "call": lambda db: user_index.ensure_fresh(db),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 6000
+    },
+    {
+        "name": "chats_week_keyword",
+        "call": lambda db: ChatService(db).get_chats(day(7), day(1), "non-stock", keyword="전망"),
+        "indexes": ["ix_ibk_convlog_date_day"],
+        "max_cost": 30000
+    }
+]
+
+def walk(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+def shape(node: dict) -> dict:
+    """비교/스냅샷용으로 계획 트리에서 구조 정보만 남긴다"""
+    result = {key: node[key] for key in PLAN_KEYS if key in node}
+    if node.get("Plans"):
+        result["Plans"] = [shape(child) for child in node["Plans"]]
+    return result
+
+def server_version(db) -> int:
+    return int(db.execute(text("SHOW server_version_num")).scalar()) // 10000
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    # 캐시된 결과로는 쿼리가 실행되지 않으므로 케이스마다 비우고, 넓은 기간은 청크 분할 경로도 함께 잡는다
+    result_cache.clear()
+    monkeypatch.setattr(settings, "SCATTER_ENABLED", True)
+    yield
+    result_cache.clear()
+
+def test_synthetic_table_is_large_enough(db):
+    # 행 수가 적으면 플래너가 Seq Scan 을 고르므로 아래 검사가 의미를 가지려면 충분히 커야 한다
+    rows = db.execute(text("SELECT reltuples FROM pg_class WHERE oid = 'ibk_convlog'::regclass")).scalar()
+    assert rows > SEQ_SCAN_MAX_ROWS
+
+@pytest.mark.parametrize("case", CASES, ids=[case["name"] for case in CASES])
+def test_query_plan(case, db, captured_queries, explain):
+    if "setup" in case:
+        case["setup"](db)
+        captured_queries.clear()
+    result = case["call"](db)
+    assert not (isinstance(result, dict) and result.get("success") is False), result
+
+    queries = list(captured_queries)
+    assert queries, "no queries were captured"
+    plans = [(statement, explain(statement, parameters)) for statement, parameters in queries]
+
+    used_indexes = set()
+    failures = []
+    for statement, plan in plans:
+        for node in walk(plan):
+            if "Index Name" in node:
+                used_indexes.add(node["Index Name"])
+            if (
+                node["Node Type"] == "Seq Scan"
+                and node.get("Relation Name") == "ibk_convlog"
+                and node.get("Plan Rows", 0) > SEQ_SCAN_MAX_ROWS
+            ):
+                failures.append(f"Seq Scan on ibk_convlog ({node['Plan Rows']} rows):\n{statement}")
+
+    for index in case.get("indexes", []):
+        if index not in used_indexes:
+            failures.append(f"index {index} is not used (used: {sorted(used_indexes)})")
+
+    if "convlog_queries" in case:
+        # 현재/비교 기간을 따로 읽으면 ibk_convlog 쿼리 수가 늘어난다
+        convlog_queries = sum(1 for statement, _ in plans if "FROM ibk_convlog" in statement)
+        if convlog_queries > case["convlog_queries"]:
+            failures.append(f"{convlog_queries} queries on ibk_convlog (expected at most {case['convlog_queries']})")
+
+    max_cost = max(plan["Total Cost"] for _, plan in plans)
+    if max_cost > case["max_cost"]:
+        failures.append(f"estimated cost {max_cost:.0f} exceeds budget {case['max_cost']}")
+
+    # 같은 SQL 은 파라미터가 달라도(청크 등) 한 번만 남기고, 청크는 병렬로 실행되므로 정렬해 순서를 고정한다
+    snapshot_queries = []
+    for statement, plan in plans:
+        entry = {"sql": " ".join(statement.split()), "plan": shape(plan)}
+        if entry not in snapshot_queries:
+            snapshot_queries.append(entry)
+    snapshot_queries.sort(key=lambda entry: (entry["sql"], json.dumps(entry["plan"], sort_keys=True)))
+    snapshot = {"postgres": server_version(db), "queries": snapshot_queries}
+
+    path = SNAPSHOT_DIR / f"{case['name']}.json"
+    if UPDATE_SNAPSHOTS:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(snapshot, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    elif not path.exists():
+        # 리뷰 없이 현재 계획이 기준이 되지 않도록 스냅샷은 명시적으로 만든다
+        failures.append(f"snapshot {path.name} is missing (rerun with UPDATE_PLAN_SNAPSHOTS=1 and commit it)")
+    else:
+        expected = json.loads(path.read_text(encoding="utf-8"))
+        # 메이저 버전이 다르면 플래너가 달라 모양 비교는 건너뛰고 위의 속성 검사만 적용한다
+        if expected["postgres"] == snapshot["postgres"] and expected["queries"] != snapshot["queries"]:
+            failures.append(
+                f"plan changed from {path.name} (rerun with UPDATE_PLAN_SNAPSHOTS=1 and review the diff)"
+            )
+
+    assert not failures, "\n".join(failures)
@@ -0,0 +1,101 @@
+import os
+import pytest
+from app.core import shared_store
+from app.core.shared_store import SharedResultStore
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        self.now += 1
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    # LRU 접근 시각이 호출 순서대로 증가하도록 시계를 고정한다
+    fake = FakeClock()
+    monkeypatch.setattr(shared_store, "time", fake)
+    return fake
+
+@pytest.fixture
+def make_store(tmp_path):
+    stores = []
+
+    def make(slot_count=16, slot_size=1024, ways=4, version=""):
+        store = SharedResultStore(str(tmp_path / "store"), slot_count, slot_size, ways=ways, version=version)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+def test_get_set_roundtrip(make_store):
+    store = make_store()
+    value = {"success": True, "data": [{"date": "2026-10-01", "chatCount": 3, "label": "한글"}]}
+    assert store.get("a") is None
+    assert store.set("a", value)
+    assert store.get("a") == value
+
+    store.set("a", {"success": True, "data": []})
+    assert store.get("a") == {"success": True, "data": []}
+
+def test_values_are_shared_between_instances(make_store):
+    # 같은 파일을 연 다른 워커가 쓴 값을 읽는다
+    writer, reader = make_store(), make_store()
+    writer.set("shared", [1, 2, 3])
+    assert reader.get("shared") == [1, 2, 3]
+
+def test_expired_value_is_not_returned(make_store):
+    store = make_store()
+    store.set("old", 1, ttl=-1)
+    assert store.get("old") is None
+
+def test_least_recently_used_slot_is_evicted(make_store, clock):
+    # 세트 하나에 슬롯 2개
+    store = make_store(slot_count=2, ways=2)
+    store.set("a", "A")
+    store.set("b", "B")
+    assert store.get("a") == "A"
+
+    store.set("c", "C")
+    assert store.get("a") == "A"
+    assert store.get("b") is None
+    assert store.get("c") == "C"
+
+def test_expired_slot_is_reused_before_live_ones(make_store, clock):
+    store = make_store(slot_count=2, ways=2)
+    store.set("live", 1)
+    store.set("expired", 2, ttl=-10)
+    store.set("new", 3)
+    assert store.get("live") == 1
+    assert store.get("new") == 3
+
+def test_oversized_value_is_not_stored(make_store):
+    store = make_store(slot_size=128)
+    # 압축해도 슬롯보다 크도록 무작위 바이트를 쓴다
+    assert not store.set("big", os.urandom(512).hex())
+    assert store.get("big") is None
+    assert store.set("small", "ok")
+    assert store.get("small") == "ok"
+
+def test_clear(make_store):
+    store = make_store()
+    store.set("a", 1)
+    store.clear()
+    assert store.get("a") is None
+
+def test_new_version_starts_empty_and_removes_old_file(make_store, tmp_path):
+    old = make_store(version="v1")
+    old.set("a", "old result")
+
+    new = make_store(version="v2")
+    assert new.get("a") is None
+    assert not os.path.exists(tmp_path / "store.v1")
+    # 이전 버전 워커는 지워진 파일의 매핑을 계속 쓸 수 있다
+    assert old.get("a") == "old result"
+
+def test_layout_change_resets_file(make_store):
+    make_store(slot_count=16).set("a", 1)
+    assert make_store(slot_count=32).get("a") is None